@@ -22,6 +22,21 @@ from pycbc.io.record import FieldArray
 logger = logging.getLogger('pycbc.distributions.joint')
 
 
+def _rvs_chunk(args):
+    """ Draw samples from a joint distribution with its own random stream,
+    for use with a pool. The distributions draw from numpy's global random
+    state, so it is seeded for the chunk and restored afterwards, as the
+    chunk may be drawn in the calling process.
+    """
+    dist, size, seed, max_draw = args
+    state = numpy.random.get_state()
+    numpy.random.seed(seed)
+    try:
+        return dist.rvs(size=size, max_draw=max_draw)
+    finally:
+        numpy.random.set_state(state)
+
+
 class JointDistribution(object):
     r"""
     Callable class that calculates the joint distribution built from a set of
@@ -307,37 +322,96 @@ class JointDistribution(object):
 
         return logp - self._logpdf_scale
 
-    def rvs(self, size=1):
+    def rvs(self, size=1, pool=None, seed=None, chunksize=int(1e6),
+            max_draw=int(1e7)):
         """ Rejection samples the parameter space.
+
+        The number of points drawn in each round is chosen from an estimate
+        of the fraction of draws that satisfy the constraints, so that
+        usually one round, or two, are enough. Accepted points are written
+        directly into the output array.
+
+        Parameters
+        ----------
+        size : int, optional
+            The number of samples to draw. Default is 1.
+        pool : optional
+            A pool with a ``map`` method, such as those given by
+            :py:func:`pycbc.pool.choose_pool`. If given, the samples are drawn
+            in chunks of ``chunksize`` on the pool's processes.
+        seed : int, optional
+            Only used with a ``pool``. The seed from which the independent
+            random streams of the chunks are derived. The samples depend only
+            on it and ``chunksize``, not on the number of processes. If not
+            given, the seed is drawn from numpy's global random state.
+        chunksize : int, optional
+            The number of samples drawn by each task given to the ``pool``.
+            Default is 1e6.
+        max_draw : int, optional
+            The largest number of points drawn in one round, to bound the
+            memory used. Default is 1e7.
+
+        Returns
+        -------
+        FieldArray
+            The samples.
         """
+        if pool is not None:
+            if seed is None:
+                seed = numpy.random.randint(2**31)
+            nchunks = max(1, int(numpy.ceil(size / float(chunksize))))
+            sizes = numpy.full(nchunks, size // nchunks)
+            sizes[:size % nchunks] += 1
+            seeds = [s.generate_state(1)[0] for s in
+                     numpy.random.SeedSequence(seed).spawn(nchunks)]
+            chunks = pool.map(_rvs_chunk, [(self, int(n), sd, max_draw)
+                                           for n, sd in zip(sizes, seeds)])
+            out = FieldArray(size, dtype=chunks[0].dtype)
+            start = 0
+            for chunk in chunks:
+                out[start:start + len(chunk)] = chunk
+                start += len(chunk)
+            return out
+
         # create output FieldArray
         dtype = [(arg, float) for arg in self.variable_args]
         out = FieldArray(size, dtype=dtype)
-        # loop until enough samples accepted
+        if not self._constraints:
+            self._draw_into(out)
+            return out
+
+        # the acceptance was estimated when the pdf was normalized
+        acceptance = self._pdf_scale
+        ndrawn = naccepted = 0
         remaining = size
-        ndraw = size
         while remaining:
+            # draw enough that we are very likely to get all of the points
+            # that remain in this round
+            ndraw = (remaining + 5 * remaining**0.5) / acceptance
+            ndraw = int(min(max_draw, max(ndraw, remaining)))
             # scratch space for evaluating constraints
             scratch = FieldArray(ndraw, dtype=dtype)
-            for dist in self.distributions:
-                # drawing samples from the distributions is generally faster
-                # then evaluating constrants, so we'll always draw the full
-                # size, even if that gives us more points than we need
-                draw = dist.rvs(size=ndraw)
-                for param in dist.params:
-                    scratch[param] = draw[param]
-            # apply any constraints
-            keep = self.within_constraints(scratch)
-            nkeep = keep.sum()
+            self._draw_into(scratch)
+            keep = numpy.flatnonzero(self.within_constraints(scratch))
+            keep = keep[:remaining]
             kmin = size - remaining
-            kmax = min(nkeep, remaining)
-            out[kmin:kmin+kmax] = scratch[keep][:kmax]
-            remaining = max(0, remaining - nkeep)
-            # to try to speed up next go around, we'll increase the draw
-            # size by the fraction of values that were kept, but cap at 1e6
-            ndraw = int(min(1e6, ndraw * numpy.ceil(ndraw / (nkeep + 1.))))
+            for param in self.variable_args:
+                out[param][kmin:kmin + len(keep)] = scratch[param][keep]
+            remaining -= len(keep)
+            ndrawn += ndraw
+            naccepted += len(keep)
+            acceptance = max(naccepted, 1) / float(ndrawn)
         return out
 
+    def _draw_into(self, out):
+        """ Fill the given array with draws from the distributions, without
+        applying the constraints.
+        """
+        for dist in self.distributions:
+            draw = dist.rvs(size=len(out))
+            for param in dist.params:
+                out[param] = draw[param]
+
     @property
     def well_reflected(self):
         """ Get list of which parameters are well reflected
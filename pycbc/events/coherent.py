@@ -448,3 +448,286 @@ def reweightedsnr_cut(rw_snr, rw_snr_threshold):
     if rw_snr_threshold is not None:
         rw_snr = np.where(rw_snr < rw_snr_threshold, 0, rw_snr)
     return rw_snr
+
+
+def get_projection_matrices(f_plus, f_cross, sigma, projection="standard"):
+    """Calculate the matrices that project the signal onto the network for
+    many sky positions at once. See :py:func:`get_projection_matrix`.
+
+    Parameters
+    ----------
+    f_plus: dict
+        Dictionary containing arrays of the plus antenna response factors
+        of each IFO at each sky position
+    f_cross: dict
+        Dictionary containing arrays of the cross antenna response factors
+        of each IFO at each sky position
+    sigma: dict
+        Dictionary of the sensitivity weights for each IFO
+    projection: optional, {string, 'standard'}
+        The signal polarization to project. Choice of 'standard'
+        (unrestricted; default), 'right' or 'left' (circular
+        polarizations)
+
+    Returns
+    -------
+    projection_matrices: np.ndarray
+        Array of shape (number of sky positions, number of IFOs, number of
+        IFOs) holding the projection matrix at each sky position, with the
+        IFOs in sorted order
+    """
+    keys = sorted(sigma.keys())
+    w_p = np.array([sigma[ifo] * np.asarray(f_plus[ifo]) for ifo in keys]).T
+    w_c = np.array([sigma[ifo] * np.asarray(f_cross[ifo]) for ifo in keys]).T
+
+    def dot(a, b):
+        return np.einsum('ki,ki->k', a, b)[:, None, None]
+
+    def outer(a, b):
+        return a[:, :, None] * b[:, None, :]
+
+    if projection == "standard":
+        denom = dot(w_p, w_p) * dot(w_c, w_c) - dot(w_p, w_c) ** 2
+        projection_matrices = (
+            dot(w_c, w_c) * outer(w_p, w_p)
+            + dot(w_p, w_p) * outer(w_c, w_c)
+            - dot(w_p, w_c) * (outer(w_p, w_c) + outer(w_c, w_p))
+        ) / denom
+    elif projection == "left":
+        projection_matrices = (
+            outer(w_p, w_p)
+            + outer(w_c, w_c)
+            + (outer(w_p, w_c) - outer(w_c, w_p)) * 1j
+        ) / (dot(w_p, w_p) + dot(w_c, w_c))
+    elif projection == "right":
+        projection_matrices = (
+            outer(w_p, w_p)
+            + outer(w_c, w_c)
+            + (outer(w_c, w_p) - outer(w_p, w_c)) * 1j
+        ) / (dot(w_p, w_p) + dot(w_c, w_c))
+    else:
+        raise ValueError(
+            f'Unknown projection: {projection}. Allowed values are: '
+            '"standard", "left", and "right"')
+
+    return projection_matrices
+
+
+def get_sky_coinc_indexes(idx_dict, time_delay_idx, zerolag_delay_idx,
+                          min_nifos, wraparound_dict):
+    """Return the indexes of coincident triggers for many sky positions and
+    time slides at once. This gives the same triggers, in the same order, as
+    calling :py:func:`get_coinc_indexes` for each of them in turn, after
+    keeping only the detector indexes which lie within the analysed time once
+    the zero-lag time delay is removed.
+
+    Parameters
+    ----------
+    idx_dict: dict
+        Dictionary of indexes of triggers above threshold in each
+        detector
+    time_delay_idx: dict
+        Dictionary giving, for each detector, an array of the time delay
+        indexes (time_delay*sample_rate, including time slides) of each
+        combination of sky position and time slide
+    zerolag_delay_idx: dict
+        Dictionary giving, for each detector, an array of the time delay
+        indexes without time slides of each combination
+    min_nifos: int
+        The minimum number of detectors needed to be above threshold
+        for a coincidence to be produced
+    wraparound_dict: dict
+        The length at which indices (at the detector) must be wrapped around
+
+    Returns
+    -------
+    combo: numpy.ndarray
+        The combination of sky position and time slide of each coincident
+        trigger
+    coinc_idx: numpy.ndarray
+        The geocent time indexes of the coincident triggers
+    """
+    ifos = list(idx_dict.keys())
+    width = max(wraparound_dict.values())
+    keys = {}
+    ranks = {}
+    for ifo in ifos:
+        idx = np.asarray(idx_dict[ifo])
+        wrap = wraparound_dict[ifo]
+        zerolag = np.asarray(zerolag_delay_idx[ifo])[:, None]
+        combo, rank = np.nonzero((idx > zerolag) & (idx < zerolag + wrap))
+        shifted = (idx[rank] - np.asarray(time_delay_idx[ifo])[combo]) % wrap
+        # Each key identifies a combination and a geocent time index, and
+        # sorting the keys sorts by combination first
+        keys[ifo] = combo.astype(np.int64) * width + shifted
+        ranks[ifo] = rank
+
+    if min_nifos == 2 and len(ifos) == 2:
+        # get_coinc_indexes returns the coincidences in the order of the
+        # triggers of the first detector
+        keys_1, keys_2 = keys[ifos[0]], keys[ifos[1]]
+        coinc, pos_1, _ = np.intersect1d(keys_1, keys_2, assume_unique=True,
+                                         return_indices=True)
+        coinc = coinc[np.lexsort((ranks[ifos[0]][pos_1], coinc // width))]
+    else:
+        coinc, counts = np.unique(
+            np.concatenate([keys[ifo] for ifo in ifos]), return_counts=True
+        )
+        if len(ifos) > 1:
+            coinc = coinc[counts > min_nifos - 1]
+    return coinc // width, coinc % width
+
+
+def coherent_sky_triggers(
+    snr_dict, idx_dict, time_delay_idx, wraparound_dict, min_nifos,
+    coinc_threshold, f_plus=None, f_cross=None, sigma=None,
+    projection="standard", apply_null_cut=True, null_min=5.25,
+    null_grad=0.2, null_step=20.0, max_batch_size=2**24
+):
+    """Find the coherent triggers of a template over all sky positions and
+    time slides.
+
+    For each combination of time slide and sky position, this finds the
+    coincident triggers, cuts on coincident SNR and, with more than one
+    detector, computes the coherent SNR, cuts on it, computes the null SNR
+    and optionally cuts on it, exactly as :py:func:`get_coinc_indexes`,
+    :py:func:`coincident_snr`, :py:func:`coherent_snr` and
+    :py:func:`null_snr` do for a single one. The combinations are evaluated
+    together, in batches whose intermediate arrays have at most about
+    `max_batch_size` elements.
+
+    Parameters
+    ----------
+    snr_dict: dict
+        Dictionary of the normalised complex SNR time series of each IFO
+    idx_dict: dict
+        Dictionary of indexes of triggers above threshold in each
+        detector
+    time_delay_idx: dict
+        Dictionary giving, for each detector, an array of shape (number of
+        time slides, number of sky positions) of the time delay indexes from
+        geocenter, including time slides. The first time slide must be the
+        zero-lag.
+    wraparound_dict: dict
+        The length at which indices (at the detector) must be wrapped around
+    min_nifos: int
+        The minimum number of detectors needed to be above threshold
+        for a coincidence to be produced
+    coinc_threshold: float
+        Coincident and coherent SNR threshold
+    f_plus: dict
+        Dictionary of arrays of the plus antenna response factors of each
+        IFO at each sky position. Required with more than one IFO.
+    f_cross: dict
+        Dictionary of arrays of the cross antenna response factors of each
+        IFO at each sky position. Required with more than one IFO.
+    sigma: dict
+        Dictionary of the sensitivity weights for each IFO. Required with
+        more than one IFO.
+    projection: optional, {string, 'standard'}
+        The signal polarization to project. Choice of 'standard', 'left',
+        'right' or 'left+right', which keeps triggers above threshold in both
+        circular polarizations and the larger of their coherent SNRs.
+    apply_null_cut: bool
+        Apply the null SNR cut (default True)
+    null_min: scalar
+        See :py:func:`null_snr`
+    null_grad: scalar
+        See :py:func:`null_snr`
+    null_step: scalar
+        See :py:func:`null_snr`
+    max_batch_size: int
+        Bound on the number of elements of the intermediate arrays
+
+    Yields
+    ------
+    triggers: dict
+        Dictionary of arrays for the surviving triggers of a batch of
+        combinations, in order of time slide, then sky position, then as
+        the single sky position functions order them. It holds the
+        'slide' and 'position' of each trigger, its geocent time 'index',
+        the 'coinc_snr', and the 'coherent_snr' and 'null_snr' (None with a
+        single IFO), together with dictionaries of the indexes at each IFO,
+        'det_index', and of the complex SNR at each IFO, 'snr'.
+    """
+    ifos = list(snr_dict.keys())
+    nslides, npos = np.shape(time_delay_idx[ifos[0]])
+    ntrigs = sum(len(idx_dict[ifo]) for ifo in ifos)
+    if ntrigs == 0:
+        return
+
+    projections = {}
+    if len(ifos) > 1:
+        names = ['left', 'right'] if projection == 'left+right' \
+            else [projection]
+        for name in names:
+            projections[name] = get_projection_matrices(
+                f_plus, f_cross, sigma, projection=name
+            )
+    # Both circular polarizations must also be strictly positive
+    coh_threshold = max(coinc_threshold, 0.) if len(projections) > 1 \
+        else coinc_threshold
+
+    step = max(1, max_batch_size // (ntrigs * len(ifos) ** 2))
+    for start in range(0, nslides * npos, step):
+        combos = np.arange(start, min(start + step, nslides * npos))
+        slides = combos // npos
+        positions = combos % npos
+        delays = {
+            ifo: np.asarray(time_delay_idx[ifo])[slides, positions]
+            for ifo in ifos
+        }
+        zerolag = {
+            ifo: np.asarray(time_delay_idx[ifo])[0, positions]
+            for ifo in ifos
+        }
+        combo, index = get_sky_coinc_indexes(
+            idx_dict, delays, zerolag, min_nifos, wraparound_dict
+        )
+        if len(index) == 0:
+            continue
+
+        # Coincident SNR cut
+        det_index = {
+            ifo: (index + delays[ifo][combo]) % wraparound_dict[ifo]
+            for ifo in ifos
+        }
+        snrv = {ifo: snr_dict[ifo][det_index[ifo]] for ifo in ifos}
+        snr_array = np.array([snrv[ifo] for ifo in ifos])
+        rho_coinc = abs(np.sqrt(np.sum(snr_array * snr_array.conj(), axis=0)))
+        keep = np.flatnonzero(rho_coinc > coinc_threshold)
+
+        rho_coh = null = None
+        if len(ifos) > 1 and len(keep) != 0:
+            # Coherent SNR cut
+            snr_array = np.array([snrv[ifo][keep] for ifo in sorted(ifos)])
+            coherent = []
+            for matrices in projections.values():
+                matrices = matrices[positions[combo[keep]]]
+                snr_proj = np.einsum('kij,jk->ik', matrices, snr_array.conj())
+                coherent.append(abs(np.sqrt(sum(snr_proj * snr_array))))
+            rho_coh = coherent[0]
+            above = rho_coh > coh_threshold
+            for other in coherent[1:]:
+                above &= other > coh_threshold
+                rho_coh = np.maximum(rho_coh, other)
+            keep = keep[above]
+            # Null SNR and cut
+            null, rho_coh, _, keep, _ = null_snr(
+                rho_coh[above], rho_coinc[keep], apply_cut=apply_null_cut,
+                null_min=null_min, null_grad=null_grad, null_step=null_step,
+                index=keep
+            )
+        if len(keep) == 0:
+            continue
+
+        yield {
+            'slide': slides[combo[keep]],
+            'position': positions[combo[keep]],
+            'index': index[keep],
+            'det_index': {ifo: det_index[ifo][keep] for ifo in ifos},
+            'snr': {ifo: snrv[ifo][keep] for ifo in ifos},
+            'coinc_snr': rho_coinc[keep],
+            'coherent_snr': rho_coh,
+            'null_snr': null,
+        }
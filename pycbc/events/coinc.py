@@ -28,6 +28,7 @@ coincident triggers.
 import numpy
 import logging
 import copy
+import itertools
 import time as timemod
 import threading
 
@@ -36,8 +37,6 @@ from pycbc.detector import Detector, ppdets
 from pycbc import conversions as conv
 
 from . import stat as pycbcstat
-from .eventmgr_cython import coincbuffer_expireelements
-from .eventmgr_cython import coincbuffer_numgreater
 from .eventmgr_cython import timecoincidence_constructidxs
 from .eventmgr_cython import timecoincidence_constructfold
 from .eventmgr_cython import timecoincidence_getslideint
@@ -558,8 +557,24 @@ def cluster_over_time(stat, time, window, method='python',
     return time_sorting[indices]
 
 
+def _concatenated_ranges(starts, lengths):
+    """Return the concatenation of arange(s, s + l) for each start s and
+    length l.
+    """
+    ends = numpy.cumsum(lengths)
+    return (numpy.arange(ends[-1] if len(ends) else 0, dtype=numpy.int64)
+            + numpy.repeat(starts - ends + lengths, lengths))
+
+
 class MultiRingBuffer(object):
-    """Dynamic size n-dimensional ring buffer that can expire elements."""
+    """Dynamic size n-dimensional ring buffer that can expire elements.
+
+    The elements of all the rings are held in a single flat arena, in which
+    each ring owns a contiguous region given by an offset and a capacity. A
+    ring that outgrows its region is moved to a larger region at the end of
+    the arena, and the arena is compacted once too much of it is taken up by
+    abandoned regions and expired elements.
+    """
 
     def __init__(self, num_rings, max_time, dtype, min_buffer_size=16,
                  buffer_increment=8, resize_invalid_fraction=0.4):
@@ -583,26 +598,30 @@ class MultiRingBuffer(object):
             possible to get stuck in a mode where the buffers are always being
             resized.
         resize_invalid_fraction: float (optional:default=0.4)
-            If this fraction of any buffer contains unused data points then
-            resize it to contain only valid points. As with the previous two
-            options, be careful changing default values, it is
-            possible to get stuck in a mode where the buffers are always being
-            resized.
+            If this fraction of the arena contains expired data points or
+            space left behind by resized buffers then compact it to contain
+            only the buffers. As with the previous two options, be careful
+            changing default values, it is possible to get stuck in a mode
+            where the arena is always being compacted.
         """
         self.max_time = max_time
-        self.buffer = []
-        self.buffer_expire = []
-        self.valid_ends = []
-        self.valid_starts = []
+        self.num_rings = num_rings
         self.min_buffer_size = min_buffer_size
         self.buffer_increment = buffer_increment
         self.resize_invalid_fraction = resize_invalid_fraction
-        for _ in range(num_rings):
-            self.buffer.append(numpy.zeros(self.min_buffer_size, dtype=dtype))
-            self.buffer_expire.append(numpy.zeros(self.min_buffer_size,
-                                                  dtype=int))
-            self.valid_ends.append(0)
-            self.valid_starts.append(0)
+
+        # Region of the arena owned by each ring, and the valid elements
+        # of the ring relative to the start of its region
+        self.capacities = numpy.full(num_rings, min_buffer_size,
+                                     dtype=numpy.int64)
+        self.offsets = numpy.cumsum(self.capacities) - self.capacities
+        self.valid_starts = numpy.zeros(num_rings, dtype=numpy.int64)
+        self.valid_ends = numpy.zeros(num_rings, dtype=numpy.int64)
+
+        # The arena is used up to arena_end, the rest is room to grow
+        self.arena_end = int(self.capacities.sum())
+        self.buffer = numpy.zeros(self.arena_end, dtype=dtype)
+        self.buffer_expire = numpy.zeros(self.arena_end, dtype=int)
         self.time = 0
 
     @property
@@ -610,21 +629,16 @@ class MultiRingBuffer(object):
         return min(self.time, self.max_time)
 
     def num_elements(self):
-        count = 0
-        for idx, a in enumerate(self.buffer):
-            vals = self.valid_starts[idx]
-            vale = self.valid_ends[idx]
-            count += len(a[vals:vale])
-        return count
+        return int((self.valid_ends - self.valid_starts).sum())
 
     @property
     def nbytes(self):
-        return sum([a.nbytes for a in self.buffer])
+        return self.buffer.nbytes
 
     def discard_last(self, indices):
         """Discard the triggers added in the latest update"""
-        for i in indices:
-            self.valid_ends[i] -= 1
+        numpy.subtract.at(self.valid_ends,
+                          numpy.asarray(indices, dtype=numpy.int64), 1)
 
     def advance_time(self):
         """Advance the internal time increment by 1, expiring any triggers
@@ -635,90 +649,169 @@ class MultiRingBuffer(object):
     def add(self, indices, values):
         """Add triggers in 'values' to the buffers indicated by the indices
         """
-        for i, v in zip(indices, values):
-            # Expand ring buffer size if needed
-            if self.valid_ends[i] == len(self.buffer[i]):
-                # First clear out any old triggers before resizing
-                self.update_valid_start(i)
-                self.check_expired_triggers(i)
-
-                # Then increase arrays by buffer_increment
-                self.buffer[i] = numpy.resize(
-                    self.buffer[i],
-                    max(
-                        len(self.buffer[i]) + self.buffer_increment,
-                        self.min_buffer_size
-                    )
-                )
-                self.buffer_expire[i] = numpy.resize(
-                    self.buffer_expire[i],
-                    max(
-                        len(self.buffer[i]) + self.buffer_increment,
-                        self.min_buffer_size
-                    )
-                )
-            curr_pos = self.valid_ends[i]
-            self.buffer[i][curr_pos] = v
-            self.buffer_expire[i][curr_pos] = self.time
-            self.valid_ends[i] = self.valid_ends[i] + 1
+        indices = numpy.asarray(indices, dtype=numpy.int64)
+        if len(indices):
+            # Order the triggers by buffer, keeping the order of those going
+            # to the same buffer, and find the position of each among them
+            order = numpy.argsort(indices, kind='stable')
+            sorted_indices = indices[order]
+            rings, first, counts = numpy.unique(sorted_indices,
+                                                return_index=True,
+                                                return_counts=True)
+            rank = (numpy.arange(len(indices), dtype=numpy.int64)
+                    - numpy.repeat(first, counts))
+
+            # Make room in the buffers that are full
+            full = self.valid_ends[rings] + counts > self.capacities[rings]
+            if full.any():
+                self.grow(rings[full], counts[full])
+
+            pos = (self.offsets[sorted_indices]
+                   + self.valid_ends[sorted_indices] + rank)
+            self.buffer[pos] = values[order]
+            self.buffer_expire[pos] = self.time
+            self.valid_ends[rings] += counts
+            self.check_expired_triggers()
         self.advance_time()
 
+    def grow(self, indices, counts):
+        """Make room for the given number of new elements in each of the
+        (unique) buffer indices.
+
+        Expired elements are first cleared out of the buffers. Those that
+        still lack room are moved to a larger region at the end of the arena.
+        """
+        self.update_valid_starts(indices)
+        lengths = self.valid_ends[indices] - self.valid_starts[indices]
+        needed = lengths + counts
+        move = needed > self.capacities[indices]
+
+        # Shift the buffers that now have room to the start of their region
+        shift = indices[~move]
+        src = _concatenated_ranges(
+            self.offsets[shift] + self.valid_starts[shift], lengths[~move])
+        dst = _concatenated_ranges(self.offsets[shift], lengths[~move])
+        self.buffer[dst] = self.buffer[src]
+        self.buffer_expire[dst] = self.buffer_expire[src]
+        self.valid_ends[shift] -= self.valid_starts[shift]
+        self.valid_starts[shift] = 0
+
+        # Then increase the others by at least buffer_increment
+        move_indices = indices[move]
+        capacities = numpy.maximum(
+            self.capacities[move_indices] + self.buffer_increment,
+            numpy.maximum(needed[move], self.min_buffer_size)
+        )
+        new_end = self.arena_end + int(capacities.sum())
+        if new_end > len(self.buffer):
+            size = max(new_end, len(self.buffer) + len(self.buffer) // 2)
+            self.buffer = numpy.resize(self.buffer, size)
+            self.buffer_expire = numpy.resize(self.buffer_expire, size)
+        offsets = self.arena_end + numpy.cumsum(capacities) - capacities
+        src = _concatenated_ranges(
+            self.offsets[move_indices] + self.valid_starts[move_indices],
+            lengths[move])
+        dst = _concatenated_ranges(offsets, lengths[move])
+        self.buffer[dst] = self.buffer[src]
+        self.buffer_expire[dst] = self.buffer_expire[src]
+        self.offsets[move_indices] = offsets
+        self.capacities[move_indices] = capacities
+        self.valid_starts[move_indices] = 0
+        self.valid_ends[move_indices] = lengths[move]
+        self.arena_end = new_end
+
     def valid_slice(self, buffer_index):
-        """Return the valid slice for this buffer index"""
+        """Return the slice of the arena holding the valid elements of this
+        buffer index"""
+        offset = self.offsets[buffer_index]
         ret_slice = slice(
-            self.valid_starts[buffer_index],
-            self.valid_ends[buffer_index]
+            offset + self.valid_starts[buffer_index],
+            offset + self.valid_ends[buffer_index]
         )
         return ret_slice
 
     def expire_vector(self, buffer_index):
         """Return the expiration vector of a given ring buffer """
-        return self.buffer_expire[buffer_index][self.valid_slice(buffer_index)]
+        return self.buffer_expire[self.valid_slice(buffer_index)]
 
     def update_valid_start(self, buffer_index):
         """Update the valid_start for the given buffer index"""
+        # Elements are added in time order, so everything before the first
+        # unexpired element is expired
         expired = self.time - self.max_time
-        exp = self.buffer_expire[buffer_index]
-        j = self.valid_starts[buffer_index]
-        while j < self.valid_ends[buffer_index]:
-            # Everything before this j must be expired
-            if exp[j] >= expired:
-                break
-            j += 1
-        self.valid_starts[buffer_index] = j
-
-    def check_expired_triggers(self, buffer_index):
-        """Check if we should free memory for this buffer index.
+        exp = self.expire_vector(buffer_index)
+        self.valid_starts[buffer_index] += numpy.searchsorted(exp, expired)
 
-        Check what fraction of triggers are expired in the specified buffer
-        and if it is more than the allowed fraction (set by
-        self.resize_invalid_fraction) resize the array to remove them.
+    def update_valid_starts(self, indices=None):
+        """Update the valid_start of the given (unique) buffer indices, or
+        of all buffers if not given.
         """
-        val_start = self.valid_starts[buffer_index]
-        val_end = self.valid_ends[buffer_index]
-        buf_len = len(self.buffer[buffer_index])
-        invalid_limit = self.resize_invalid_fraction * buf_len
-        if (buf_len - val_end) + val_start > invalid_limit:
-            # If self.resize_invalid_fraction of stored triggers are expired
-            # or are not set, free up memory
-            self.buffer_expire[buffer_index] = self.buffer_expire[buffer_index][val_start:val_end].copy()
-            self.buffer[buffer_index] = self.buffer[buffer_index][val_start:val_end].copy()
-            self.valid_ends[buffer_index] -= val_start
-            self.valid_starts[buffer_index] = 0
+        if indices is None:
+            indices = numpy.arange(self.num_rings)
+        lengths = self.valid_ends[indices] - self.valid_starts[indices]
+        elements = _concatenated_ranges(
+            self.offsets[indices] + self.valid_starts[indices], lengths)
+        expired = self.buffer_expire[elements] < self.time - self.max_time
+        owner = numpy.repeat(numpy.arange(len(indices)), lengths)
+        self.valid_starts[indices] += numpy.bincount(owner[expired],
+                                                     minlength=len(indices))
+
+    def check_expired_triggers(self):
+        """Check if we should free memory in the arena.
+
+        Check what fraction of the arena is taken by expired triggers and by
+        regions left behind by resized buffers, and if it is more than the
+        allowed fraction (set by self.resize_invalid_fraction) compact the
+        arena to remove them.
+        """
+        invalid = (self.arena_end - self.capacities.sum()
+                   + self.valid_starts.sum())
+        if invalid > self.resize_invalid_fraction * self.arena_end:
+            self.compact()
+
+    def compact(self):
+        """Expire old triggers in all buffers and rebuild the arena with each
+        buffer holding only its valid points, or min_buffer_size points.
+        """
+        self.update_valid_starts()
+        lengths = self.valid_ends - self.valid_starts
+        capacities = numpy.maximum(lengths, self.min_buffer_size)
+        offsets = numpy.cumsum(capacities) - capacities
+        src = _concatenated_ranges(self.offsets + self.valid_starts, lengths)
+        dst = _concatenated_ranges(offsets, lengths)
+        self.arena_end = int(capacities.sum())
+        buffer = numpy.zeros(self.arena_end, dtype=self.buffer.dtype)
+        buffer_expire = numpy.zeros(self.arena_end, dtype=int)
+        buffer[dst] = self.buffer[src]
+        buffer_expire[dst] = self.buffer_expire[src]
+        self.buffer = buffer
+        self.buffer_expire = buffer_expire
+        self.offsets = offsets
+        self.capacities = capacities
+        self.valid_starts[:] = 0
+        self.valid_ends = lengths
 
     def data(self, buffer_index):
         """Return the data vector for a given ring buffer"""
         self.update_valid_start(buffer_index)
-        self.check_expired_triggers(buffer_index)
-
-        return self.buffer[buffer_index][self.valid_slice(buffer_index)]
+        return self.buffer[self.valid_slice(buffer_index)]
 
 
 class CoincExpireBuffer(object):
-    """Unordered dynamic sized buffer that handles
-    multiple expiration vectors.
+    """Dynamic sized buffer that handles multiple expiration vectors.
+
+    Elements are stored in chunks, one per call to `add`, in the order they
+    were added. Consecutive chunks are grouped into runs which keep the
+    sorted values of their elements, so that `num_greater` is a binary
+    search in each run. A new run is merged with the previous one while
+    that is not larger, up to `max_run_size` elements, which keeps the
+    number of runs logarithmic in the number of chunks. Expiring elements
+    only splits the runs holding expired chunks, and drops those chunks
+    without touching the rest of the data.
     """
 
+    max_run_size = 2**19
+
     def __init__(self, expiration, ifos,
                        initial_size=2**20, dtype=numpy.float32):
         """
@@ -730,40 +823,109 @@ class CoincExpireBuffer(object):
         ifos: list of strs
             List of strings to identify the multiple data expiration times.
         initial_size: int, optional
-            The initial size of the buffer.
+            Unused, kept for backward compatibility.
         dtype: numpy.dtype
             The dtype of each element of the buffer.
         """
 
         self.expiration = expiration
-        self.buffer = numpy.zeros(initial_size, dtype=dtype)
-        self.index = 0
         self.ifos = ifos
+        self.dtype = dtype
 
         self.time = {}
-        self.timer = {}
         for ifo in self.ifos:
             self.time[ifo] = 0
-            self.timer[ifo] = numpy.zeros(initial_size, dtype=numpy.int32)
+
+        # Runs of chunks, each chunk holding values, timers and the per ifo
+        # (min, max) timers, along with the sorted values of the run,
+        # excluding NaNs, which are never greater than anything, and the
+        # per ifo min timers of the run
+        self.runs = []
+        self.size = 0
 
     def __len__(self):
-        return self.index
+        return self.size
+
+    @property
+    def index(self):
+        """Returns the number of elements in the buffer."""
+        return self.size
 
     @property
     def nbytes(self):
         """Returns the approximate memory usage of self.
         """
-        nbs = [self.timer[ifo].nbytes for ifo in self.ifos]
-        nbs.append(self.buffer.nbytes)
+        nbs = []
+        for chunks, sorted_values, _ in self.runs:
+            nbs.append(sorted_values.nbytes)
+            for values, timers, _ in chunks:
+                nbs.append(values.nbytes)
+                nbs += [timers[ifo].nbytes for ifo in self.ifos]
         return sum(nbs)
 
     def increment(self, ifos):
         """Increment without adding triggers"""
         self.add([], [], ifos)
 
+    def _bounds(self, timers):
+        return {ifo: (timers[ifo].min(), timers[ifo].max())
+                for ifo in self.ifos}
+
+    def _mins(self, chunks):
+        return {ifo: min(bounds[ifo][0] for _, _, bounds in chunks)
+                for ifo in self.ifos}
+
+    def _run(self, chunks):
+        """Return a run of the given chunks"""
+        values = numpy.concatenate([values for values, _, _ in chunks])
+        return (chunks, numpy.sort(values[~numpy.isnan(values)]),
+                self._mins(chunks))
+
+    def _expire(self, chunks, limit):
+        """Return the runs of what is left of the given chunks once the
+        elements with timers before 'limit' are removed. Chunks are split in
+        halves until each run is either unexpired or a single chunk.
+        """
+        mins = self._mins(chunks)
+        if all(mins[ifo] >= limit[ifo] for ifo in limit):
+            return [self._run(chunks)]
+
+        if len(chunks) > 1:
+            half = len(chunks) // 2
+            return (self._expire(chunks[:half], limit) +
+                    self._expire(chunks[half:], limit))
+
+        values, timers, bounds = chunks[0]
+        if any(bounds[ifo][1] < limit[ifo] for ifo in limit):
+            self.size -= len(values)
+            return []
+        keep = numpy.ones(len(values), dtype=bool)
+        for ifo in limit:
+            keep &= timers[ifo] >= limit[ifo]
+        self.size -= len(values) - keep.sum()
+        if not keep.any():
+            return []
+        timers = {ifo: timers[ifo][keep] for ifo in self.ifos}
+        return [self._run([(values[keep], timers, self._bounds(timers))])]
+
     def remove(self, num):
         """Remove the the last 'num' elements from the buffer"""
-        self.index -= num
+        while num > 0 and self.runs:
+            chunks = list(self.runs.pop()[0])
+            while num > 0 and chunks:
+                values, timers, _ = chunks[-1]
+                if len(values) <= num:
+                    chunks.pop()
+                    self.size -= len(values)
+                    num -= len(values)
+                    continue
+                keep = len(values) - num
+                timers = {ifo: timers[ifo][:keep] for ifo in self.ifos}
+                chunks[-1] = (values[:keep], timers, self._bounds(timers))
+                self.size -= num
+                num = 0
+            if chunks:
+                self.runs.append(self._run(chunks))
 
     def add(self, values, times, ifos):
         """Add values to the internal buffer
@@ -781,56 +943,102 @@ class CoincExpireBuffer(object):
         for ifo in ifos:
             self.time[ifo] += 1
 
-        # Resize the internal buffer if we need more space
-        if self.index + len(values) >= len(self.buffer):
-            newlen = len(self.buffer) * 2
-            for ifo in self.ifos:
-                self.timer[ifo].resize(newlen)
-            self.buffer.resize(newlen, refcheck=False)
-
-        self.buffer[self.index:self.index+len(values)] = values
         if len(values) > 0:
+            values = numpy.array(values, dtype=self.dtype)
+            timers = {}
             for ifo in self.ifos:
-                self.timer[ifo][self.index:self.index+len(values)] = times[ifo]
-
-            self.index += len(values)
-
-        # Remove the expired old elements
-        if len(ifos) == 2:
-            # Cython version for two ifo case
-            self.index = coincbuffer_expireelements(
-                self.buffer,
-                self.timer[ifos[0]],
-                self.timer[ifos[1]],
-                self.time[ifos[0]],
-                self.time[ifos[1]],
-                self.expiration,
-                self.index
-            )
-        else:
-            # Numpy version for >2 ifo case
-            keep = None
-            for ifo in ifos:
-                kt = self.timer[ifo][:self.index] >= self.time[ifo] - self.expiration
-                keep = numpy.logical_and(keep, kt) if keep is not None else kt
-
-            self.buffer[:keep.sum()] = self.buffer[:self.index][keep]
-            for ifo in self.ifos:
-                self.timer[ifo][:keep.sum()] = self.timer[ifo][:self.index][keep]
-            self.index = keep.sum()
+                timers[ifo] = numpy.empty(len(values), dtype=numpy.int32)
+                timers[ifo][:] = times[ifo]
+            self.runs.append(self._run([(values, timers,
+                                         self._bounds(timers))]))
+            self.size += len(values)
+
+            # Merge the sorted values of the last two runs, which is linear
+            # as the stable sort finds the two sorted sequences
+            while len(self.runs) > 1:
+                (chunks1, sorted1, mins1), (chunks2, sorted2, mins2) = \
+                    self.runs[-2:]
+                if (len(sorted1) > len(sorted2) or
+                        len(sorted1) + len(sorted2) > self.max_run_size):
+                    break
+                merged = numpy.sort(numpy.concatenate([sorted1, sorted2]),
+                                    kind='stable')
+                mins = {ifo: min(mins1[ifo], mins2[ifo]) for ifo in self.ifos}
+                self.runs[-2:] = [(chunks1 + chunks2, merged, mins)]
+
+        # Remove the expired old elements, only splitting the runs which
+        # hold expired chunks
+        limit = {ifo: self.time[ifo] - self.expiration for ifo in ifos}
+        runs = []
+        for run in self.runs:
+            if all(run[2][ifo] >= limit[ifo] for ifo in ifos):
+                runs.append(run)
+            else:
+                runs += self._expire(run[0], limit)
+        self.runs = runs
 
     def num_greater(self, value):
         """Return the number of elements larger than 'value'"""
-        return coincbuffer_numgreater(self.buffer, self.index, value)
+        value = numpy.array(value, dtype=self.dtype)
+        return sum(len(sorted_values) -
+                   numpy.searchsorted(sorted_values, value, side='right')
+                   for _, sorted_values, _ in self.runs)
 
     @property
     def data(self):
         """Return the array of elements"""
-        return self.buffer[:self.index]
+        if not self.runs:
+            return numpy.zeros(0, dtype=self.dtype)
+        return numpy.concatenate([values for chunks, _, _ in self.runs
+                                  for values, _, _ in chunks])
+
+
+def _blocks(lengths, max_size):
+    """Yield slices over the given lengths such that the lengths in each
+    slice add up to at most max_size, or are a single length.
+    """
+    ends = numpy.cumsum(lengths)
+    start = 0
+    while start < len(lengths):
+        base = ends[start - 1] if start else 0
+        stop = max(int(numpy.searchsorted(ends, base + max_size, side='right')),
+                   start + 1)
+        yield slice(start, stop)
+        start = stop
+
+
+def _slide_coincident(t_shift, t_fixed, window, slide_step):
+    """Return whether each pair of shifted and fixed times is coincident
+    within the window in some time slide, and the id of that slide.
+
+    This applies the same tests, in the same floating point operations, as
+    `time_coincidence` does on the times folded over the slide step.
+    """
+    fold_shift = t_shift % slide_step
+    fold_fixed = t_fixed % slide_step
+    low = fold_shift - window
+    high = fold_shift + window
+    coinc = numpy.zeros(len(t_shift), dtype=bool)
+    for fold in (fold_fixed - slide_step, fold_fixed,
+                 fold_fixed + slide_step):
+        coinc |= (fold >= low) & (fold < high)
+    # Round half away from zero, as in timecoincidence_getslideint
+    diff = (t_shift - t_fixed) / slide_step
+    slide = numpy.copysign(numpy.floor(numpy.abs(diff) + 0.5), diff)
+    return coinc, slide.astype(numpy.int32)
 
 
 class LiveCoincTimeslideBackgroundEstimator(object):
-    """Rolling buffer background estimation."""
+    """Rolling buffer background estimation.
+
+    The single detector triggers of all the ifos are held in one store, and
+    the coincidences of every combination of (two or more) ifos are found
+    from it. Each combination has its own statistic and background of time
+    shifted coincidences.
+    """
+
+    # Bound on the number of trigger pairs tested for coincidence at once
+    max_join_size = 2 ** 21
 
     def __init__(self, num_templates, analysis_block, background_statistic,
                  sngl_ranking, stat_files, ifos,
@@ -839,6 +1047,7 @@ class LiveCoincTimeslideBackgroundEstimator(object):
                  coinc_window_pad=.002,
                  statistic_refresh_rate=None,
                  return_background=False,
+                 max_coinc_ifos=2,
                  **kwargs):
         """
         Parameters
@@ -855,8 +1064,8 @@ class LiveCoincTimeslideBackgroundEstimator(object):
             List of filenames that contain information used to construct
             various coincident statistics.
         ifos: list of strs
-            List of ifo names that are being analyzed. At the moment this must
-            be two items such as ['H1', 'L1'].
+            List of ifo names that are being analyzed, at least two such as
+            ['H1', 'L1'].
         ifar_limit: float
             The largest inverse false alarm rate in years that we would like to
             calculate.
@@ -871,6 +1080,11 @@ class LiveCoincTimeslideBackgroundEstimator(object):
         return_background: boolean
             If true, background triggers will also be included in the file
             output.
+        max_coinc_ifos: int
+            The largest number of ifos in the combinations that coincidences
+            are formed in. Default is 2, i.e. only pairs of ifos. The
+            statistic needs to be able to rank coincidences of every
+            combination, e.g. have signal histogram files for them.
         kwargs: dict
             Additional options for the statistic to use. See stat.py
             for more details on statistic options.
@@ -878,13 +1092,38 @@ class LiveCoincTimeslideBackgroundEstimator(object):
         self.num_templates = num_templates
         self.analysis_block = analysis_block
 
+        self.ifos = ifos
+        if len(self.ifos) < 2:
+            raise ValueError("At least two ifos are needed for a coincident "
+                             "analysis")
+        if max_coinc_ifos < 2:
+            raise ValueError("Coincidences need at least two ifos")
+        self.combos = [
+            combo
+            for num in range(2, min(max_coinc_ifos, len(ifos)) + 1)
+            for combo in itertools.combinations(ifos, num)
+        ]
+
+        # Each combination of ifos is ranked by its own statistic instance,
+        # as for example the signal histograms depend on the ifos
         stat_class = pycbcstat.get_statistic(background_statistic)
-        self.stat_calculator = stat_class(
-            sngl_ranking,
-            stat_files,
-            ifos=ifos,
-            **kwargs
-        )
+        self.stat_calculators = {
+            combo: stat_class(
+                sngl_ranking,
+                stat_files,
+                ifos=list(combo),
+                **kwargs
+            )
+            for combo in self.combos
+        }
+        # The single detector statistic does not depend on the other ifos,
+        # so it is calculated once for each ifo
+        self.sngl_stat_calculators = {
+            ifo: self.stat_calculators[
+                next(c for c in self.combos if ifo in c)
+            ]
+            for ifo in ifos
+        }
 
         self.time_stat_refreshed = timemod.time()
         self.stat_calculator_lock = threading.Lock()
@@ -894,39 +1133,47 @@ class LiveCoincTimeslideBackgroundEstimator(object):
         self.return_background = return_background
         self.coinc_window_pad = coinc_window_pad
 
-        self.ifos = ifos
-        if len(self.ifos) != 2:
-            raise ValueError("Only a two ifo analysis is supported at this time")
-
         self.lookback_time = (ifar_limit / conv.sec_to_year(1.) * timeslide_interval) ** 0.5
         self.buffer_size = int(numpy.ceil(self.lookback_time / analysis_block))
 
         self.dets = {ifo: Detector(ifo) for ifo in ifos}
 
-        self.time_window = self.dets[ifos[0]].light_travel_time_to_detector(
-            self.dets[ifos[1]]) + coinc_window_pad
-        self.coincs = CoincExpireBuffer(self.buffer_size, self.ifos)
+        self.time_windows = {
+            (ifo1, ifo2): self.dets[ifo1].light_travel_time_to_detector(
+                self.dets[ifo2]) + coinc_window_pad
+            for ifo1 in ifos for ifo2 in ifos if ifo1 != ifo2
+        }
+        self.time_window = max(self.time_windows.values())
+        self.background = {
+            combo: CoincExpireBuffer(self.buffer_size, list(combo))
+            for combo in self.combos
+        }
 
         self.singles = {}
 
-        # temporary array used in `_find_coincs()` to turn `trig_stat`
-        # into an array much faster than using `numpy.resize()`
-        self.trig_stat_memory = None
+    @property
+    def coincs(self):
+        """The buffer of background coincidences of a two ifo analysis"""
+        if len(self.combos) != 1:
+            raise AttributeError("The background of a multi-ifo analysis is "
+                                 "held for each combination of ifos in "
+                                 "'background'")
+        return self.background[self.combos[0]]
 
     @classmethod
     def pick_best_coinc(cls, coinc_results):
-        """Choose the best two-ifo coinc by ifar first, then statistic if needed.
+        """Choose the best coinc by ifar first, then statistic if needed.
 
-        This function picks which of the available double-ifo coincs to use.
-        It chooses the best (highest) ifar. The ranking statistic is used as
-        a tie-breaker.
+        This function picks which of the available coincs, of the different
+        combinations of ifos, to use. It chooses the best (highest) ifar. The
+        ranking statistic is used as a tie-breaker.
         A trials factor is applied if multiple types of coincs are possible
         at this time given the active ifos.
 
         Parameters
         ----------
         coinc_results: list of coinc result dicts
-            Dictionary by detector pair of coinc result dicts.
+            Dictionary by detector combination of coinc result dicts.
 
         Returns
         -------
@@ -994,6 +1241,7 @@ class LiveCoincTimeslideBackgroundEstimator(object):
                    ifos=ifos,
                    coinc_window_pad=args.coinc_window_pad,
                    statistic_refresh_rate=args.statistic_refresh_rate,
+                   max_coinc_ifos=getattr(args, 'max_coinc_ifos', 2),
                    **kwargs)
 
     @staticmethod
@@ -1011,6 +1259,11 @@ class LiveCoincTimeslideBackgroundEstimator(object):
             help="The interval between timeslides in seconds", default=0.1)
         group.add_argument('--ifar-remove-threshold', type=float,
             help="NOT YET IMPLEMENTED", default=100.0)
+        group.add_argument('--max-coinc-ifos', type=int, default=2,
+            help="Form coincidences in combinations of up to this many "
+                 "ifos, e.g. 3 to also find triple coincidences. The "
+                 "statistic files must cover every combination. "
+                 "Default 2")
 
     @staticmethod
     def verify_args(args, parser):
@@ -1020,13 +1273,28 @@ class LiveCoincTimeslideBackgroundEstimator(object):
             parser.error(f"The single ifo ranking stat {args.sngl_ranking} "
                          "requires --psd-variation.")
 
+    def combo_background_time(self, combo):
+        """Return the amount of background time that the buffers contain for
+        a combination of ifos.
+
+        All but one of the ifos of a coincidence are shifted together, so
+        there is one time slide dimension, and the background time is that
+        of the two ifos whose buffers hold the least time.
+        """
+        filled = sorted(self.singles[ifo].filled_time for ifo in combo
+                        if ifo in self.singles)
+        time = 1.0 / self.timeslide_interval
+        for filled_time in filled[:2]:
+            time *= filled_time * self.analysis_block
+        return time
+
     @property
     def background_time(self):
         """Return the amount of background time that the buffers contain"""
-        time = 1.0 / self.timeslide_interval
-        for ifo in self.singles:
-            time *= self.singles[ifo].filled_time * self.analysis_block
-        return time
+        if len(self.combos) != 1:
+            raise AttributeError("Use combo_background_time for the "
+                                 "background time of a multi-ifo analysis")
+        return self.combo_background_time(self.combos[0])
 
     def save_state(self, filename):
         """Save the current state of the background buffers"""
@@ -1039,7 +1307,7 @@ class LiveCoincTimeslideBackgroundEstimator(object):
         import pickle
         return pickle.load(filename)
 
-    def ifar(self, coinc_stat):
+    def ifar(self, coinc_stat, combo=None):
         """Map a given value of the coincident ranking statistic to an inverse
         false-alarm rate (IFAR) using the interally stored background sample.
 
@@ -1047,6 +1315,9 @@ class LiveCoincTimeslideBackgroundEstimator(object):
         ----------
         coinc_stat: float
             Value of the coincident ranking statistic to be converted.
+        combo: tuple of strs, optional
+            The combination of ifos of the coincidence. Only needed if more
+            than one combination is analyzed.
 
         Returns
         -------
@@ -1056,8 +1327,12 @@ class LiveCoincTimeslideBackgroundEstimator(object):
             True if `coinc_stat` is larger than all the available background,
             in which case `ifar` is to be considered an upper limit.
         """
-        n = self.coincs.num_greater(coinc_stat)
-        ifar = conv.sec_to_year(self.background_time) / (n + 1)
+        if combo is None:
+            if len(self.combos) != 1:
+                raise ValueError("The combination of ifos must be given")
+            combo = self.combos[0]
+        n = self.background[combo].num_greater(coinc_stat)
+        ifar = conv.sec_to_year(self.combo_background_time(combo)) / (n + 1)
         return ifar, n == 0
 
     def set_singles_buffer(self, results):
@@ -1087,7 +1362,9 @@ class LiveCoincTimeslideBackgroundEstimator(object):
             self.singles_dtype.append((key, data[key].dtype))
 
         if 'stat' not in data:
-            self.singles_dtype.append(('stat', self.stat_calculator.single_dtype))
+            self.singles_dtype.append(
+                ('stat', self.sngl_stat_calculators[ifo].single_dtype)
+            )
 
         # Create a ring buffer for each template ifo combination
         for ifo in self.ifos:
@@ -1124,17 +1401,18 @@ class LiveCoincTimeslideBackgroundEstimator(object):
         updated_indices = {}
         for ifo in ifos:
             trigs = results[ifo]
+            stat_calculator = self.sngl_stat_calculators[ifo]
 
             if len(trigs['snr'] > 0):
                 trigsc = copy.copy(trigs)
                 trigsc['ifo'] = ifo
                 trigsc['chisq'] = trigs['chisq'] * trigs['chisq_dof']
                 trigsc['chisq_dof'] = (trigs['chisq_dof'] + 2) / 2
-                single_stat = self.stat_calculator.single(trigsc)
+                single_stat = stat_calculator.single(trigsc)
                 del trigsc['ifo']
             else:
                 single_stat = numpy.array([], ndmin=1,
-                              dtype=self.stat_calculator.single_dtype)
+                              dtype=stat_calculator.single_dtype)
             trigs['stat'] = single_stat
 
             # add each single detector trigger to the and advance the buffer
@@ -1146,150 +1424,241 @@ class LiveCoincTimeslideBackgroundEstimator(object):
             updated_indices[ifo] = trigs['template_id']
         return updated_indices
 
-    def _find_coincs(self, results, valid_ifos):
-        """Look for coincs within the set of single triggers
+    def _new_trigger_positions(self, ifo, template_ids):
+        """Return the positions in the singles buffer of the triggers of an
+        ifo that were just added, in the order they were added.
+        """
+        buf = self.singles[ifo]
+        template_ids = numpy.asarray(template_ids, dtype=numpy.int64)
+        order = numpy.argsort(template_ids, kind='stable')
+        sorted_ids = template_ids[order]
+        _, first, counts = numpy.unique(sorted_ids, return_index=True,
+                                        return_counts=True)
+        num = numpy.repeat(counts, counts)
+        rank = numpy.arange(len(sorted_ids)) - numpy.repeat(first, counts)
+        positions = numpy.empty(len(template_ids), dtype=numpy.int64)
+        positions[order] = (buf.offsets[sorted_ids]
+                            + buf.valid_ends[sorted_ids] - num + rank)
+        return positions
+
+    def _join_view(self, fixed_ifo, shift_ifos, template_ids):
+        """Find the coincidences of the triggers just added in one ifo with
+        all the stored triggers of other ifos in the same templates.
+
+        The ifo with new triggers is kept fixed and the other ifos are
+        time shifted together by a whole number of time slides: each of them
+        has to be coincident with the fixed ifo in the same slide, and with
+        each other without any shift.
+
+        Parameters
+        ----------
+        fixed_ifo: str
+            The ifo of the new triggers
+        shift_ifos: list of strs
+            The ifos to time shift
+        template_ids: numpy.ndarray
+            The templates of the new triggers in the fixed ifo
+
+        Returns
+        -------
+        positions: dict of numpy.ndarrays
+            The positions of the triggers forming each coincidence in the
+            singles buffer of each ifo
+        templates: numpy.ndarray
+            The template of each coincidence
+        slide: numpy.ndarray
+            The time slide of each coincidence
+        """
+        tmpl = numpy.asarray(template_ids, dtype=numpy.int64)
+        positions = {
+            fixed_ifo: self._new_trigger_positions(fixed_ifo, tmpl)
+        }
+        times = {
+            fixed_ifo:
+                self.singles[fixed_ifo].buffer['end_time'][positions[fixed_ifo]]
+        }
+        slide = numpy.zeros(len(tmpl), dtype=numpy.int32)
+
+        for num, ifo in enumerate(shift_ifos):
+            buf = self.singles[ifo]
+            buf.update_valid_starts(numpy.unique(tmpl))
+            starts = buf.offsets[tmpl] + buf.valid_starts[tmpl]
+            lengths = buf.valid_ends[tmpl] - buf.valid_starts[tmpl]
+
+            owners = [numpy.array([], dtype=numpy.int64)]
+            elements = [numpy.array([], dtype=numpy.int64)]
+            slides = [numpy.array([], dtype=numpy.int32)]
+            # Test all pairs of the current candidates with the stored
+            # triggers of their template, in blocks of bounded size
+            for blk in _blocks(lengths, self.max_join_size):
+                owner = numpy.repeat(
+                    numpy.arange(blk.start, blk.stop, dtype=numpy.int64),
+                    lengths[blk]
+                )
+                element = _concatenated_ranges(starts[blk], lengths[blk])
+                etime = buf.buffer['end_time'][element]
+                coinc, eslide = _slide_coincident(
+                    etime,
+                    times[fixed_ifo][owner],
+                    self.time_windows[fixed_ifo, ifo],
+                    self.timeslide_interval
+                )
+                if num > 0:
+                    # Same slide as the ifos already shifted, and
+                    # coincident with them
+                    coinc &= eslide == slide[owner]
+                    for prev_ifo in shift_ifos[:num]:
+                        ptime = times[prev_ifo][owner]
+                        window = self.time_windows[prev_ifo, ifo]
+                        coinc &= ((etime >= ptime - window)
+                                  & (etime < ptime + window))
+                owners.append(owner[coinc])
+                elements.append(element[coinc])
+                slides.append(eslide[coinc])
+
+            owner = numpy.concatenate(owners)
+            positions = {i: p[owner] for i, p in positions.items()}
+            times = {i: t[owner] for i, t in times.items()}
+            positions[ifo] = numpy.concatenate(elements)
+            times[ifo] = buf.buffer['end_time'][positions[ifo]]
+            slide = numpy.concatenate(slides)
+            tmpl = tmpl[owner]
+
+        return positions, tmpl, slide
+
+    def _combo_coincs(self, combo, results, valid_ifos):
+        """Find and rank the (zerolag and time shifted) coincidences of a
+        combination of ifos involving the triggers just added
+
+        For each ifo of the combination with new triggers, these are
+        checked for coincidences with all the stored triggers of the other
+        ifos, time shifting the other ifos. The statistic is calculated
+        once for each distinct set of triggers: a set of new triggers in
+        several ifos is found once for each of them, with the same
+        statistic value as only the relative time shift matters.
 
         Parameters
         ----------
+        combo: tuple of strs
+            The combination of ifos
         results: dict
             Dictionary of dictionaries indexed by ifo and keys such as 'snr',
-            'chisq', etc. The specific format is determined by the
-            LiveBatchMatchedFilter class.
+            'chisq', etc.
         valid_ifos: list of strs
-            List of ifos for which new triggers might exist. This must be a
-            subset of self.ifos. If an ifo is in self.ifos but not in this list
-            either the ifo is down, or its data has been flagged as "bad".
+            List of ifos for which new triggers might exist.
 
         Returns
         -------
-        num_background: int
-            Number of time shifted coincidences found.
-        coinc_results: dict of arrays
-            A dictionary of arrays containing the coincident results.
+        coincs: dict
+            Dictionary of arrays of the ranking statistic ('stat'), time
+            slide ('slide'), template ('template') and the ifo kept fixed
+            as an index into the combination ('fixed') of each coincidence,
+            and of dicts by ifo of the positions of its triggers in the
+            singles buffers ('positions').
         """
-        # For each new single detector trigger find the allowed coincidences
-        # Record the template and the index of the single trigger that forms
-        # each coincidence
-
-        # Initialize
-        cstat = [[]]
-        offsets = []
-        ctimes = {self.ifos[0]:[], self.ifos[1]:[]}
-        single_expire = {self.ifos[0]:[], self.ifos[1]:[]}
-        template_ids = [[]]
-        trigger_ids = {self.ifos[0]:[[]], self.ifos[1]:[[]]}
-
-        # Calculate all the permutations of coincident triggers for each
-        # new single detector trigger collected
-        # Currently only two detectors are supported.
-        # For each ifo, check its newly added triggers for (zerolag and time
-        # shift) coincs with all currently stored triggers in the other ifo.
-        # Do this by keeping the ifo with new triggers fixed and time shifting
-        # the other ifo. The list 'shift_vec' must be in the same order as
-        # self.ifos and contain -1 for the shift_ifo / 0 for the fixed_ifo.
-        for fixed_ifo, shift_ifo, shift_vec in zip(
-            [self.ifos[0], self.ifos[1]],
-            [self.ifos[1], self.ifos[0]],
-            [[0, -1], [-1, 0]]
-        ):
-            if fixed_ifo not in valid_ifos:
-                # This ifo is not online now, so no new triggers or coincs
+        views = []
+        for fixed_num, fixed_ifo in enumerate(combo):
+            if fixed_ifo not in valid_ifos or fixed_ifo not in self.singles:
+                # This ifo is not online now, or no triggers have been seen
+                # yet, so no new triggers or coincs
                 continue
-            # Find newly added triggers in fixed_ifo
-            trigs = results[fixed_ifo]
-            # Calculate mchirp as a vectorized operation
-            mchirps = conv.mchirp_from_mass1_mass2(
-                trigs['mass1'], trigs['mass2']
+            shift_ifos = [ifo for ifo in combo if ifo != fixed_ifo]
+            positions, tmpl, slide = self._join_view(
+                fixed_ifo, shift_ifos, results[fixed_ifo]['template_id']
             )
-            # Loop over them one trigger at a time
-            for i in range(len(trigs['end_time'])):
-                trig_stat = trigs['stat'][i]
-                trig_time = trigs['end_time'][i]
-                template = trigs['template_id'][i]
-                mchirp = mchirps[i]
-
-                # Get current shift_ifo triggers in the same template
-                times = self.singles[shift_ifo].data(template)['end_time']
-                stats = self.singles[shift_ifo].data(template)['stat']
-
-                # Perform coincidence. i1 is the list of trigger indices in the
-                # shift_ifo which make coincs, slide is the corresponding slide
-                # index.
-                # (The second output would just be a list of zeroes as we only
-                # have one trigger in the fixed_ifo.)
-                i1, _, slide = time_coincidence(times,
-                                 numpy.array(trig_time, ndmin=1,
-                                 dtype=numpy.float64),
-                                 self.time_window,
-                                 self.timeslide_interval)
-
-                # Make a copy of the fixed ifo trig_stat for each coinc.
-                # NB for some statistics the "stat" entry holds more than just
-                # a ranking number. E.g. for the phase time consistency test,
-                # it must also contain the phase, time and sensitivity.
-                if self.trig_stat_memory is None:
-                    self.trig_stat_memory = numpy.zeros(
-                        1,
-                        dtype=trig_stat.dtype
-                    )
-                while len(self.trig_stat_memory) < len(i1):
-                    self.trig_stat_memory = numpy.resize(
-                        self.trig_stat_memory,
-                        len(self.trig_stat_memory)*2
-                    )
-                self.trig_stat_memory[:len(i1)] = trig_stat
-
-                # Force data into form needed by stat.py and then compute the
-                # ranking statistic values.
-                sngls_list = [[fixed_ifo, self.trig_stat_memory[:len(i1)]],
-                              [shift_ifo, stats[i1]]]
-
-                c = self.stat_calculator.rank_stat_coinc(
-                    sngls_list,
-                    slide,
-                    self.timeslide_interval,
-                    shift_vec,
-                    time_addition=self.coinc_window_pad,
-                    mchirp=mchirp,
-                    dets=self.dets
-                )
-
-                # Store data about new triggers: slide index, stat value and
-                # times.
-                offsets.append(slide)
-                cstat.append(c)
-                ctimes[shift_ifo].append(times[i1])
-                ctimes[fixed_ifo].append(numpy.zeros(len(c),
-                                         dtype=numpy.float64))
-                ctimes[fixed_ifo][-1].fill(trig_time)
-
-                # As background triggers are removed after a certain time, we
-                # need to log when this will be for new background triggers.
-                single_expire[shift_ifo].append(
-                    self.singles[shift_ifo].expire_vector(template)[i1]
-                )
-                single_expire[fixed_ifo].append(numpy.zeros(len(c),
-                                                dtype=numpy.int32))
-                single_expire[fixed_ifo][-1].fill(
-                    self.singles[fixed_ifo].time - 1
-                )
+            fixed = numpy.full(len(slide), fixed_num, dtype=numpy.int32)
+            views.append((positions, tmpl, slide, fixed))
+
+        coincs = {
+            'positions': {
+                ifo: numpy.concatenate(
+                    [numpy.array([], dtype=numpy.int64)]
+                    + [v[0][ifo] for v in views])
+                for ifo in combo
+            },
+            'template': numpy.concatenate(
+                [numpy.array([], dtype=numpy.int64)] + [v[1] for v in views]),
+            'slide': numpy.concatenate(
+                [numpy.array([], dtype=numpy.int32)] + [v[2] for v in views]),
+            'fixed': numpy.concatenate(
+                [numpy.array([], dtype=numpy.int32)] + [v[3] for v in views]),
+        }
+        positions = coincs['positions']
+        if len(coincs['slide']) == 0:
+            coincs['stat'] = numpy.array([], dtype=numpy.float32)
+            return coincs
+
+        # Rank each distinct set of triggers once, in the first way it was
+        # found
+        rows = numpy.stack([positions[ifo] for ifo in combo], axis=1)
+        _, first, inverse = numpy.unique(rows, axis=0, return_index=True,
+                                         return_inverse=True)
+        inverse = inverse.reshape(-1)
+        ranked = []
+        for fixed_num, fixed_ifo in enumerate(combo):
+            unique_idx = numpy.flatnonzero(
+                coincs['fixed'][first] == fixed_num)
+            if len(unique_idx) == 0:
+                continue
+            idx = first[unique_idx]
+            # Force data into form needed by stat.py and then compute the
+            # ranking statistic values. NB for some statistics the "stat"
+            # entry holds more than just a ranking number. E.g. for the
+            # phase time consistency test, it must also contain the phase,
+            # time and sensitivity. The list 'shift_vec' must be in the same
+            # order as the combination and contain -1 for the shifted ifos
+            # and 0 for the fixed ifo.
+            shift_vec = [0 if ifo == fixed_ifo else -1 for ifo in combo]
+            order = [fixed_ifo] + [ifo for ifo in combo if ifo != fixed_ifo]
+            sngls = {
+                ifo: self.singles[ifo].buffer[positions[ifo][idx]]
+                for ifo in combo
+            }
+            sngls_list = [[ifo, sngls[ifo]['stat']] for ifo in order]
+            mchirp = conv.mchirp_from_mass1_mass2(
+                sngls[fixed_ifo]['mass1'], sngls[fixed_ifo]['mass2']
+            )
+            c = self.stat_calculators[combo].rank_stat_coinc(
+                sngls_list,
+                coincs['slide'][idx],
+                self.timeslide_interval,
+                shift_vec,
+                time_addition=self.coinc_window_pad,
+                mchirp=mchirp,
+                dets=self.dets
+            )
+            ranked.append((unique_idx, numpy.asarray(c)))
 
-                # Save the template and trigger ids to keep association
-                # to singles. The trigger was just added so it must be in
-                # the last position: we mark this with -1 so the
-                # slicing picks the right point
-                template_ids.append(numpy.zeros(len(c)) + template)
-                trigger_ids[shift_ifo].append(i1)
-                trigger_ids[fixed_ifo].append(numpy.zeros(len(c)) - 1)
+        unique_stat = numpy.zeros(
+            len(first), dtype=numpy.result_type(*[r[1] for r in ranked])
+        )
+        for unique_idx, c in ranked:
+            unique_stat[unique_idx] = c
+        coincs['stat'] = unique_stat[inverse]
+        return coincs
 
-        cstat = numpy.concatenate(cstat)
-        template_ids = numpy.concatenate(template_ids).astype(numpy.int32)
-        for ifo in valid_ifos:
-            trigger_ids[ifo] = numpy.concatenate(trigger_ids[ifo]).astype(numpy.int32)
+    def _find_combo_coincs(self, combo, results, valid_ifos):
+        """Look for the coincs of one combination of ifos, cluster them and
+        add the time shifted ones to its background.
 
+        Returns
+        -------
+        num_background: int
+            Number of time shifted coincidences found.
+        coinc_results: dict of arrays
+            A dictionary of arrays containing the coincident results.
+        """
+        combo_valid = [ifo for ifo in combo if ifo in valid_ifos]
+        if len(combo_valid) == 0:
+            return 0, {}
+        background = self.background[combo]
+
+        coincs = self._combo_coincs(combo, results, valid_ifos)
+        cstat = coincs['stat']
+        positions = coincs['positions']
         logger.info(
             "%s: %s background and zerolag coincs",
-            ppdets(self.ifos, "-"), len(cstat)
+            ppdets(combo, "-"), len(cstat)
         )
 
         # Cluster the triggers we've found
@@ -1297,27 +1666,40 @@ class LiveCoincTimeslideBackgroundEstimator(object):
         num_zerolag = 0
         num_background = 0
         if len(cstat) > 0:
-            offsets = numpy.concatenate(offsets)
-            ctime0 = numpy.concatenate(ctimes[self.ifos[0]]).astype(numpy.float64)
-            ctime1 = numpy.concatenate(ctimes[self.ifos[1]]).astype(numpy.float64)
-            logger.info("Clustering %s coincs", ppdets(self.ifos, "-"))
-            cidx = cluster_coincs(cstat, ctime0, ctime1, offsets,
-                                  self.timeslide_interval,
-                                  self.analysis_block + 2*self.time_window,
-                                  method='cython')
+            offsets = coincs['slide']
+            ctimes = [self.singles[ifo].buffer['end_time'][positions[ifo]]
+                      for ifo in combo]
+            window = max(self.time_windows[pair]
+                         for pair in itertools.combinations(combo, 2))
+            logger.info("Clustering %s coincs", ppdets(combo, "-"))
+            # The time of each coinc is the mean time of its triggers, with
+            # the fixed ifo shifted to the other ifos
+            time = ctimes[0]
+            for ctime in ctimes[1:]:
+                time = time + ctime
+            time = (time + offsets * self.timeslide_interval) / len(combo)
+            time = time.astype(numpy.longdouble)
+            cwindow = self.analysis_block + 2 * window
+            span = (time.max() - time.min()) + cwindow * 10
+            time = time + span * offsets.astype(numpy.longdouble)
+            cidx = cluster_over_time(cstat, time, cwindow, method='cython')
+            logger.info('%d triggers remaining', len(cidx))
             offsets = offsets[cidx]
             zerolag_idx = (offsets == 0)
             bkg_idx = (offsets != 0)
 
-            for ifo in self.ifos:
-                single_expire[ifo] = numpy.concatenate(single_expire[ifo])
-                single_expire[ifo] = single_expire[ifo][cidx][bkg_idx]
-
-            self.coincs.add(cstat[cidx][bkg_idx], single_expire, valid_ifos)
+            # As background triggers are removed after a certain time, we
+            # need to log when this will be for new background triggers.
+            single_expire = {
+                ifo: self.singles[ifo].buffer_expire[
+                    positions[ifo][cidx][bkg_idx]]
+                for ifo in combo
+            }
+            background.add(cstat[cidx][bkg_idx], single_expire, combo_valid)
             num_zerolag = zerolag_idx.sum()
             num_background = bkg_idx.sum()
-        elif len(valid_ifos) > 0:
-            self.coincs.increment(valid_ifos)
+        else:
+            background.increment(combo_valid)
 
         # Collect coinc results for saving
         coinc_results = {}
@@ -1325,30 +1707,60 @@ class LiveCoincTimeslideBackgroundEstimator(object):
         if num_zerolag > 0:
             idx = cidx[zerolag_idx][0]
             zerolag_cstat = cstat[cidx][zerolag_idx]
-            ifar, ifar_sat = self.ifar(zerolag_cstat[0])
+            ifar, ifar_sat = self.ifar(zerolag_cstat[0], combo)
             zerolag_results = {
                 'foreground/ifar': ifar,
                 'foreground/ifar_saturated': ifar_sat,
                 'foreground/stat': zerolag_cstat,
-                'foreground/type': '-'.join(self.ifos)
+                'foreground/type': '-'.join(combo)
             }
-            template = template_ids[idx]
-            for ifo in self.ifos:
-                trig_id = trigger_ids[ifo][idx]
-                single_data = self.singles[ifo].data(template)[trig_id]
+            for ifo in combo:
+                single_data = self.singles[ifo].buffer[positions[ifo][idx]]
                 for key in single_data.dtype.names:
                     path = f'foreground/{ifo}/{key}'
                     zerolag_results[path] = single_data[key]
             coinc_results.update(zerolag_results)
 
         # Save some summary statistics about the background
-        coinc_results['background/time'] = numpy.array([self.background_time])
-        coinc_results['background/count'] = len(self.coincs.data)
+        coinc_results['background/time'] = numpy.array(
+            [self.combo_background_time(combo)])
+        coinc_results['background/count'] = len(background)
 
         # Save all the background triggers
         if self.return_background:
-            coinc_results['background/stat'] = self.coincs.data
+            coinc_results['background/stat'] = background.data
+
+        return num_background, coinc_results
+
+    def _find_coincs(self, results, valid_ifos):
+        """Look for coincs within the set of single triggers
+
+        Parameters
+        ----------
+        results: dict
+            Dictionary of dictionaries indexed by ifo and keys such as 'snr',
+            'chisq', etc. The specific format is determined by the
+            LiveBatchMatchedFilter class.
+        valid_ifos: list of strs
+            List of ifos for which new triggers might exist. This must be a
+            subset of self.ifos. If an ifo is in self.ifos but not in this list
+            either the ifo is down, or its data has been flagged as "bad".
 
+        Returns
+        -------
+        num_background: dict of ints
+            Number of time shifted coincidences found, keyed by combination
+            of ifos.
+        coinc_results: list of dicts of arrays
+            A dictionary of arrays containing the coincident results for each
+            combination of ifos, in the order of self.combos.
+        """
+        num_background = {}
+        coinc_results = []
+        for combo in self.combos:
+            num_background[combo], combo_results = \
+                self._find_combo_coincs(combo, results, valid_ifos)
+            coinc_results.append(combo_results)
         return num_background, coinc_results
 
     def backout_last(self, updated_singles, num_coincs):
@@ -1359,13 +1771,14 @@ class LiveCoincTimeslideBackgroundEstimator(object):
         updated_singles: dict of numpy.ndarrays
             Array of indices that have been just updated in the internal
             buffers of single detector triggers.
-        num_coincs: int
+        num_coincs: dict of ints
             The number of coincs that were just added to the internal buffer
-            of coincident triggers
+            of coincident triggers of each combination of ifos
         """
         for ifo in updated_singles:
             self.singles[ifo].discard_last(updated_singles[ifo])
-        self.coincs.remove(num_coincs)
+        for combo, num in num_coincs.items():
+            self.background[combo].remove(num)
 
     def add_singles(self, results):
         """Add singles to the background estimate and find candidates
@@ -1380,13 +1793,16 @@ class LiveCoincTimeslideBackgroundEstimator(object):
         Returns
         -------
         coinc_results: dict of arrays
-            A dictionary of arrays containing the coincident results.
+            A dictionary of arrays containing the coincident results of the
+            best coincidence over the combinations of ifos.
         """
         # Let's see how large everything is
-        logger.info(
-            "%s: %s coincs, %s bytes",
-            ppdets(self.ifos, "-"), len(self.coincs), self.coincs.nbytes
-        )
+        for combo in self.combos:
+            logger.info(
+                "%s: %s coincs, %s bytes",
+                ppdets(combo, "-"), len(self.background[combo]),
+                self.background[combo].nbytes
+            )
 
         # If there are no results just return
         valid_ifos = [k for k in results.keys() if results[k] and k in self.ifos]
@@ -1400,10 +1816,11 @@ class LiveCoincTimeslideBackgroundEstimator(object):
             _, coinc_results = self._find_coincs(results, valid_ifos=valid_ifos)
 
         # record if a coinc is possible in this chunk
-        if len(valid_ifos) == 2:
-            coinc_results['coinc_possible'] = True
+        for combo, combo_results in zip(self.combos, coinc_results):
+            if all(ifo in valid_ifos for ifo in combo):
+                combo_results['coinc_possible'] = True
 
-        return coinc_results
+        return self.pick_best_coinc(coinc_results)
 
     def start_refresh_thread(self):
         """
@@ -1438,7 +1855,8 @@ class LiveCoincTimeslideBackgroundEstimator(object):
                     ppdets(self.ifos, "-"),
                 )
                 with self.stat_calculator_lock:
-                    self.stat_calculator.check_update_files()
+                    for stat_calculator in self.stat_calculators.values():
+                        stat_calculator.check_update_files()
             # Sleep one second for safety
             timemod.sleep(1)
             # Now include the time it took the check / update the statistic
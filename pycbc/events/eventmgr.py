@@ -183,8 +183,8 @@ def cluster_reduce(idx, snr, window_size):
 class H5FileSyntSugar(object):
     """Convenience class that adds some syntactic sugar to h5py.File.
     """
-    def __init__(self, name, prefix=''):
-        self.f = h5py.File(name, 'w')
+    def __init__(self, name, prefix='', mode='w'):
+        self.f = h5py.File(name, mode)
         self.prefix = prefix
 
     def __setitem__(self, name, data):
@@ -196,6 +196,36 @@ class H5FileSyntSugar(object):
             shuffle=True
         )
 
+    def append(self, name, data, chunksize):
+        """Append data to a resizable dataset, creating it if needed."""
+        name = self.prefix + '/' + name
+        if name not in self.f:
+            self.f.create_dataset(
+                name,
+                data=data,
+                maxshape=(None,),
+                chunks=(chunksize,),
+                compression='gzip',
+                compression_opts=9,
+                shuffle=True
+            )
+            return
+        dset = self.f[name]
+        size = len(dset)
+        dset.resize((size + len(data),))
+        dset[size:] = data
+
+    def truncate(self, size):
+        """Shrink all resizable datasets under the prefix to the given
+        length.
+        """
+        for dset in self.f[self.prefix].values():
+            if isinstance(dset, h5py.Dataset) and dset.maxshape == (None,):
+                if len(dset) < size:
+                    raise RuntimeError('Dataset %s has fewer entries than '
+                                       'expected' % dset.name)
+                dset.resize((size,))
+
 
 class EventManager(object):
     def __init__(
@@ -227,6 +257,79 @@ class EventManager(object):
         )
         self.template_event_size = 0
         self.write_performance = False
+        self.stream_file = None
+        self.stream_name = None
+        self.stream_block_size = None
+        self.stream_size = 0
+
+    def __getstate__(self):
+        # The open stream file cannot be pickled; it is reopened on restore
+        state = self.__dict__.copy()
+        state['stream_file'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if getattr(self, 'stream_name', None) is not None:
+            # Triggers written after the state was saved will be found again
+            self.stream_file = H5FileSyntSugar(self.stream_name,
+                                               self.opt.channel_name[0:2],
+                                               mode='a')
+            if self.stream_size:
+                self.stream_file.truncate(self.stream_size)
+            else:
+                self.stream_file.f.close()
+                self.stream_file = H5FileSyntSugar(self.stream_name,
+                                                   self.opt.channel_name[0:2])
+
+    def stream_events(self, outname, block_size):
+        """Write events to the output file as templates are finished.
+
+        Finalized events are appended to resizable datasets of the output
+        file by `flush_events` once at least `block_size` of them have
+        accumulated, so that memory use stays bounded. The datasets hold the
+        same values as those written by `write_to_hdf` when not streaming.
+        Cuts on the events, such as those of `consolidate_events`, must be
+        applied before they are flushed, and cannot compare events that have
+        already been written.
+
+        Parameters
+        ----------
+        outname : str
+            The name of the output file, which must be hdf.
+        block_size : int
+            The number of events to accumulate before writing them.
+        """
+        if not outname.endswith(('.hdf', '.h5')):
+            raise ValueError('Events can only be streamed to hdf files')
+        self.make_output_dir(outname)
+        self.stream_name = outname
+        self.stream_block_size = block_size
+        self.stream_size = 0
+        self.stream_file = H5FileSyntSugar(outname,
+                                           self.opt.channel_name[0:2])
+
+    def flush_events(self, force=False):
+        """Write the finalized events to the stream file, if streaming and
+        at least a block of events has accumulated (or if force is True).
+        """
+        if self.stream_file is None:
+            return
+        if not force and self._events_size < self.stream_block_size:
+            return
+        if self._events_size:
+            events = self.events
+            events.sort(order='template_id')
+            for name, values in self.trigger_columns(events):
+                self.stream_file.append(name, values, self.stream_block_size)
+            self.stream_file.f.flush()
+            self.stream_size += self._events_size
+            logger.info('Wrote %d triggers, %d in total', self._events_size,
+                        self.stream_size)
+        self._events_size = 0
+        if len(self._events) > self.array_minsize:
+            self._events = numpy.zeros(self.array_minsize,
+                                       dtype=self.event_dtype)
 
     def save_state(self, tnum_finished, filename):
         """Save the current state of the background buffers"""
@@ -484,80 +587,98 @@ class EventManager(object):
             return
         raise ValueError('Unsupported event output file format')
 
-    def write_to_hdf(self, outname):
-        self.events.sort(order='template_id')
-        th = numpy.array([p['tmplt'].template_hash for p in
-                          self.template_params])
-        tid = self.events['template_id']
-        f = H5FileSyntSugar(outname, self.opt.channel_name[0:2])
-
-        if len(self.events):
-            f['snr'] = abs(self.events['snr'])
-            try:
-                # Precessing
-                f['u_vals'] = self.events['u_vals']
-                f['coa_phase'] = self.events['coa_phase']
-                f['hplus_cross_corr'] = self.events['hplus_cross_corr']
-            except Exception:
-                # Not precessing
-                f['coa_phase'] = numpy.angle(self.events['snr'])
-            f['chisq'] = self.events['chisq']
-            f['bank_chisq'] = self.events['bank_chisq']
-            f['bank_chisq_dof'] = self.events['bank_chisq_dof']
-            f['cont_chisq'] = self.events['cont_chisq']
-            f['end_time'] = self.events['time_index'] / \
-                              float(self.opt.sample_rate) \
-                            + self.opt.gps_start_time
-            try:
-                # Precessing
-                template_sigmasq_plus = numpy.array(
-                             [t['sigmasq_plus'] for t in self.template_params],
-                                                    dtype=numpy.float32)
-                f['sigmasq_plus'] = template_sigmasq_plus[tid]
-                template_sigmasq_cross = numpy.array(
-                            [t['sigmasq_cross'] for t in self.template_params],
-                                                     dtype=numpy.float32)
-                f['sigmasq_cross'] = template_sigmasq_cross[tid]
-                # FIXME: I want to put something here, but I haven't yet
-                #        figured out what it should be. I think we would also
-                #        need information from the plus and cross correlation
-                #        (both real and imaginary(?)) to get this.
-                f['sigmasq'] = template_sigmasq_plus[tid]
-            except Exception:
-                # Not precessing
-                f['sigmasq'] = self.events['sigmasq']
-
-            # Template durations should ideally be stored in the bank file.
-            # At present, however, a few plotting/visualization codes
-            # downstream in the offline search workflow rely on durations being
-            # stored in the trigger files instead.
-            template_durations = [p['tmplt'].template_duration for p in
-                                  self.template_params]
-            f['template_duration'] = numpy.array(template_durations,
-                                                 dtype=numpy.float32)[tid]
-
-            # FIXME: Can we get this value from the autochisq instance?
-            cont_dof = self.opt.autochi_number_points
-            if self.opt.autochi_onesided is None:
-                cont_dof = cont_dof * 2
-            if self.opt.autochi_two_phase:
-                cont_dof = cont_dof * 2
-            if self.opt.autochi_max_valued_dof:
-                cont_dof = self.opt.autochi_max_valued_dof
-            f['cont_chisq_dof'] = numpy.repeat(cont_dof, len(self.events))
-
-            if 'chisq_dof' in self.events.dtype.names:
-                f['chisq_dof'] = self.events['chisq_dof'] / 2 + 1
-            else:
-                f['chisq_dof'] = numpy.zeros(len(self.events))
+    def _template_values(self, tid, get, dtype=None):
+        """Return get(template parameters) for the template of each event.
+        """
+        utid, inverse = numpy.unique(tid, return_inverse=True)
+        values = numpy.array([get(self.template_params[t]) for t in utid],
+                             dtype=dtype)
+        return values[inverse]
+
+    def trigger_columns(self, events):
+        """Return the (name, values) of each trigger dataset written for the
+        given events, which must be sorted by template_id.
+        """
+        tid = events['template_id']
+        cols = []
+        cols.append(('snr', abs(events['snr'])))
+        try:
+            # Precessing
+            cols.append(('u_vals', events['u_vals']))
+            cols.append(('coa_phase', events['coa_phase']))
+            cols.append(('hplus_cross_corr', events['hplus_cross_corr']))
+        except Exception:
+            # Not precessing
+            cols = cols[:1]
+            cols.append(('coa_phase', numpy.angle(events['snr'])))
+        cols.append(('chisq', events['chisq']))
+        cols.append(('bank_chisq', events['bank_chisq']))
+        cols.append(('bank_chisq_dof', events['bank_chisq_dof']))
+        cols.append(('cont_chisq', events['cont_chisq']))
+        cols.append(('end_time', events['time_index'] /
+                     float(self.opt.sample_rate) + self.opt.gps_start_time))
+        try:
+            # Precessing
+            template_sigmasq_plus = self._template_values(
+                tid, lambda t: t['sigmasq_plus'], dtype=numpy.float32)
+            template_sigmasq_cross = self._template_values(
+                tid, lambda t: t['sigmasq_cross'], dtype=numpy.float32)
+            cols.append(('sigmasq_plus', template_sigmasq_plus))
+            cols.append(('sigmasq_cross', template_sigmasq_cross))
+            # FIXME: I want to put something here, but I haven't yet
+            #        figured out what it should be. I think we would also
+            #        need information from the plus and cross correlation
+            #        (both real and imaginary(?)) to get this.
+            cols.append(('sigmasq', template_sigmasq_plus))
+        except Exception:
+            # Not precessing
+            cols.append(('sigmasq', events['sigmasq']))
+
+        # Template durations should ideally be stored in the bank file.
+        # At present, however, a few plotting/visualization codes
+        # downstream in the offline search workflow rely on durations being
+        # stored in the trigger files instead.
+        cols.append(('template_duration', self._template_values(
+            tid, lambda t: t['tmplt'].template_duration,
+            dtype=numpy.float32)))
+
+        # FIXME: Can we get this value from the autochisq instance?
+        cont_dof = self.opt.autochi_number_points
+        if self.opt.autochi_onesided is None:
+            cont_dof = cont_dof * 2
+        if self.opt.autochi_two_phase:
+            cont_dof = cont_dof * 2
+        if self.opt.autochi_max_valued_dof:
+            cont_dof = self.opt.autochi_max_valued_dof
+        cols.append(('cont_chisq_dof', numpy.repeat(cont_dof, len(events))))
+
+        if 'chisq_dof' in events.dtype.names:
+            cols.append(('chisq_dof', events['chisq_dof'] / 2 + 1))
+        else:
+            cols.append(('chisq_dof', numpy.zeros(len(events))))
 
-            f['template_hash'] = th[tid]
+        cols.append(('template_hash', self._template_values(
+            tid, lambda t: t['tmplt'].template_hash)))
 
-            if 'sg_chisq' in self.events.dtype.names:
-                f['sg_chisq'] = self.events['sg_chisq']
+        if 'sg_chisq' in events.dtype.names:
+            cols.append(('sg_chisq', events['sg_chisq']))
 
-            if self.opt.psdvar_segment is not None:
-                f['psd_var_val'] = self.events['psd_var_val']
+        if self.opt.psdvar_segment is not None:
+            cols.append(('psd_var_val', events['psd_var_val']))
+        return cols
+
+    def write_to_hdf(self, outname):
+        if self.stream_file is not None:
+            # The triggers are already in the file
+            self.flush_events(force=True)
+            f = self.stream_file
+            self.stream_file = None
+        else:
+            self.events.sort(order='template_id')
+            f = H5FileSyntSugar(outname, self.opt.channel_name[0:2])
+            if len(self.events):
+                for name, values in self.trigger_columns(self.events):
+                    f[name] = values
 
         if self.opt.trig_start_time:
             f['search/start_time'] = numpy.array([self.opt.trig_start_time])
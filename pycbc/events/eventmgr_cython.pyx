@@ -121,6 +121,106 @@ def logsignalrateinternals_compute2detrate(
         rate[ridx] *= (rescale_fac*rescale_fac*rescale_fac*rescale_fac)
 
 
+@cdivision(True)
+cdef inline long int _logsignalrate_digit(long int key, int value,
+                                          long int size):
+    # Append one histogram bin index to a mixed-radix key, where a key of
+    # -1 means that some bin was outside the histogram. As the sizes are
+    # twice the largest bin index plus one, no histogram bin has a digit
+    # of 0, which logsignalrateinternals_compute2detrate treats as outside
+    cdef long int digit = value + size // 2
+    if key < 0 or digit <= 0 or digit >= size:
+        return -1
+    return key * size + digit
+
+
+@boundscheck(False)
+@wraparound(False)
+@cdivision(True)
+def logsignalrateinternals_lookup(
+    float[:, ::1] p,
+    double[:, ::1] t,
+    float[:, ::1] s,
+    float[:, ::1] sig,
+    double[:] shift,
+    long int[:] to_shift,
+    double[:] sense,
+    double senseref,
+    double twidth,
+    double pwidth,
+    double swidth,
+    long int[:] ref,
+    long int[:] row,
+    long int[:, ::1] radix,
+    long int[:] offset,
+    long int[:] keys,
+    float[:] weights,
+    int dense,
+    float max_penalty,
+    float ref_snr,
+    float[:] rate
+):
+    """Look up the signal rate density of every coinc in one pass.
+
+    p, t, s and sig hold the phase, time, snr and sigmasq of each ifo
+    (first axis) for each coinc (second axis). For each coinc the time,
+    phase and snr ratio bins relative to the reference ifo ref are combined
+    into a mixed-radix key with the bin counts of table row. If dense, the
+    weight is read directly at offset[row] + key, otherwise the key is
+    searched for in the sorted keys[offset[row]:offset[row + 1]].
+    """
+    cdef:
+        int idx, ifo, r, col, nifo
+        long int key, lo, hi, mid
+        double pdif, tdif, sdif
+        float rescale_fac
+
+    nifo = p.shape[0]
+    for idx in range(p.shape[1]):
+        r = ref[idx]
+        key = 0
+        col = 0
+        for ifo in range(nifo):
+            if ifo == r:
+                continue
+            pdif = (p[r, idx] - p[ifo, idx]) % (M_PI * 2)
+            if pdif < 0:
+                # C modulus operator is not same as python's, correct for this
+                pdif += (M_PI * 2)
+            tdif = shift[idx] * to_shift[r] + t[r, idx] - shift[idx] * to_shift[ifo] - t[ifo, idx]
+            sdif = (s[ifo, idx] * sense[ifo] * sqrt(sig[r, idx])) / (s[r, idx] * senseref * sqrt(sig[ifo, idx]))
+
+            key = _logsignalrate_digit(key, <int>(tdif / twidth),
+                                       radix[row[idx], col])
+            key = _logsignalrate_digit(key, <int>(pdif / pwidth),
+                                       radix[row[idx], col + 1])
+            key = _logsignalrate_digit(key, <int>(sdif / swidth),
+                                       radix[row[idx], col + 2])
+            col += 3
+
+        # For bins that exist in the signal pdf histogram, apply that pdf
+        # value, otherwise apply the "max penalty" value.
+        rate[idx] = max_penalty
+        if key >= 0:
+            if dense:
+                rate[idx] = weights[offset[row[idx]] + key]
+            else:
+                lo = offset[row[idx]]
+                hi = offset[row[idx] + 1]
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if keys[mid] < key:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                if lo < offset[row[idx] + 1] and keys[lo] == key:
+                    rate[idx] = weights[lo]
+
+        # Scale by signal population SNR
+        rescale_fac = ref_snr / s[r, idx]
+        rate[idx] *= (rescale_fac*rescale_fac*rescale_fac*rescale_fac)
+
+
 @boundscheck(False)
 @wraparound(False)
 @cdivision(True)
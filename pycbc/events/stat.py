@@ -35,6 +35,7 @@ from . import ranking
 from . import coinc_rate
 from .eventmgr_cython import logsignalrateinternals_computepsignalbins
 from .eventmgr_cython import logsignalrateinternals_compute2detrate
+from .eventmgr_cython import logsignalrateinternals_lookup
 
 logger = logging.getLogger("pycbc.events.stat")
 
@@ -434,6 +435,11 @@ class PhaseTDStatistic(QuadratureSumStatistic):
         self.param_bin = {}
         self.two_det_flag = len(ifos) == 2
         self.two_det_weights = {}
+        # Lookup tables of all ifos, see build_lookup_tables
+        self.lookup_radix = None
+        self.lookup_offset = None
+        self.lookup_keys = None
+        self.lookup_weights = None
         # Some memory
         self.pdif = numpy.zeros(128, dtype=numpy.float64)
         self.tdif = numpy.zeros(128, dtype=numpy.float64)
@@ -624,8 +630,66 @@ class PhaseTDStatistic(QuadratureSumStatistic):
         for ifo, sense in zip(self.hist_ifos, relfac):
             self.relsense[ifo] = sense
 
+        self.build_lookup_tables()
         self.has_hist = True
 
+    def build_lookup_tables(self):
+        """
+        Combine the signal histograms of all reference ifos into the flat
+        tables used by logsignalrate.
+
+        Each histogram bin is identified by a mixed-radix integer key of its
+        bin indices, which sorts in the same order as the bins themselves.
+        For two detectors the keys index the expanded weights tables
+        directly, otherwise the keys of each ifo are kept sorted to be
+        searched. Row i of the tables belongs to the i-th of self.hist_ifos,
+        and the tables of that row start at self.lookup_offset[i].
+
+        If the keys cannot be held in 64 bits the tables are not made, and
+        logsignalrate falls back to looking up each reference ifo in turn.
+        """
+        self.lookup_radix = self.lookup_offset = None
+        self.lookup_keys = self.lookup_weights = None
+
+        if self.two_det_flag:
+            radix = [[self.c0_size[ifo], self.c1_size[ifo],
+                      self.c2_size[ifo]] for ifo in self.hist_ifos]
+            keys = [numpy.array([], dtype=numpy.int64)]
+            weights = [self.two_det_weights[ifo].ravel()
+                       for ifo in self.hist_ifos]
+        else:
+            ncol = len(self.param_bin[self.hist_ifos[0]].dtype.names)
+            # One radix for all ifos, big enough for the bins of each
+            radix_row = [
+                2 * (max(int(abs(self.param_bin[ifo]["c%s" % i]).max())
+                         for ifo in self.hist_ifos) + 1)
+                for i in range(ncol)
+            ]
+            if numpy.prod(radix_row, dtype=object) >= 2 ** 63:
+                logger.info("Histogram bins too many for lookup tables")
+                return
+            radix = [radix_row] * len(self.hist_ifos)
+            keys = []
+            weights = []
+            for ifo in self.hist_ifos:
+                key = numpy.zeros(len(self.weights[ifo]), dtype=numpy.int64)
+                for i, size in enumerate(radix_row):
+                    key *= size
+                    key += self.param_bin[ifo]["c%s" % i].astype(numpy.int64)
+                    key += size // 2
+                order = key.argsort(kind="stable")
+                keys.append(key[order])
+                weights.append(self.weights[ifo][order])
+
+        self.lookup_radix = numpy.array(radix, dtype=numpy.int64)
+        self.lookup_offset = numpy.cumsum(
+            [0] + [len(w) for w in weights]
+        ).astype(numpy.int64)
+        self.lookup_keys = numpy.concatenate(keys).astype(numpy.int64)
+        self.lookup_weights = numpy.concatenate(weights).astype(
+            numpy.float32
+        )
+
     def update_file(self, key):
         """
         Update file used in this statistic.
@@ -654,6 +718,77 @@ class PhaseTDStatistic(QuadratureSumStatistic):
         """
         Calculate the normalized log rate density of coinc signals via lookup
 
+        Parameters
+        ----------
+        stats: dict of dicts
+            Single-detector quantities for each detector
+        shift: numpy array of float
+            Time shift vector for each coinc to be ranked
+        to_shift: list of ints
+            Multiple of the time shift to apply, ordered as self.ifos
+
+        Returns
+        -------
+        value: log of coinc signal rate density for the given single-ifo
+            triggers and time shifts
+        """
+        if not self.has_hist:
+            self.get_hist()
+
+        if self.lookup_weights is None:
+            return self.logsignalrate_by_ifo(stats, shift, to_shift)
+
+        # Stack the single-detector quantities, ordered as self.ifos
+        def stack(name, dtype):
+            return numpy.array(
+                [numpy.array(stats[ifo][name], dtype=dtype, ndmin=1)
+                 for ifo in self.ifos]
+            )
+
+        snrs = numpy.array(
+            [numpy.array(stats[ifo]["snr"], ndmin=1) for ifo in self.ifos]
+        )
+        # The ifo with the smallest SNR is the reference for choosing the
+        # signal histogram
+        ref = snrs.argmin(axis=0).astype(numpy.int64)
+        hist_ifos = list(self.hist_ifos)
+        row = numpy.array([hist_ifos.index(ifo) for ifo in self.ifos],
+                          dtype=numpy.int64)[ref]
+
+        rate = numpy.zeros(len(ref), dtype=numpy.float32)
+        logsignalrateinternals_lookup(
+            stack("coa_phase", numpy.float32),
+            stack("end_time", numpy.float64),
+            stack("snr", numpy.float32),
+            stack("sigmasq", numpy.float32),
+            numpy.array(shift, dtype=numpy.float64, ndmin=1),
+            numpy.array(to_shift, dtype=numpy.int64),
+            numpy.array([self.relsense[ifo] for ifo in self.ifos],
+                        dtype=numpy.float64),
+            self.relsense[self.hist_ifos[0]],
+            self.twidth,
+            self.pwidth,
+            self.swidth,
+            ref,
+            row,
+            self.lookup_radix,
+            self.lookup_offset,
+            self.lookup_keys,
+            self.lookup_weights,
+            int(self.two_det_flag),
+            self.max_penalty,
+            self.ref_snr,
+            rate,
+        )
+        return numpy.log(rate)
+
+    def logsignalrate_by_ifo(self, stats, shift, to_shift):
+        """
+        Calculate the normalized log rate density of coinc signals via lookup
+
+        This does the same as logsignalrate, but looks up the coincs of each
+        reference ifo in turn, without the combined lookup tables.
+
         Parameters
         ----------
         stats: dict of dicts
@@ -750,10 +885,12 @@ class PhaseTDStatistic(QuadratureSumStatistic):
                     length,
                 )
 
+                # Copy the bins, as the cached memory is reused for the
+                # next ifo
                 binned += [
-                    self.tbin[:length],
-                    self.pbin[:length],
-                    self.sbin[:length],
+                    self.tbin[:length].copy(),
+                    self.pbin[:length].copy(),
+                    self.sbin[:length].copy(),
                 ]
 
             # Read signal weight from precalculated histogram
@@ -1513,15 +1650,6 @@ class ExpFitStatistic(PhaseTDStatistic):
         # choose the first ifo for convenience
         benchmark_logvol = sngls[0][1]["benchmark_logvol"]
 
-        # Benchmark log volume will be the same for all triggers, so if
-        # any are nan, they are all nan
-        if any(numpy.isnan(benchmark_logvol)):
-            # This can be the case in pycbc live if there are no triggers
-            # from this template in the trigger fits file. If so, assume 
-            # that sigma for the triggers being ranked is
-            # representative of the benchmark network.
-            return 0
-
         # Network sensitivity for a given coinc type is approximately
         # determined by the least sensitive ifo
         network_sigmasq = numpy.amin(
@@ -1530,7 +1658,12 @@ class ExpFitStatistic(PhaseTDStatistic):
         # Volume \propto sigma^3 or sigmasq^1.5
         network_logvol = 1.5 * numpy.log(network_sigmasq) - benchmark_logvol
 
-        return network_logvol
+        # The benchmark log volume is nan in pycbc live if there are no
+        # triggers from a template in the trigger fits file. If so, assume
+        # that sigma for the triggers being ranked is representative of the
+        # benchmark network. Triggers of several templates may be ranked
+        # together, so this is done for each trigger.
+        return numpy.where(numpy.isnan(benchmark_logvol), 0, network_logvol)
 
     def logsignalrate_shared(self, sngls_info):
         """
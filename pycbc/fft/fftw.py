@@ -1,7 +1,12 @@
 import os
+import fcntl
+import hashlib
+import logging
+import platform
 from pycbc.types import zeros
 import numpy as _np
 import ctypes
+import pycbc
 import pycbc.scheme as _scheme
 from pycbc.libutils import get_ctypes_library
 from .core import _BaseFFT, _BaseIFFT
@@ -235,6 +240,106 @@ def export_single_wisdom_to_filename(filename):
 def export_double_wisdom_to_filename(filename):
     wisdom_io(filename, 'double', 'export')
 
+# Persistent, on-disk wisdom cache. When a cache directory is set (with
+# set_wisdom_cache_dir, the --fftw-wisdom-cache-dir option, or the
+# PYCBC_FFTW_WISDOM_CACHE_DIR environment variable) wisdom is read from it
+# the first time a plan is made and any newly measured plan is merged back
+# into it. Plans made at measure level 0 (FFTW_ESTIMATE) do not use it.
+
+_wisdom_cache_dir = os.environ.get('PYCBC_FFTW_WISDOM_CACHE_DIR', None)
+_wisdom_cache_loaded = set()
+
+def get_wisdom_cache_dir():
+    """
+    Get the directory used to cache FFTW wisdom between processes, or None
+    if wisdom is not cached.
+    """
+    return _wisdom_cache_dir
+
+def set_wisdom_cache_dir(path):
+    """
+    Set the directory used to cache FFTW wisdom between processes. Give None
+    to disable the cache.
+    """
+    global _wisdom_cache_dir
+    _wisdom_cache_dir = path
+    _wisdom_cache_loaded.clear()
+
+def _fftw_version(precision):
+    # fftw_version is a char array in the library, not a pointer to one
+    if precision == 'float':
+        vchar = ctypes.c_char.in_dll(float_lib, 'fftwf_version')
+    else:
+        vchar = ctypes.c_char.in_dll(double_lib, 'fftw_version')
+    return ctypes.string_at(ctypes.addressof(vchar)).decode()
+
+def _simd_flags():
+    # Wisdom measured on one CPU need not be good (or even valid) on a CPU
+    # with different vector instructions
+    prefixes = ('sse', 'ssse', 'avx', 'fma', 'neon', 'asimd', 'sve', 'altivec',
+                'vsx')
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            for line in cpuinfo:
+                if line.split(':')[0].strip() in ('flags', 'Features'):
+                    flags = line.split(':', 1)[1].split()
+                    return ' '.join(sorted(f for f in flags
+                                           if f.startswith(prefixes)))
+    except OSError:
+        pass
+    return platform.processor()
+
+def _wisdom_cache_file(precision, nthreads):
+    key = repr((_fftw_version(precision), _fftw_threaded_lib, nthreads,
+                pycbc.PYCBC_ALIGNMENT, platform.machine(), _simd_flags()))
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return os.path.join(_wisdom_cache_dir,
+                        '{0}-{1}.wisdom'.format(precision, digest))
+
+def _load_wisdom_cache(precision, nthreads):
+    if (precision, nthreads) in _wisdom_cache_loaded:
+        return
+    _wisdom_cache_loaded.add((precision, nthreads))
+    fname = _wisdom_cache_file(precision, nthreads)
+    # The cache file is only ever replaced atomically, so needs no lock to
+    # be read
+    if os.path.exists(fname):
+        try:
+            wisdom_io(fname, precision, 'import')
+            logging.info('Imported FFTW wisdom from %s', fname)
+        except RuntimeError:
+            logging.warning('Ignoring unreadable FFTW wisdom file %s', fname)
+
+def _save_wisdom_cache(precision, nthreads):
+    fname = _wisdom_cache_file(precision, nthreads)
+    os.makedirs(_wisdom_cache_dir, exist_ok=True)
+    with open(fname + '.lock', 'w') as lockfile:
+        fcntl.flock(lockfile, fcntl.LOCK_EX)
+        try:
+            # Merge in what other processes have saved since we loaded
+            if os.path.exists(fname):
+                try:
+                    wisdom_io(fname, precision, 'import')
+                except RuntimeError:
+                    pass
+            tmpname = '{0}.{1}.tmp'.format(fname, os.getpid())
+            wisdom_io(tmpname, precision, 'export')
+            os.replace(tmpname, fname)
+        finally:
+            fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+def _cached_plan(planner, precision, nthreads, mlvl, flags):
+    # Make a plan by calling planner(flags), using and updating the wisdom
+    # cache if there is one
+    if _wisdom_cache_dir is None or mlvl == 0:
+        return planner(flags)
+    _load_wisdom_cache(precision, nthreads)
+    theplan = planner(flags | FFTW_WISDOM_ONLY)
+    if not theplan:
+        theplan = planner(flags)
+        _save_wisdom_cache(precision, nthreads)
+    return theplan
+
 def set_planning_limit(time):
     if not _fftw_threaded_set:
         set_threads_backend()
@@ -313,12 +418,18 @@ def plan(size, idtype, odtype, direction, mlvl, aligned, nthreads, inplace):
     if idtype.kind == odtype.kind:
         f.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p,
                       ctypes.c_int, ctypes.c_int]
-        theplan = f(size, ip.ptr, op.ptr, direction, flags)
+        planner = lambda fl: f(size, ip.ptr, op.ptr, direction, fl)
     # handle the R2C and C2R case
     else:
         f.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p,
                       ctypes.c_int]
-        theplan = f(size, ip.ptr, op.ptr, flags)
+        planner = lambda fl: f(size, ip.ptr, op.ptr, fl)
+
+    if idtype.char in ['f', 'F']:
+        precision = 'float'
+    else:
+        precision = 'double'
+    theplan = _cached_plan(planner, precision, nthreads, mlvl, flags)
 
     # We don't need ip or op anymore
     del ip, op
@@ -436,16 +547,21 @@ def _fftw_setup(fftobj):
             ffd = FFTW_FORWARD
         else:
             ffd = FFTW_BACKWARD
-        plan = plan_func(1, n.ctypes.data, fftobj.nbatch,
+        planner = lambda fl: plan_func(1, n.ctypes.data, fftobj.nbatch,
                          tmpin.ptr, inembed.ctypes.data, 1, fftobj.idist,
                          tmpout.ptr, onembed.ctypes.data, 1, fftobj.odist,
-                         ffd, flags)
+                         ffd, fl)
     # R2C or C2R (hence no direction argument for plan creation)
     else:
-        plan = plan_func(1, n.ctypes.data, fftobj.nbatch,
+        planner = lambda fl: plan_func(1, n.ctypes.data, fftobj.nbatch,
                          tmpin.ptr, inembed.ctypes.data, 1, fftobj.idist,
                          tmpout.ptr, onembed.ctypes.data, 1, fftobj.odist,
-                         flags)
+                         fl)
+    if fftobj.invec.precision == 'single':
+        precision = 'float'
+    else:
+        precision = 'double'
+    plan = _cached_plan(planner, precision, nthreads, mlvl, flags)
     del tmpin
     del tmpout
     return plan
@@ -505,6 +621,13 @@ def insert_fft_options(optgroup):
     optgroup.add_argument("--fftw-import-system-wisdom",
                           help = "If given, call fftw[f]_import_system_wisdom()",
                           action = "store_true")
+    optgroup.add_argument("--fftw-wisdom-cache-dir",
+                      help="Directory in which to cache FFTW wisdom, shared "
+                           "between processes. Wisdom is read from it when "
+                           "planning and newly measured plans are added to "
+                           "it. Not used with measure level 0. Defaults to "
+                           "$PYCBC_FFTW_WISDOM_CACHE_DIR, if set.",
+                      default=_wisdom_cache_dir)
 
 def verify_fft_options(opt,parser):
     """Parses the FFT options and verifies that they are
@@ -537,3 +660,6 @@ def from_cli(opt):
 
     # Set the user-provided measure level
     set_measure_level(opt.fftw_measure_level)
+
+    # Set the wisdom cache directory
+    set_wisdom_cache_dir(opt.fftw_wisdom_cache_dir)
@@ -72,6 +72,18 @@ WARN_MSG = ("You are using the class-based PyCBC FFT API, with the numpy "
             "(for e.g. MKL or FFTW)")
 
 
+def _batches(plan):
+    """ Yield the input and output vectors of each transform of a batched
+    plan.
+    """
+    if plan.nbatch == 1:
+        yield plan.invec, plan.outvec
+        return
+    for i in range(plan.nbatch):
+        yield (plan.invec[i * plan.idist:(i + 1) * plan.idist],
+               plan.outvec[i * plan.odist:(i + 1) * plan.odist])
+
+
 class FFT(_BaseFFT):
     """
     Class for performing FFTs via the numpy interface.
@@ -82,7 +94,8 @@ class FFT(_BaseFFT):
         self.prec, self.itype, self.otype = _check_fft_args(invec, outvec)
 
     def execute(self):
-        fft(self.invec, self.outvec, self.prec, self.itype, self.otype)
+        for invec, outvec in _batches(self):
+            fft(invec, outvec, self.prec, self.itype, self.otype)
 
 
 class IFFT(_BaseIFFT):
@@ -95,4 +108,5 @@ class IFFT(_BaseIFFT):
         self.prec, self.itype, self.otype = _check_fft_args(invec, outvec)
 
     def execute(self):
-        ifft(self.invec, self.outvec, self.prec, self.itype, self.otype)
+        for invec, outvec in _batches(self):
+            ifft(invec, outvec, self.prec, self.itype, self.otype)
@@ -472,6 +472,176 @@ class MatchedFilterControl(object):
             raise ValueError("Invalid upsample method")
 
 
+class BatchMatchedFilterControl(object):
+    def __init__(self, low_frequency_cutoff, high_frequency_cutoff,
+                 snr_threshold, tlen, delta_f, dtype, segment_list,
+                 batch_size, use_cluster, cluster_function='symmetric'):
+        """ Create a matched filter engine which filters a batch of
+        templates of equal length against each segment at once.
+
+        The templates are correlated against a segment into the rows of a
+        single workspace and inverse Fourier transformed with one batched
+        transform, before each row is thresholded and clustered as by
+        `MatchedFilterControl`.
+
+        Parameters
+        ----------
+        low_frequency_cutoff : {None, float}, optional
+            The frequency to begin the filter calculation. If None, begin at the
+            first frequency after DC.
+        high_frequency_cutoff : {None, float}, optional
+            The frequency to stop the filter calculation. If None, continue to the
+            the nyquist frequency.
+        snr_threshold : float
+            The minimum snr to return when filtering
+        tlen : int
+            The length of the time series, in samples, of each filter.
+        delta_f : float
+            The frequency resolution of the segments.
+        dtype : complex64
+            The dtype of the filter memory.
+        segment_list : list
+            List of FrequencySeries that are the Fourier-transformed data segments
+        batch_size : int
+            The maximum number of templates to filter at once.
+        use_cluster : boolean
+            If true, cluster triggers above threshold using a window; otherwise,
+            only apply a threshold.
+        cluster_function : {symmetric, str}, optional
+            Which method is used to cluster triggers over time. If 'findchirp', a
+            sliding forward window; if 'symmetric', each window's peak is compared
+            to the windows before and after it, and only kept as a trigger if larger
+            than both.
+        """
+        self.tlen = tlen
+        self.delta_f = delta_f
+        self.delta_t = 1.0/(self.delta_f * self.tlen)
+        self.dtype = dtype
+        self.snr_threshold = snr_threshold
+        self.flow = low_frequency_cutoff
+        self.fhigh = high_frequency_cutoff
+        if cluster_function not in ['symmetric', 'findchirp']:
+            raise ValueError("MatchedFilter: 'cluster_function' must be either 'symmetric' or 'findchirp'")
+        self.use_cluster = use_cluster
+        self.cluster_function = cluster_function
+        self.segments = segment_list
+        self.batch_size = int(batch_size)
+        self.num_templates = 0
+
+        # Contiguous workspace with one row per template in the batch
+        size = self.batch_size * self.tlen
+        self.template_mem = zeros(size, dtype=self.dtype)
+        self.corr_mem = zeros(size, dtype=self.dtype)
+        self.snr_mem = zeros(size, dtype=self.dtype)
+
+        rows = [slice(i * self.tlen, (i + 1) * self.tlen)
+                for i in range(self.batch_size)]
+        self.templates = [self.template_mem[r] for r in rows]
+        self.corrs = [self.corr_mem[r] for r in rows]
+        self.snrs = [self.snr_mem[r] for r in rows]
+
+        self.kmin, self.kmax = get_cutoff_indices(self.flow, self.fhigh,
+                                                  self.delta_f, self.tlen)
+        corr_slice = slice(self.kmin, self.kmax)
+        self.correlator = BatchCorrelator(
+                              [t[corr_slice] for t in self.templates],
+                              [c[corr_slice] for c in self.corrs],
+                              self.kmax - self.kmin)
+
+        # A single batched inverse transform of every row
+        self.ifft = IFFT(self.corr_mem, self.snr_mem,
+                         nbatch=self.batch_size, size=self.tlen)
+
+        if use_cluster and cluster_function == 'symmetric':
+            self.threshold_and_clusterers = []
+            for seg in self.segments:
+                self.threshold_and_clusterers.append(
+                    [events.ThresholdCluster(snr[seg.analyze])
+                     for snr in self.snrs])
+
+    def template_memory(self, index):
+        """ Return the memory to give as the 'out' parameter of
+        waveform.FilterBank for the template in row `index` of the batch.
+        """
+        return self.templates[index]
+
+    def set_templates(self, templates):
+        """ Set the templates to filter in the next calls to
+        `matched_filter_and_cluster`.
+
+        Templates generated into the memory given by `template_memory` are
+        used in place, any other template is copied into its row.
+
+        Parameters
+        ----------
+        templates : list of FrequencySeries
+            The templates, no more than the batch size.
+        """
+        if len(templates) > self.batch_size:
+            raise ValueError("Cannot filter %s templates in a batch of %s"
+                             % (len(templates), self.batch_size))
+        for row, htilde in zip(self.templates, templates):
+            if htilde.ptr != row.ptr:
+                row.clear()
+                row[:len(htilde)] = htilde[:len(row)]
+        self.num_templates = len(templates)
+
+    def matched_filter_and_cluster(self, segnum, template_norms, window,
+                                   epoch=None):
+        """ Filter each template of the batch against a segment.
+
+        Parameters
+        ----------
+        segnum : int
+            Index into the list of segments at construction against which to
+            filter.
+        template_norms : list of floats
+            The htilde, template normalization factor of each template.
+        window : int
+            Size of the window over which to cluster triggers, in samples
+
+        Returns
+        -------
+        results : list of tuples
+            For each template, the (snr, norm, correlation, idx, snrv) as
+            returned by `MatchedFilterControl.matched_filter_and_cluster`.
+            The snr and correlation share the memory of the batch, so are
+            only valid until the next call.
+        """
+        stilde = self.segments[segnum]
+        analyze = stilde.analyze
+        self.correlator.execute(stilde[self.kmin:self.kmax])
+        self.ifft.execute()
+
+        results = []
+        for i in range(self.num_templates):
+            norm = (4.0 * self.delta_f) / sqrt(template_norms[i])
+            thresh = self.snr_threshold / norm
+            if not self.use_cluster:
+                idx, snrv = events.threshold_only(self.snrs[i][analyze],
+                                                  thresh)
+            elif self.cluster_function == 'symmetric':
+                clusterer = self.threshold_and_clusterers[segnum][i]
+                snrv, idx = clusterer.threshold_and_cluster(thresh, window)
+            else:
+                idx, snrv = events.threshold(self.snrs[i][analyze], thresh)
+                idx, snrv = events.cluster_reduce(idx, snrv, window)
+
+            if len(idx) == 0 and self.use_cluster:
+                results.append(([], [], [], [], []))
+                continue
+
+            snr = TimeSeries(self.snrs[i], epoch=epoch, delta_t=self.delta_t,
+                             copy=False)
+            corr = FrequencySeries(self.corrs[i], delta_f=self.delta_f,
+                                   copy=False)
+            results.append((snr, norm, corr, idx, snrv))
+
+        logger.info("%d points above threshold in a batch of %d templates",
+                    sum(len(r[3]) for r in results), self.num_templates)
+        return results
+
+
 def compute_max_snr_over_sky_loc_stat(hplus, hcross, hphccorr,
                                                       hpnorm=None, hcnorm=None,
                                                       out=None, thresh=0,
@@ -2204,7 +2374,8 @@ def optimized_match(
 __all__ = ['match', 'optimized_match', 'matched_filter', 'sigmasq', 'sigma', 'get_cutoff_indices',
            'sigmasq_series', 'make_frequency_series', 'overlap',
            'overlap_cplx', 'matched_filter_core', 'correlate',
-           'MatchedFilterControl', 'LiveBatchMatchedFilter',
+           'MatchedFilterControl', 'BatchMatchedFilterControl',
+           'LiveBatchMatchedFilter',
            'MatchedFilterSkyMaxControl', 'MatchedFilterSkyMaxControlNoPhase',
            'compute_max_snr_over_sky_loc_stat_no_phase',
            'compute_max_snr_over_sky_loc_stat',
@@ -2,7 +2,7 @@ from . frame import (locations_to_cache, read_frame,
                      query_and_read_frame, frame_paths, write_frame,
                      DataBuffer, StatusBuffer, iDQBuffer)
 
-from . store import (read_store)
+from . store import (read_store, StrainStore)
 
 
 # Status flags for the calibration state vector
@@ -24,11 +24,14 @@ import glob
 import time
 import math
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 import numpy
 
 import lalframe
 import lal
+import lal.utils
 from gwdatafind import find_urls as find_frame_urls
 
 import pycbc
@@ -92,6 +95,108 @@ def _read_channel(channel, stream, start, duration):
                       dtype=d_type)
 
 
+def _channel_metadata(stream, channel):
+    """ Get the type code and sample spacing of a channel using lalframe """
+    lalframe.FrStreamGetVectorLength(channel, stream)
+    channel_type = lalframe.FrStreamGetTimeSeriesType(channel, stream)
+    create_series_func = _fr_type_map[channel_type][2]
+    get_series_metadata_func = _fr_type_map[channel_type][3]
+    series = create_series_func(channel, stream.epoch, 0, 0,
+                                lal.ADCCountUnit, 0)
+    get_series_metadata_func(series, stream)
+    return channel_type, series.deltaT
+
+
+def _open_stream(cache, check_integrity=False):
+    """ Open a lalframe stream on a cache """
+    stream = lalframe.FrStreamCacheOpen(cache)
+    stream.mode = lalframe.FR_STREAM_VERBOSE_MODE
+    if check_integrity:
+        stream.mode = (stream.mode | lalframe.FR_STREAM_CHECKSUM_MODE)
+    lalframe.FrStreamSetMode(stream, stream.mode)
+    return stream
+
+
+def _read_file_into(out, channel, path, start, end, check_integrity):
+    """ Read the data of a channel in a single frame file between start and
+    end into the part of the time series out that they cover.
+    """
+    stream = _open_stream(locations_to_cache([path]), check_integrity)
+    channel_type = lalframe.FrStreamGetTimeSeriesType(channel, stream)
+    read_func = _fr_type_map[channel_type][0]
+    data = read_func(stream, channel, start, float(end - start), 0)
+    offset = int(round(float(start - out.start_time) * out.sample_rate))
+    data = data.data.data[:len(out) - offset]
+    out.numpy()[offset:offset + len(data)] = data
+
+
+def _frame_file_spans(locations, sieve=None):
+    """ Return the start, end and path of each frame file in the locations
+    read by locations_to_cache, from the names of the files following
+    LIGO-T050017. Returns None if any of the names does not.
+    """
+    spans = []
+    for source in locations:
+        for file_path in glob.glob(source):
+            try:
+                if os.path.splitext(file_path)[1] in [".lcf", ".cache"]:
+                    with open(file_path) as cache_file:
+                        entries = [lal.utils.CacheEntry(line)
+                                   for line in cache_file if line.strip()]
+                else:
+                    entries = [lal.utils.CacheEntry.from_T050017(file_path)]
+            except ValueError:
+                return None
+            spans += [(e.segment[0], e.segment[1], e.path) for e in entries
+                      if not sieve or re.search(sieve, e.url)]
+    return spans
+
+
+def _read_frame_parallel(cache, spans, channels, start_time, duration,
+                         nthreads, check_integrity=False):
+    """ Read channels by decoding the frame files of a cache concurrently,
+    each directly into its part of the output time series. spans gives the
+    start, end and path of the files, see _frame_file_spans. Returns None
+    if the files do not cover the data.
+    """
+    end_time = start_time + duration
+    entries = sorted(spans, key=lambda e: e[0])
+    covered = start_time
+    for fstart, fend, _ in entries:
+        if fstart > covered:
+            break
+        covered = max(covered, lal.LIGOTimeGPS(fend))
+    if covered < end_time:
+        return None
+
+    stream = _open_stream(cache)
+    outputs = []
+    for channel in channels:
+        channel_type, delta_t = _channel_metadata(stream, channel)
+        nsamples = int(duration / delta_t)
+        outputs.append(TimeSeries(zeros(nsamples,
+                                        dtype=_fr_type_map[channel_type][1]),
+                                  delta_t=delta_t, epoch=start_time,
+                                  copy=False))
+
+    tasks = []
+    with ThreadPoolExecutor(max_workers=nthreads) as executor:
+        for out, channel in zip(outputs, channels):
+            # The duration may not be a whole number of samples, so only
+            # read the files up to the last sample of the output
+            for fstart, fend, path in entries:
+                start = max(start_time, lal.LIGOTimeGPS(fstart))
+                end = min(out.end_time, lal.LIGOTimeGPS(fend))
+                if end <= start:
+                    continue
+                tasks.append(executor.submit(_read_file_into, out, channel,
+                                             path, start, end,
+                                             check_integrity))
+        for task in tasks:
+            task.result()
+    return outputs
+
+
 def _is_gwf(file_path):
     """Test if a file is a frame file by checking if its contents begins with
     the magic string 'IGWD'."""
@@ -136,7 +241,9 @@ def locations_to_cache(locations, latest=False):
                     return 0
             if not flist:
                 raise ValueError('no frame or cache files found in ' + source)
-            flist = [max(flist, key=relaxed_getctime)]
+            # Frames written in quick succession may have the same ctime,
+            # in which case the name tells the latest one
+            flist = [max(flist, key=lambda fn: (relaxed_getctime(fn), fn))]
 
         for file_path in flist:
             dir_name, file_name = os.path.split(file_path)
@@ -154,7 +261,7 @@ def locations_to_cache(locations, latest=False):
 
 def read_frame(location, channels, start_time=None,
                end_time=None, duration=None, check_integrity=False,
-               sieve=None):
+               sieve=None, nthreads=1):
     """Read time series from frame data.
 
     Using the `location`, which can either be a frame file ".gwf" or a
@@ -183,6 +290,9 @@ def read_frame(location, channels, start_time=None,
     sieve : string, optional
         Selects only frames where the frame URL matches the regular
         expression sieve
+    nthreads : {1, int}, optional
+        If greater than one, the frame files are decoded concurrently by this
+        many threads, each writing directly into its part of the output.
 
     Returns
     -------
@@ -210,13 +320,7 @@ def read_frame(location, channels, start_time=None,
         lal.CacheSieve(cum_cache, int(start_time), int(math.ceil(end_time)),
                        None, None, None)
 
-    stream = lalframe.FrStreamCacheOpen(cum_cache)
-    stream.mode = lalframe.FR_STREAM_VERBOSE_MODE
-
-    if check_integrity:
-        stream.mode = (stream.mode | lalframe.FR_STREAM_CHECKSUM_MODE)
-
-    lalframe.FrStreamSetMode(stream, stream.mode)
+    stream = _open_stream(cum_cache, check_integrity)
 
     # determine duration of data
     if type(channels) is list:
@@ -254,6 +358,19 @@ def read_frame(location, channels, start_time=None,
     #if duration > data_duration:
     #    raise ValueError("Requested duration longer than available data")
 
+    spans = None
+    if nthreads > 1 and cum_cache.length > 1:
+        spans = _frame_file_spans(locations, sieve)
+    if spans is not None:
+        data = _read_frame_parallel(cum_cache, spans, channels
+                                    if type(channels) is list else [channels],
+                                    start_time, duration, nthreads,
+                                    check_integrity=check_integrity)
+        # If there is a gap, read the stream so that it fails as it would
+        # without threads
+        if data is not None:
+            return data if type(channels) is list else data[0]
+
     if type(channels) is list:
         all_data = []
         for channel in channels:
@@ -352,7 +469,7 @@ def get_site_from_type_or_channel(frame_type, channels):
 
 
 def query_and_read_frame(frame_type, channels, start_time, end_time,
-                         sieve=None, check_integrity=False):
+                         sieve=None, check_integrity=False, nthreads=1):
     """Read time series from frame data.
 
     Query for the location of physical frames matching the frame type. Return
@@ -378,6 +495,9 @@ def query_and_read_frame(frame_type, channels, start_time, end_time,
         expression sieve
     check_integrity : boolean
         Do an expensive checksum of the file before returning.
+    nthreads : {1, int}, optional
+        Number of threads with which to decode the frame files, see
+        :py:func:`read_frame`.
 
     Returns
     -------
@@ -419,7 +539,8 @@ def query_and_read_frame(frame_type, channels, start_time, end_time,
         start_time=start_time,
         end_time=end_time,
         sieve=sieve,
-        check_integrity=check_integrity
+        check_integrity=check_integrity,
+        nthreads=nthreads
     )
 
 
@@ -494,7 +615,8 @@ class DataBuffer(object):
                  max_buffer=2048,
                  force_update_cache=True,
                  increment_update_cache=None,
-                 dtype=numpy.float64):
+                 dtype=numpy.float64,
+                 read_ahead=False):
         """ Create a rolling buffer of frame data
 
         Parameters
@@ -510,6 +632,11 @@ class DataBuffer(object):
             Length of the buffer in seconds
         dtype: {dtype, numpy.float32}, Optional
             Data type to use for the interal buffer
+        read_ahead: {bool, False}, Optional
+            If True, `attempt_advance` starts reading the next block of
+            the same size in a background thread as soon as it returns, so
+            that it is waiting for the next frame while the current block is
+            being analyzed.
         """
         self.frame_src = frame_src
         self.channel_name = channel_name
@@ -517,6 +644,11 @@ class DataBuffer(object):
         self.force_update_cache = force_update_cache
         self.increment_update_cache = increment_update_cache
         self.detector = channel_name.split(':')[0]
+        self.read_ahead = read_ahead
+        self._read_ahead_executor = None
+        self._next_block = None
+        if read_ahead:
+            self._read_ahead_executor = ThreadPoolExecutor(max_workers=1)
 
         self.update_cache()
         self.channel_type, self.raw_sample_rate = self._retrieve_metadata(self.stream, self.channel_name)
@@ -532,9 +664,12 @@ class DataBuffer(object):
         result may change due to more files being added to the filesystem,
         for example.
         """
+        self.stream = self._open_cache_stream()
+
+    def _open_cache_stream(self):
+        """Open a new stream on the latest frame files of frame_src"""
         cache = locations_to_cache(self.frame_src, latest=True)
-        stream = lalframe.FrStreamCacheOpen(cache)
-        self.stream = stream
+        return lalframe.FrStreamCacheOpen(cache)
 
     @staticmethod
     def _retrieve_metadata(stream, channel_name):
@@ -563,13 +698,21 @@ class DataBuffer(object):
         get_series_metadata_func(series, stream)
         return channel_type, int(1.0/series.deltaT)
 
-    def _read_frame(self, blocksize):
+    def _read_frame(self, blocksize, read_pos=None, stream=None,
+                    channel_type=None):
         """Try to read the block of data blocksize seconds long
 
         Parameters
         ----------
         blocksize: int
             The number of seconds to attempt to read from the channel
+        read_pos: {None, float}, Optional
+            The time to read from. Defaults to the end of the buffer.
+        stream: {None, lal stream object}, Optional
+            The stream to read from. Defaults to the stream of the buffer.
+        channel_type: {None, lal type enum}, Optional
+            The type of the channel in stream. Defaults to the type of the
+            channel in the stream of the buffer.
 
         Returns
         -------
@@ -581,13 +724,18 @@ class DataBuffer(object):
         RuntimeError:
             If data cannot be read for any reason
         """
+        if read_pos is None:
+            read_pos = self.read_pos
+        if stream is None:
+            stream = self.stream
+            channel_type = self.channel_type
         try:
-            read_func = _fr_type_map[self.channel_type][0]
-            dtype = _fr_type_map[self.channel_type][1]
-            data = read_func(self.stream, self.channel_name,
-                             self.read_pos, int(blocksize), 0)
+            read_func = _fr_type_map[channel_type][0]
+            dtype = _fr_type_map[channel_type][1]
+            data = read_func(stream, self.channel_name,
+                             read_pos, int(blocksize), 0)
             return TimeSeries(data.data.data, delta_t=data.deltaT,
-                              epoch=self.read_pos,
+                              epoch=read_pos,
                               dtype=dtype)
         except Exception:
             raise RuntimeError('Cannot read {0} frame data'.format(self.channel_name))
@@ -614,14 +762,17 @@ class DataBuffer(object):
             The number of seconds to attempt to read from the channel
         """
         ts = self._read_frame(blocksize)
+        self._add_block(ts, blocksize)
+        return ts
 
+    def _add_block(self, ts, blocksize):
+        """Push a block of data that has been read onto the buffer"""
         self.raw_buffer.roll(-len(ts))
         self.raw_buffer[-len(ts):] = ts[:]
         self.read_pos += blocksize
         self.raw_buffer.start_time += blocksize
-        return ts
 
-    def update_cache_by_increment(self, blocksize):
+    def update_cache_by_increment(self, blocksize, start=None):
         """Update the internal cache by starting from the first frame
         and incrementing.
 
@@ -633,8 +784,27 @@ class DataBuffer(object):
         ----------
         blocksize: int
             Number of seconds to increment the next frame file.
+        start: {None, float}, Optional
+            The time of the data to find the frame files of. Defaults to the
+            end of the buffer.
         """
-        start = float(self.raw_buffer.end_time)
+        if start is None:
+            start = self.raw_buffer.end_time
+        self.stream = self._open_increment_stream(blocksize, start)
+        self.channel_type, self.raw_sample_rate = \
+            self._retrieve_metadata(self.stream, self.channel_name)
+
+    def _open_increment_stream(self, blocksize, start):
+        """Open a new stream on the frame files of the blocksize seconds of
+        data from start, guessing their names as update_cache_by_increment
+        does.
+
+        Raises
+        ------
+        RuntimeError:
+            If any of the frame files does not exist yet
+        """
+        start = float(start)
         end = float(start + blocksize)
 
         if not hasattr(self, 'dur'):
@@ -662,10 +832,62 @@ class DataBuffer(object):
 
             keys.append(name)
         cache = locations_to_cache(keys)
-        stream = lalframe.FrStreamCacheOpen(cache)
-        self.stream = stream
-        self.channel_type, self.raw_sample_rate = \
-            self._retrieve_metadata(self.stream, self.channel_name)
+        return lalframe.FrStreamCacheOpen(cache)
+
+    def _read_block(self, blocksize, timeout, read_pos, end_time,
+                    cancel=None):
+        """Read the block of data starting at read_pos, retrying until it
+        is there or the frame is late. end_time is the end of the buffer
+        when the block follows it.
+
+        This does not change the state of the buffer, so that it can be
+        called from the read-ahead thread. The cache is updated on each
+        attempt, so that a frame which appears after the first attempt is
+        found.
+
+        Parameters
+        ----------
+        cancel: {None, threading.Event}, Optional
+            Given when reading ahead, to give up on the block once it is set.
+            The block is then read through a new stream even if the cache is
+            not updated, rather than through the stream of the buffer.
+
+        Returns
+        -------
+        data: TimeSeries or None
+            The data, or None if the frame was not there before the timeout.
+        stream: lal stream object or None
+            The stream the data was read through.
+        metadata: tuple or None
+            The channel type and sample rate of the stream, if they have been
+            read again.
+        """
+        while cancel is None or not cancel.is_set():
+            try:
+                metadata = None
+                if self.increment_update_cache:
+                    stream = self._open_increment_stream(blocksize, end_time)
+                    metadata = self._retrieve_metadata(stream,
+                                                       self.channel_name)
+                elif self.force_update_cache or cancel is not None:
+                    stream = self._open_cache_stream()
+                else:
+                    stream = self.stream
+                channel_type = self.channel_type if metadata is None \
+                    else metadata[0]
+                ts = self._read_frame(blocksize, read_pos=read_pos,
+                                      stream=stream,
+                                      channel_type=channel_type)
+                return ts, stream, metadata
+            except RuntimeError:
+                if pycbc.gps_now() > timeout + end_time:
+                    # The frame is not there and it should be by now,
+                    # so we give up
+                    return None, None, None
+                # I am too early to give up on this frame,
+                # so we should try again
+                time.sleep(0.1)
+        return None, None, None
 
     def attempt_advance(self, blocksize, timeout=10):
         """ Attempt to advance the frame buffer. Retry upon failure, except
@@ -683,22 +905,52 @@ class DataBuffer(object):
         data: TimeSeries
             TimeSeries containg 'blocksize' seconds of frame data
         """
-        if self.force_update_cache:
-            self.update_cache()
-        while True:
-            try:
-                if self.increment_update_cache:
-                    self.update_cache_by_increment(blocksize)
-                return DataBuffer.advance(self, blocksize)
-            except RuntimeError:
-                if pycbc.gps_now() > timeout + self.raw_buffer.end_time:
-                    # The frame is not there and it should be by now,
-                    # so we give up and treat it as zeros
-                    DataBuffer.null_advance(self, blocksize)
-                    return None
-                # I am too early to give up on this frame,
-                # so we should try again
-                time.sleep(0.1)
+        block = None
+        if self._next_block is not None:
+            read_pos, size, future, cancel = self._next_block
+            self._next_block = None
+            # Use the block read ahead, unless the buffer has been moved
+            # some other way since
+            if read_pos == self.read_pos and size == blocksize:
+                block = future.result()
+            else:
+                cancel.set()
+
+        if block is None:
+            block = self._read_block(blocksize, timeout, self.read_pos,
+                                     self.raw_buffer.end_time)
+        ts, stream, metadata = block
+
+        if ts is None:
+            # The frame is late, treat it as zeros
+            DataBuffer.null_advance(self, blocksize)
+        else:
+            self.stream = stream
+            if metadata is not None:
+                self.channel_type, self.raw_sample_rate = metadata
+            DataBuffer._add_block(self, ts, blocksize)
+
+        if self.read_ahead:
+            # The read ahead has its own stream, as the buffer may still be
+            # read from while it is waiting for the next frame
+            cancel = threading.Event()
+            self._next_block = (self.read_pos, blocksize,
+                                self._read_ahead_executor.submit(
+                                    self._read_block, blocksize, timeout,
+                                    self.read_pos, self.raw_buffer.end_time,
+                                    cancel=cancel),
+                                cancel)
+        return ts
+
+    def close(self):
+        """Stop reading ahead, waiting for a read in progress to give up"""
+        if self._next_block is not None:
+            self._next_block[3].set()
+            self._next_block = None
+        if self._read_ahead_executor is not None:
+            self._read_ahead_executor.shutdown(wait=True)
+            self._read_ahead_executor = None
+            self.read_ahead = False
 
 class StatusBuffer(DataBuffer):
 
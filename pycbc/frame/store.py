@@ -17,6 +17,7 @@
 This modules contains functions for reading in data from hdf stores
 """
 import logging
+from collections import OrderedDict
 import numpy
 
 from pycbc.types import TimeSeries
@@ -25,9 +26,229 @@ from pycbc.io.hdf import HFile
 logger = logging.getLogger('pycbc.frame.store')
 
 
+class StrainStore(object):
+    """ Reader of time series data from an hdf store, for making many reads
+    from the same file.
+
+    The file is kept open, and the segments of each channel are sorted and
+    indexed on first use. Reads may span several stored segments. Datasets
+    stored contiguously and uncompressed are memory mapped, so that reads are
+    slices of the file mapping, while other datasets are read in blocks
+    which are kept in a least recently used cache.
+
+    Parameters
+    ----------
+    fname: str
+        Name of hdf store file
+    cache_blocks: int, optional
+        Number of blocks of chunked or compressed datasets to keep in
+        memory. Default is 32.
+    block_size: int, optional
+        Number of samples in a block, for datasets which are not chunked.
+        Chunked datasets are read in blocks of a chunk. Default is 2**20.
+    """
+    def __init__(self, fname, cache_blocks=32, block_size=2**20):
+        self.fname = fname
+        self.cache_blocks = cache_blocks
+        self.block_size = block_size
+        self.file = HFile(fname, 'r')
+        self._segments = {}
+        self._maps = {}
+        self._blocks = OrderedDict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """ Close the file """
+        self._maps.clear()
+        self._blocks.clear()
+        self.file.close()
+
+    def segments(self, channel):
+        """ The segments of data stored for a channel
+
+        Parameters
+        ----------
+        channel: str
+            Channel name
+
+        Returns
+        -------
+        starts: numpy.ndarray
+            The start times of the segments, in increasing order
+        ends: numpy.ndarray
+            The end times of the segments
+        names: numpy.ndarray
+            The names of the datasets holding the segments
+        """
+        if channel not in self._segments:
+            if channel not in self.file:
+                raise ValueError('Could not find channel name {}'
+                                 .format(channel))
+            starts = self.file[channel]['segments']['start'][:]
+            ends = self.file[channel]['segments']['end'][:]
+            order = numpy.argsort(starts, kind='stable')
+            names = numpy.array([str(i) for i in order])
+            self._segments[channel] = (starts[order], ends[order], names)
+        return self._segments[channel]
+
+    def gaps(self, channel, start_time, end_time):
+        """ The times between start_time and end_time which are not covered
+        by any stored segment of a channel
+
+        Returns
+        -------
+        list of tuples
+            The (start, end) of each gap
+        """
+        starts, ends, _ = self.segments(channel)
+        gaps = []
+        current = start_time
+        for idx in self._overlapping(channel, start_time, end_time):
+            if starts[idx] > current:
+                gaps.append((current, starts[idx]))
+            current = max(current, ends[idx])
+        if current < end_time:
+            gaps.append((current, end_time))
+        return gaps
+
+    def _overlapping(self, channel, start_time, end_time):
+        starts, ends, _ = self.segments(channel)
+        last = numpy.searchsorted(starts, end_time, side='left')
+        return [i for i in range(last) if ends[i] > start_time]
+
+    def _dataset(self, channel, name):
+        """ Get a dataset, memory mapped if it is stored contiguously """
+        key = (channel, name)
+        if key not in self._maps:
+            dset = self.file[channel][name]
+            offset = dset.id.get_offset()
+            if (offset is not None and dset.chunks is None
+                    and dset.ndim == 1 and dset.dtype.metadata is None):
+                dset = numpy.memmap(self.fname, dtype=dset.dtype, mode='r',
+                                    offset=offset, shape=dset.shape)
+            self._maps[key] = dset
+        return self._maps[key]
+
+    def _read_samples(self, channel, name, start, end):
+        """ Read samples [start, end) of a segment. The result is read-only,
+        as it may be a view of the file mapping or of a cached block.
+        """
+        dset = self._dataset(channel, name)
+        if isinstance(dset, numpy.ndarray):
+            return dset[start:end]
+
+        size = dset.chunks[0] if dset.chunks else self.block_size
+        first = start // size
+        last = (end - 1) // size if end > start else first
+        pieces = []
+        for block in range(first, last + 1):
+            key = (channel, name, block)
+            if key in self._blocks:
+                self._blocks.move_to_end(key)
+            else:
+                data = dset[block * size:(block + 1) * size]
+                data.flags.writeable = False
+                self._blocks[key] = data
+                if len(self._blocks) > self.cache_blocks:
+                    self._blocks.popitem(last=False)
+            pieces.append(self._blocks[key])
+        offset = first * size
+        if len(pieces) == 1:
+            return pieces[0][start - offset:end - offset]
+        data = numpy.concatenate(pieces)[start - offset:end - offset]
+        data.flags.writeable = False
+        return data
+
+    def read(self, channel, start_time, end_time, fill_value=None,
+             copy=True):
+        """ Read time series data
+
+        Parameters
+        ----------
+        channel: str
+            Channel name to read
+        start_time: float
+            GPS time to start reading from
+        end_time: float
+            GPS time to end time series
+        fill_value: float, optional
+            Value to give the samples in gaps between the stored segments.
+            If not given, reading across a gap raises a ValueError which
+            lists the gaps.
+        copy: bool, optional
+            If False, data within a single segment is returned without
+            copying it. The time series is then read-only. Default is True.
+
+        Returns
+        -------
+        ts: pycbc.types.TimeSeries
+            Time series containing the requested data
+        """
+        starts, ends, names = self.segments(channel)
+        idx = numpy.searchsorted(starts, start_time, side='right') - 1
+
+        # The data lies within a single segment
+        if idx >= 0 and ends[idx] >= end_time:
+            stime = starts[idx]
+            nsamples = len(self._dataset(channel, names[idx]))
+            sample_rate = nsamples / (ends[idx] - stime)
+            start = int((start_time - stime) * sample_rate)
+            end = int((end_time - stime) * sample_rate)
+            data = self._read_samples(channel, names[idx], start, end)
+            return TimeSeries(data, delta_t=1.0/sample_rate,
+                              epoch=start_time, copy=copy)
+
+        # Otherwise piece it together from the segments it overlaps
+        overlapping = self._overlapping(channel, start_time, end_time)
+        if not overlapping:
+            raise ValueError("No data for {} between {} and {}".format(
+                             channel, start_time, end_time))
+        gaps = self.gaps(channel, start_time, end_time)
+        if gaps:
+            gaps = ', '.join('{}-{}'.format(*g) for g in gaps)
+            if fill_value is None:
+                raise ValueError("Data for {} is missing between {}".format(
+                                 channel, gaps))
+            logger.warning("Filling gaps in %s between %s with %s", channel,
+                           gaps, fill_value)
+
+        sample_rate = None
+        for i in overlapping:
+            rate = len(self._dataset(channel, names[i])) / (ends[i] - starts[i])
+            if sample_rate is None:
+                sample_rate = rate
+                dtype = self._dataset(channel, names[i]).dtype
+            elif rate != sample_rate:
+                raise ValueError("The segments of {} between {} and {} have "
+                                 "different sample rates".format(
+                                 channel, start_time, end_time))
+
+        out = numpy.full(int(round((end_time - start_time) * sample_rate)),
+                         0 if fill_value is None else fill_value, dtype=dtype)
+        for i in overlapping:
+            pstart = max(start_time, starts[i])
+            pend = min(end_time, ends[i])
+            start = int((pstart - starts[i]) * sample_rate)
+            end = int((pend - starts[i]) * sample_rate)
+            offset = int(round((pstart - start_time) * sample_rate))
+            end = min(end, start + len(out) - offset)
+            out[offset:offset + end - start] = \
+                self._read_samples(channel, names[i], start, end)
+        return TimeSeries(out, delta_t=1.0/sample_rate, epoch=start_time,
+                          copy=False)
+
+
 def read_store(fname, channel, start_time, end_time):
     """ Read time series data from hdf store
 
+    This opens the file for this read only, use :py:class:`StrainStore` to
+    make several reads from the same file.
+
     Parameters
     ----------
     fname: str
@@ -45,31 +266,12 @@ def read_store(fname, channel, start_time, end_time):
         Time series containing the requested data
 
     """
-    fhandle = HFile(fname, 'r')
-    if channel not in fhandle:
-        raise ValueError('Could not find channel name {}'.format(channel))
-
-    # Determine which segment data lies in (can only read contiguous data now)
-    starts = fhandle[channel]['segments']['start'][:]
-    ends = fhandle[channel]['segments']['end'][:]
-
-    diff = start_time - starts
-    loc = numpy.where(diff >= 0)[0]
-    sidx = loc[diff[loc].argmin()]
-
-    stime = starts[sidx]
-    etime = ends[sidx]
-
-    if stime > start_time:
-        raise ValueError("Cannot read data segment before {}".format(stime))
-
-    if etime < end_time:
-        raise ValueError("Cannot read data segment past {}".format(etime))
-
-    data = fhandle[channel][str(sidx)]
-    sample_rate = len(data) / (etime - stime)
-
-    start = int((start_time - stime) * sample_rate)
-    end = int((end_time - stime) * sample_rate)
-    return TimeSeries(data[start:end], delta_t=1.0/sample_rate,
-                      epoch=start_time)
+    with StrainStore(fname) as store:
+        starts, ends, _ = store.segments(channel)
+        if not len(starts) or starts[0] > start_time:
+            raise ValueError("Cannot read data segment before {}".format(
+                             starts[0] if len(starts) else end_time))
+        if ends.max() < end_time:
+            raise ValueError("Cannot read data segment past {}".format(
+                             ends.max()))
+        return store.read(channel, start_time, end_time)
@@ -23,6 +23,8 @@ assuming various noise models.
 import logging
 from importlib.metadata import entry_points
 
+import numpy
+
 from .base import BaseModel
 from .base_data import BaseDataModel
 from .analytic import (TestEggbox, TestNormal, TestRosenbrock, TestVolcano,
@@ -60,6 +62,49 @@ def _call_global_model_logprior(*args, **kwds):
     return _global_instance(*args, callstat='logprior', **kwds)
 
 
+def _call_global_model_batch(*args, **kwds):
+    """Private function for calling the global model on a batch of points.
+    """
+    return _global_instance.batch(*args, **kwds)  # pylint:disable=no-member
+
+
+def _map_global_model_batch(mapper, nchunks, param_values):
+    """Private function for evaluating a batch of points with the global
+    model, split into (up to) ``nchunks`` batches that are mapped over by the
+    given ``mapper``.
+
+    This is needed for samplers that pass all of their points to a single
+    (vectorized) function call, like ``emcee`` with ``vectorize=True``.
+    """
+    chunks = [c for c in numpy.array_split(param_values, nchunks) if len(c)]
+    results = mapper(_call_global_model_batch, chunks)
+    return [r for chunk in results for r in chunk]
+
+
+class _BatchModelPool(object):
+    """Wraps a pool so that mapping the global model over a set of points
+    evaluates them with ``CallModel.batch``, split over the pool's processes.
+
+    This can be given to samplers that map the global model over all of their
+    walkers at once, like ``emcee``, in place of the pool. Mapping any other
+    function is passed through to the pool.
+    """
+    def __init__(self, pool):
+        self.pool = pool
+
+    def __getattr__(self, attr):
+        if attr == 'pool':
+            raise AttributeError(attr)
+        return getattr(self.pool, attr)
+
+    def map(self, func, items):
+        # samplers may wrap the function they are given
+        if getattr(func, 'f', func) is not _call_global_model:
+            return self.pool.map(func, items)
+        return _map_global_model_batch(self.pool.map, self.pool.size,
+                                       numpy.array(list(items)))
+
+
 class CallModel(object):
     """Wrapper class for calling models from a sampler.
 
@@ -162,6 +207,55 @@ class CallModel(object):
         else:
             return val
 
+    def batch(self, param_values, callstat=None, return_all_stats=None):
+        """Evaluates the model at each of a set of points.
+
+        If the model ``supports_batch``, and the ``callstat`` is either the
+        ``loglikelihood`` or the ``logposterior``, the log likelihood of all
+        of the points is calculated at once. Otherwise, this is the same as
+        calling self on each point in turn.
+
+        Parameters
+        ----------
+        param_values : array
+            Array of shape ``(npoints, len(sampling_params))`` giving the
+            parameter values to test.
+        callstat : str, optional
+            Specify which statistic to call. Default is to call whatever self's
+            ``callstat`` is set to.
+        return_all_stats : bool, optional
+            Whether or not to return all stats in addition to the ``callstat``
+            value. Default is to use self's ``return_all_stats``.
+
+        Returns
+        -------
+        list :
+            What calling self would return for each point.
+        """
+        if callstat is None:
+            callstat = self.callstat
+        if return_all_stats is None:
+            return_all_stats = self.return_all_stats
+        if not (getattr(self.model, 'supports_batch', False) and
+                callstat in ('loglikelihood', 'logposterior')):
+            return [self(p, callstat=callstat,
+                         return_all_stats=return_all_stats)
+                    for p in param_values]
+        logpost = callstat == 'logposterior'
+        out = []
+        for stats in self.model.batch_stats(param_values,
+                                            skip_zero_prior=logpost):
+            if not logpost:
+                val = stats.loglikelihood
+            elif stats.logprior == -numpy.inf:
+                val = stats.logprior
+            else:
+                val = stats.logprior + stats.loglikelihood
+            if return_all_stats:
+                val = (val, stats.getstats(self.model.default_stats))
+            out.append(val)
+        return out
+
 
 def read_from_config(cp, **kwargs):
     r"""Initializes a model from the given config file.
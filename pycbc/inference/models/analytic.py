@@ -26,6 +26,13 @@ from scipy import stats
 from .base import BaseModel
 
 
+def _stack_params(model, points):
+    """Returns an array of shape ``(len(points), len(variable_params))`` of
+    the variable params of each of the given points."""
+    return numpy.array([[p[v] for v in model.variable_params]
+                        for p in points], dtype=float)
+
+
 class TestNormal(BaseModel):
     r"""The test distribution is an multi-variate normal distribution.
 
@@ -65,6 +72,7 @@ class TestNormal(BaseModel):
 
     """
     name = "test_normal"
+    supports_batch = True
 
     def __init__(self, variable_params, mean=None, cov=None, **kwargs):
         # set up base likelihood parameters
@@ -86,6 +94,12 @@ class TestNormal(BaseModel):
         return self._dist.logpdf([self.current_params[p]
                                   for p in self.variable_params])
 
+    def _loglikelihood_batch(self, points):
+        """Returns the log pdf of the multivariate normal at each point.
+        """
+        x = _stack_params(self, points)
+        return {'loglikelihood': numpy.atleast_1d(self._dist.logpdf(x))}
+
 
 class TestEggbox(BaseModel):
     r"""The test distribution is an 'eggbox' function:
@@ -107,6 +121,7 @@ class TestEggbox(BaseModel):
 
     """
     name = "test_eggbox"
+    supports_batch = True
 
     def __init__(self, variable_params, **kwargs):
         # set up base likelihood parameters
@@ -118,6 +133,13 @@ class TestEggbox(BaseModel):
         return (2 + numpy.prod(numpy.cos([
             self.current_params[p]/2. for p in self.variable_params]))) ** 5
 
+    def _loglikelihood_batch(self, points):
+        """Returns the log pdf of the eggbox function at each point.
+        """
+        x = _stack_params(self, points)
+        logl = (2 + numpy.prod(numpy.cos(x/2.), axis=1)) ** 5
+        return {'loglikelihood': logl}
+
 
 class TestRosenbrock(BaseModel):
     r"""The test distribution is the Rosenbrock function:
@@ -139,6 +161,7 @@ class TestRosenbrock(BaseModel):
 
     """
     name = "test_rosenbrock"
+    supports_batch = True
 
     def __init__(self, variable_params, **kwargs):
         # set up base likelihood parameters
@@ -153,6 +176,14 @@ class TestRosenbrock(BaseModel):
             logl -= ((1 - p[i])**2 + 100 * (p[i+1] - p[i]**2)**2)
         return logl
 
+    def _loglikelihood_batch(self, points):
+        """Returns the log pdf of the Rosenbrock function at each point.
+        """
+        x = _stack_params(self, points)
+        logl = -((1 - x[:, :-1])**2
+                 + 100 * (x[:, 1:] - x[:, :-1]**2)**2).sum(axis=1)
+        return {'loglikelihood': logl}
+
 
 class TestVolcano(BaseModel):
     r"""The test distribution is a two-dimensional 'volcano' function:
@@ -172,6 +203,7 @@ class TestVolcano(BaseModel):
 
     """
     name = "test_volcano"
+    supports_batch = True
 
     def __init__(self, variable_params, **kwargs):
         # set up base likelihood parameters
@@ -186,7 +218,17 @@ class TestVolcano(BaseModel):
         """Returns the log pdf of the 2D volcano function.
         """
         p = [self.current_params[p] for p in self.variable_params]
-        r = numpy.sqrt(p[0]**2 + p[1]**2)
+        return self._volcano(*p)
+
+    def _loglikelihood_batch(self, points):
+        """Returns the log pdf of the 2D volcano function at each point.
+        """
+        x = _stack_params(self, points)
+        return {'loglikelihood': self._volcano(x[:, 0], x[:, 1])}
+
+    @staticmethod
+    def _volcano(x, y):
+        r = numpy.sqrt(x**2 + y**2)
         mu, sigma = 5.0, 2.0
         return 25 * (
             numpy.exp(-r/35) + 1 / (sigma * numpy.sqrt(2 * numpy.pi)) *
@@ -205,6 +247,7 @@ class TestPrior(BaseModel):
 
     """
     name = "test_prior"
+    supports_batch = True
 
     def __init__(self, variable_params, **kwargs):
         # set up base likelihood parameters
@@ -215,6 +258,11 @@ class TestPrior(BaseModel):
         """
         return 0.
 
+    def _loglikelihood_batch(self, points):
+        """Returns zero at each point.
+        """
+        return {'loglikelihood': numpy.zeros(len(points))}
+
 
 class TestPosterior(BaseModel):
     r"""Build a test posterior from a set of samples using a kde
@@ -233,6 +281,7 @@ class TestPosterior(BaseModel):
 
     """
     name = "test_posterior"
+    supports_batch = True
 
     def __init__(self, variable_params, posterior_file, nsamples, **kwargs):
         super(TestPosterior, self).__init__(variable_params, **kwargs)
@@ -259,3 +308,9 @@ class TestPosterior(BaseModel):
         p = numpy.array([self.current_params[p] for p in self.variable_params])
         logpost = self.kde.logpdf(p)
         return float(logpost[0])
+
+    def _loglikelihood_batch(self, points):
+        """Returns the log pdf of the test posterior kde at each point.
+        """
+        x = _stack_params(self, points)
+        return {'loglikelihood': self.kde.logpdf(x.T)}
@@ -582,6 +582,97 @@ class BaseModel(metaclass=ABCMeta):
         else:
             return logp + self.loglikelihood
 
+    @property
+    def supports_batch(self):
+        """Whether the model can evaluate the log likelihood of many points at
+        once, with ``_loglikelihood_batch``.
+
+        This returns False; classes that implement ``_loglikelihood_batch``
+        should override this.
+        """
+        return False
+
+    def _loglikelihood_batch(self, points):
+        """Low-level function that calculates the log likelihood of several
+        points at once.
+
+        Parameters
+        ----------
+        points : list of dict
+            The parameters of each point, with the sampling and waveform
+            transforms applied.
+
+        Returns
+        -------
+        dict :
+            Dictionary of stat names -> arrays of the stat at each point. Must
+            include ``loglikelihood``.
+        """
+        raise NotImplementedError("{} does not support evaluating several "
+                                  "points at once".format(self.name))
+
+    def batch_stats(self, params_array, skip_zero_prior=False):
+        """Evaluates the model at each of a set of points.
+
+        The log jacobian and log prior are calculated one point at a time.
+        The log likelihood of all the points is then calculated in one call
+        to ``_loglikelihood_batch`` if ``supports_batch`` is True, or one point
+        at a time otherwise.
+
+        Parameters
+        ----------
+        params_array : array
+            Array of shape ``(npoints, len(sampling_params))`` giving the
+            values of the ``sampling_params`` at each point.
+        skip_zero_prior : bool, optional
+            Do not calculate the log likelihood of points at which the log
+            prior is ``-inf``. Default is False.
+
+        Returns
+        -------
+        list of ModelStats :
+            The stats of each point.
+        """
+        allstats = []
+        points = []
+        for values in numpy.atleast_2d(params_array):
+            self.update(**dict(zip(self.sampling_params, values)))
+            logp = self.logprior
+            allstats.append(self._current_stats)
+            if skip_zero_prior and logp == -numpy.inf:
+                continue
+            if not self.supports_batch:
+                self.loglikelihood
+                continue
+            if self.waveform_transforms is not None:
+                self._current_params = transforms.apply_transforms(
+                    self._current_params, self.waveform_transforms,
+                    inverse=False)
+            points.append((len(allstats) - 1, self._current_params))
+        if points:
+            index, points = zip(*points)
+            for statname, values in self._loglikelihood_batch(points).items():
+                for i, val in zip(index, values):
+                    setattr(allstats[i], statname, val)
+        return allstats
+
+    def loglikelihood_batch(self, params_array):
+        """Returns the log likelihood at each of a set of points.
+
+        Parameters
+        ----------
+        params_array : array
+            Array of shape ``(npoints, len(sampling_params))`` giving the
+            values of the ``sampling_params`` at each point.
+
+        Returns
+        -------
+        array :
+            The log likelihood at each point.
+        """
+        return numpy.array([stats.loglikelihood
+                            for stats in self.batch_stats(params_array)])
+
     def prior_rvs(self, size=1, prior=None):
         """Returns random variates drawn from the prior.
 
@@ -26,11 +26,16 @@ a relative binning likelihood for parameter estimation.
 """
 
 
+import os
+import hashlib
 import logging
 import numpy
 import itertools
+import h5py
 from scipy.interpolate import interp1d
 
+import pycbc
+
 from pycbc.waveform import (get_fd_waveform_sequence,
                             get_fd_det_waveform_sequence, fd_det_sequence)
 from pycbc.detector import Detector
@@ -50,6 +55,14 @@ from .relbin_cpu import (likelihood_parts, likelihood_parts_v,
                          snr_predictor_dom)
 from .tools import DistMarg
 
+try:
+    from mpi4py import MPI
+except ImportError:
+    MPI = None
+
+# The values stored for each detector by the fiducial layout cache
+_LAYOUT_KEYS = ('ta', 'h00', 'edges', 'a0', 'a1', 'b0', 'b1')
+
 
 def setup_bins(f_full, f_lo, f_hi, chi=1.0,
                eps=0.1, gammas=None,
@@ -165,6 +178,11 @@ class Relative(DistMarg, BaseGaussianNoise):
         Default is False. If True, then vary the fp/fc polarization values
         as a function of frequency bin, using a predetermined PN approximation
         for the time offsets.
+    fiducial_cache_dir : str, optional
+        A directory in which to cache the fiducial waveform, frequency bins
+        and summary data, keyed by a hash of the data, PSDs, fiducial
+        parameters and binning options. Rerunning with the same inputs reads
+        them back instead of recomputing them.
     \**kwargs :
         All other keyword arguments are passed to
         :py:class:`BaseGaussianNoise`.
@@ -182,6 +200,7 @@ class Relative(DistMarg, BaseGaussianNoise):
         earth_rotation=False,
         earth_rotation_mode=2,
         marginalize_phase=True,
+        fiducial_cache_dir=None,
         **kwargs
     ):
 
@@ -226,87 +245,180 @@ class Relative(DistMarg, BaseGaussianNoise):
             self.f[ifo] = d0.sample_frequencies.numpy()
             self.df[ifo] = d0.delta_f
             self.end_time[ifo] = float(d0.end_time)
-
-            # generate fiducial waveform
-            f_lo = self.kmin[ifo] * self.df[ifo]
-            f_hi = self.kmax[ifo] * self.df[ifo]
-            logging.info(
-                "%s: Generating fiducial waveform from %s to %s Hz",
-                ifo, f_lo, f_hi,
-            )
-
-            # prune low frequency samples to avoid waveform errors
-            fpoints = Array(self.f[ifo].astype(numpy.float64))
-            fpoints = fpoints[self.kmin[ifo]:self.kmax[ifo]+1]
-
-            if self.still_needs_det_response:
-                wave = get_fd_det_waveform_sequence(ifos=ifo,
-                                                    sample_points=fpoints,
-                                                    **self.fid_params)
-                curr_wav = wave[ifo]
-                self.ta[ifo] = 0.
-            else:
-                fid_hp, fid_hc = get_fd_waveform_sequence(sample_points=fpoints,
-                                                          **self.fid_params)
-                # Apply detector response if not handled by
-                # the waveform generator
+            if not self.still_needs_det_response:
                 self.det[ifo] = Detector(ifo)
-                dt = self.det[ifo].time_delay_from_earth_center(
-                    self.fid_params["ra"],
-                    self.fid_params["dec"],
-                    self.fid_params["tc"],
-                )
-                self.ta[ifo] = self.fid_params["tc"] + dt
-                fp, fc = self.det[ifo].antenna_pattern(
-                    self.fid_params["ra"], self.fid_params["dec"],
-                    self.fid_params["polarization"], self.fid_params["tc"])
-                curr_wav = (fid_hp * fp + fid_hc * fc)
-
-            # check for zeros at low and high frequencies
-            # make sure only nonzero samples are included in bins
-            numzeros_lo = list(curr_wav != 0j).index(True)
-            if numzeros_lo > 0:
-                new_kmin = self.kmin[ifo] + numzeros_lo
-                f_lo = new_kmin * self.df[ifo]
-                logging.info(
-                    "WARNING! Fiducial waveform starts above "
-                    "low-frequency-cutoff, initial bin frequency "
-                    "will be %s Hz", f_lo)
-            numzeros_hi = list(curr_wav[::-1] != 0j).index(True)
-            if numzeros_hi > 0:
-                new_kmax = self.kmax[ifo] - numzeros_hi
-                f_hi = new_kmax * self.df[ifo]
-                logging.info(
-                    "WARNING! Fiducial waveform terminates below "
-                    "high-frequency-cutoff, final bin frequency "
-                    "will be %s Hz", f_hi)
-
-            self.ta[ifo] -= self.end_time[ifo]
-            curr_wav.resize(len(self.f[ifo]))
-            curr_wav = numpy.roll(curr_wav, self.kmin[ifo])
-
-            # We'll apply this to the data, in lieu of the ref waveform
-            # This makes it easier to compare target signal to reference later
-            tshift = numpy.exp(-2.0j * numpy.pi * self.f[ifo] * self.ta[ifo])
-            self.h00[ifo] = numpy.array(curr_wav) # * tshift
-            data_shifted = self.data[ifo] * numpy.conjugate(tshift)
-
-            logging.info("Computing frequency bins")
-            fbin_ind = setup_bins(
-                f_full=self.f[ifo], f_lo=f_lo, f_hi=f_hi,
-                gammas=gammas, eps=float(epsilon),
-            )
-            logging.info("Using %s bins for this model", len(fbin_ind))
 
+        layouts = self.fiducial_layouts(list(data), gammas, epsilon,
+                                        cache_dir=fiducial_cache_dir)
+        for ifo in data:
+            layout = layouts[ifo]
+            fbin_ind = layout['edges']
+            self.ta[ifo] = layout['ta']
+            self.h00[ifo] = layout['h00']
+            self.h00_sparse[ifo] = layout['h00'].take(fbin_ind)
+            self.sdat[ifo] = {k: layout[k] for k in ('a0', 'a1', 'b0', 'b1')}
             self.fedges[ifo] = self.f[ifo][fbin_ind]
             self.edges[ifo] = fbin_ind
-            self.init_from_frequencies(data_shifted, self.h00, fbin_ind, ifo)
             self.antenna_time[ifo] = self.setup_antenna(
                                         earth_rotation,
                                         int(earth_rotation_mode),
                                         self.fedges[ifo])
         self.combine_layout()
 
+    def compute_layout(self, ifo, gammas, epsilon):
+        """Generate the fiducial waveform of a detector and compute its
+        frequency bins and summary data.
+
+        Returns
+        -------
+        dict
+            The time offset ``ta`` and full resolution fiducial waveform
+            ``h00`` of the detector, the indices of the bin ``edges`` and the
+            summary data ``a0``, ``a1``, ``b0`` and ``b1``.
+        """
+        # generate fiducial waveform
+        f_lo = self.kmin[ifo] * self.df[ifo]
+        f_hi = self.kmax[ifo] * self.df[ifo]
+        logging.info(
+            "%s: Generating fiducial waveform from %s to %s Hz",
+            ifo, f_lo, f_hi,
+        )
+
+        # prune low frequency samples to avoid waveform errors
+        fpoints = Array(self.f[ifo].astype(numpy.float64))
+        fpoints = fpoints[self.kmin[ifo]:self.kmax[ifo]+1]
+
+        if self.still_needs_det_response:
+            wave = get_fd_det_waveform_sequence(ifos=ifo,
+                                                sample_points=fpoints,
+                                                **self.fid_params)
+            curr_wav = wave[ifo]
+            ta = 0.
+        else:
+            fid_hp, fid_hc = get_fd_waveform_sequence(sample_points=fpoints,
+                                                      **self.fid_params)
+            # Apply detector response if not handled by
+            # the waveform generator
+            dt = self.det[ifo].time_delay_from_earth_center(
+                self.fid_params["ra"],
+                self.fid_params["dec"],
+                self.fid_params["tc"],
+            )
+            ta = self.fid_params["tc"] + dt
+            fp, fc = self.det[ifo].antenna_pattern(
+                self.fid_params["ra"], self.fid_params["dec"],
+                self.fid_params["polarization"], self.fid_params["tc"])
+            curr_wav = (fid_hp * fp + fid_hc * fc)
+
+        # check for zeros at low and high frequencies
+        # make sure only nonzero samples are included in bins
+        numzeros_lo = list(curr_wav != 0j).index(True)
+        if numzeros_lo > 0:
+            new_kmin = self.kmin[ifo] + numzeros_lo
+            f_lo = new_kmin * self.df[ifo]
+            logging.info(
+                "WARNING! Fiducial waveform starts above "
+                "low-frequency-cutoff, initial bin frequency "
+                "will be %s Hz", f_lo)
+        numzeros_hi = list(curr_wav[::-1] != 0j).index(True)
+        if numzeros_hi > 0:
+            new_kmax = self.kmax[ifo] - numzeros_hi
+            f_hi = new_kmax * self.df[ifo]
+            logging.info(
+                "WARNING! Fiducial waveform terminates below "
+                "high-frequency-cutoff, final bin frequency "
+                "will be %s Hz", f_hi)
+
+        ta -= self.end_time[ifo]
+        curr_wav.resize(len(self.f[ifo]))
+        curr_wav = numpy.roll(curr_wav, self.kmin[ifo])
+
+        # We'll apply this to the data, in lieu of the ref waveform
+        # This makes it easier to compare target signal to reference later
+        tshift = numpy.exp(-2.0j * numpy.pi * self.f[ifo] * ta)
+        h00 = numpy.array(curr_wav) # * tshift
+        data_shifted = self.data[ifo] * numpy.conjugate(tshift)
+
+        logging.info("Computing frequency bins")
+        fbin_ind = setup_bins(
+            f_full=self.f[ifo], f_lo=f_lo, f_hi=f_hi,
+            gammas=gammas, eps=float(epsilon),
+        )
+        logging.info("Using %s bins for this model", len(fbin_ind))
+
+        self.init_from_frequencies(data_shifted, {ifo: h00}, fbin_ind, ifo)
+        layout = {'ta': ta, 'h00': h00, 'edges': fbin_ind}
+        layout.update(self.sdat[ifo])
+        return layout
+
+    def fiducial_cache_key(self, ifos, gammas, epsilon):
+        """A hash of everything the fiducial waveforms, frequency bins and
+        summary data of the given detectors depend on.
+        """
+        sha = hashlib.sha256()
+        gammas = None if gammas is None else list(numpy.asarray(gammas))
+        params = sorted((k, str(v)) for k, v in self.fid_params.items())
+        sha.update(repr((pycbc.__version__, params, gammas, float(epsilon),
+                         self.still_needs_det_response)).encode())
+        for ifo in sorted(ifos):
+            sha.update(repr((ifo, self.df[ifo], self.end_time[ifo],
+                             self.kmin[ifo], self.kmax[ifo])).encode())
+            sha.update(numpy.ascontiguousarray(self.data[ifo]).tobytes())
+            sha.update(numpy.ascontiguousarray(self.psds[ifo]).tobytes())
+        return sha.hexdigest()[:32]
+
+    def fiducial_layouts(self, ifos, gammas, epsilon, cache_dir=None):
+        """Get the fiducial waveform, frequency bins and summary data of
+        each detector, as returned by :py:meth:`compute_layout`.
+
+        If ``cache_dir`` is given, the layouts are read from a file in it
+        whose name is a hash of the data, PSDs, fiducial parameters and
+        binning options, or computed and written there if there is no such
+        file. When running under MPI only the first rank reads or computes
+        the layouts, and sends them to the others.
+        """
+        if MPI is not None and MPI.COMM_WORLD.Get_size() > 1:
+            comm = MPI.COMM_WORLD
+            layouts = None
+            if comm.Get_rank() == 0:
+                layouts = self._fiducial_layouts(ifos, gammas, epsilon,
+                                                 cache_dir)
+            return comm.bcast(layouts, root=0)
+        return self._fiducial_layouts(ifos, gammas, epsilon, cache_dir)
+
+    def _fiducial_layouts(self, ifos, gammas, epsilon, cache_dir):
+        if cache_dir is None:
+            return {ifo: self.compute_layout(ifo, gammas, epsilon)
+                    for ifo in ifos}
+
+        key = self.fiducial_cache_key(ifos, gammas, epsilon)
+        fname = os.path.join(cache_dir, 'relbin-{}.hdf'.format(key))
+        if os.path.exists(fname):
+            logging.info("Reading fiducial layout from %s", fname)
+            with h5py.File(fname, 'r') as f:
+                return {ifo: {k: (f[ifo][k][()] if k in f[ifo]
+                                  else f[ifo].attrs[k])
+                              for k in _LAYOUT_KEYS}
+                        for ifo in ifos}
+
+        layouts = {ifo: self.compute_layout(ifo, gammas, epsilon)
+                   for ifo in ifos}
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write to a temporary file first so that a concurrent reader never
+        # sees a partial file
+        tmpname = '{0}.{1}.tmp'.format(fname, os.getpid())
+        with h5py.File(tmpname, 'w') as f:
+            for ifo in ifos:
+                group = f.create_group(ifo)
+                for k in _LAYOUT_KEYS:
+                    if numpy.ndim(layouts[ifo][k]) == 0:
+                        group.attrs[k] = layouts[ifo][k]
+                    else:
+                        group[k] = layouts[ifo][k]
+        os.replace(tmpname, fname)
+        logging.info("Wrote fiducial layout to %s", fname)
+        return layouts
+
     def init_from_frequencies(self, data, h00, fbin_ind, ifo):
         bins = numpy.array(
             [
@@ -605,6 +717,69 @@ class Relative(DistMarg, BaseGaussianNoise):
             results = loglr
         return results
 
+    @property
+    def supports_batch(self):
+        """Whether ``_loglikelihood_batch`` can be used.
+
+        This is the case when the antenna patterns are applied here, do not
+        vary over frequency, and no vector marginalization is used.
+        """
+        return (type(self)._loglr is Relative._loglr and
+                not self.still_needs_det_response and
+                self.earth_rotation is False and
+                not self.marginalize_vector_params and
+                not self.return_sh_hh and
+                not (self.reconstruct_phase or self.reconstruct_distance or
+                     self.reconstruct_vector))
+
+    @catch_waveform_error
+    def _batch_waveforms(self, params):
+        """Returns the waveforms of a point, or -inf if they failed to
+        generate."""
+        return self.get_waveforms(params)
+
+    def _loglikelihood_batch(self, points):
+        """Computes the log likelihood of several points.
+
+        The waveforms are generated one point at a time, while the antenna
+        patterns and time delays of all points are computed together.
+        """
+        npoints = len(points)
+        ra, dec, tc, pol = (numpy.array([p[k] for p in points])
+                            for k in ('ra', 'dec', 'tc', 'polarization'))
+        pol_phase = numpy.exp(-2.0j * pol)
+        wfs = [self._batch_waveforms(p) for p in points]
+        valid = [i for i in range(npoints) if isinstance(wfs[i], dict)]
+
+        filt = numpy.zeros(npoints, dtype=complex)
+        norm = numpy.zeros(npoints)
+        for ifo in self.data:
+            freqs = self.fedges[ifo]
+            sdat = self.sdat[ifo]
+            h00 = self.h00_sparse[ifo]
+            times = self.antenna_time[ifo]
+            det = self.det[ifo]
+            fp, fc = det.antenna_pattern(ra, dec, 0.0, times)
+            dt = det.time_delay_from_earth_center(ra, dec, times)
+            dtc = tc + dt - self.end_time[ifo] - self.ta[ifo]
+            f = (fp + 1.0j * fc) * pol_phase
+            for i in valid:
+                hp, hc = wfs[i][ifo]
+                filter_i, norm_i = self.lik(freqs, f[i].real, f[i].imag,
+                                            dtc[i], hp, hc, h00,
+                                            sdat['a0'], sdat['a1'],
+                                            sdat['b0'], sdat['b1'])
+                filt[i] += filter_i
+                norm[i] += norm_i
+
+        loglr = numpy.full(npoints, -numpy.inf)
+        for i in valid:
+            loglr[i] = self.marginalize_loglr(filt[i], norm[i])
+        lognl = self.lognl
+        return {'loglr': loglr,
+                'lognl': numpy.full(npoints, lognl),
+                'loglikelihood': loglr + lognl}
+
     def _nowaveform_handler(self):
         """Returns -inf for loglr if no waveform generated.
 
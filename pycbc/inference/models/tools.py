@@ -13,7 +13,7 @@ from scipy.special import logsumexp, i0e
 from scipy.interpolate import RectBivariateSpline, interp1d
 from pycbc.distributions import JointDistribution
 
-from pycbc.detector import Detector
+from pycbc.detector import Detector, DetectorNetwork
 
 
 # Earth radius in seconds
@@ -468,10 +468,13 @@ class DistMarg():
                 dt = numpy.rint(dt / snrs[ifos[0]].delta_t)
                 dts.append(dt)
 
-            fp, fc, dtc = {}, {}, {}
-            for ifo in self.data:
-                fp[ifo], fc[ifo] = d[ifo].antenna_pattern(ra, dec, 0.0, tcave)
-                dtc[ifo] = d[ifo].time_delay_from_earth_center(ra, dec, tcave)
+            # Evaluate all the detectors over the sky samples at once
+            network = DetectorNetwork(list(self.data), reference_time=tcave)
+            fps, fcs = network.antenna_pattern(ra, dec, 0.0, tcave)
+            dtcs = network.time_delay_from_earth_center(ra, dec, tcave)
+            fp = dict(zip(network.names, fps))
+            fc = dict(zip(network.names, fcs))
+            dtc = dict(zip(network.names, dtcs))
 
             dmap = {}
             for i, t in enumerate(tqdm.tqdm(zip(*dts))):
@@ -86,6 +86,9 @@ class EmceeEnsembleSampler(EnsembleSupport, BaseMCMC, BaseSampler):
         models._global_instance = model_call
         model_call = models._call_global_model
         pool = choose_pool(mpi=use_mpi, processes=nprocesses)
+        if getattr(model, 'supports_batch', False):
+            # evaluate the walkers in batches rather than one at a time
+            pool = models._BatchModelPool(pool)
 
         # set up emcee
         self.nwalkers = nwalkers
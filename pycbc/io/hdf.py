@@ -7,9 +7,13 @@ import numpy as np
 import logging
 import inspect
 import pickle
+import queue
+import threading
 
 from itertools import chain
+from collections import deque
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from lal import LIGOTimeGPS
 
 from igwn_ligolw import ligolw
@@ -87,9 +91,13 @@ class HFile(HGroup, h5py.File):
     """ Low level extensions to the capabilities of reading an hdf5 File
     """
     def select(self, fcn, *args, chunksize=10**6, derived=None, group='',
-               return_data=True, premask=None):
+               return_data=True, premask=None, nthreads=1, prefetch=2):
         """ Return arrays from an hdf5 file that satisfy the given function
 
+        Chunks are read ahead of time by a background thread while the
+        previous ones are being evaluated, and the selected values are
+        accumulated into growable buffers.
+
         Parameters
         ----------
         fcn : a function
@@ -121,6 +129,15 @@ class HFile(HGroup, h5py.File):
         premask : array of boolean values, optional
             The pre-mask to apply to the triggers at read-in.
 
+        nthreads : {1, int}, optional
+            Number of threads used to evaluate the derived functions and
+            `fcn` on the chunks. These must be safe to call from several
+            threads at once if this is more than one.
+
+        prefetch : {2, int}, optional
+            Number of chunks to read ahead of the ones being evaluated. If
+            zero, chunks are read in the calling thread.
+
         Returns
         -------
         indices: np.ndarray
@@ -178,31 +195,30 @@ class HFile(HGroup, h5py.File):
             raise RuntimeError(f"Using premask of size {mask.size} which "
                                f"does not match the input datasets ({size}).")
 
-        # datasets being returned (possibly)
-        data = {}
-        indices = np.array([], dtype=np.uint64)
-        for arg in args:
-            data[arg] = []
+        def read_chunks():
+            i = 0
+            while i < size:
+                r = i + chunksize if i + chunksize < size else size
 
-        # Loop through the chunks:
-        i = 0
-        while i < size:
-            r = i + chunksize if i + chunksize < size else size
+                if not any(mask[i:r]):
+                    # Nothing allowed through the mask in this chunk
+                    i += chunksize
+                    continue
 
-            if not any(mask[i:r]):
-                # Nothing allowed through the mask in this chunk
-                i += chunksize
-                continue
+                if all(mask[i:r]):
+                    # Everything allowed through the mask in this chunk
+                    submask = np.arange(r - i)
+                else:
+                    submask = np.flatnonzero(mask[i:r])
 
-            if all(mask[i:r]):
-                # Everything allowed through the mask in this chunk
-                submask = np.arange(r - i)
-            else:
-                submask = np.flatnonzero(mask[i:r])
+                # Read each chunk's worth of data
+                partial_data = {arg: refs[arg][i:r][mask[i:r]]
+                                for arg in dsets}
+                yield i, submask, partial_data
+                i += chunksize
 
-            # Read each chunk's worth of data
-            partial_data = {arg: refs[arg][i:r][mask[i:r]]
-                            for arg in dsets}
+        def evaluate(chunk):
+            i, submask, partial_data = chunk
             partial = []
             for a in args:
                 if a in derived.keys():
@@ -215,24 +231,150 @@ class HFile(HGroup, h5py.File):
 
             # Find where it passes the function
             keep = fcn(*partial)
+            if not return_data:
+                return submask[keep] + i, None
+            return submask[keep] + i, [part[keep] for part in partial]
 
-            # Keep the indices which pass the function:
-            indices = np.concatenate([indices, submask[keep] + i])
+        chunks = read_chunks()
+        if prefetch > 0:
+            chunks = _prefetch(chunks, prefetch)
 
-            if return_data:
-                # Store the dataset results that pass the function
-                for arg, part in zip(args, partial):
-                    data[arg].append(part[keep])
+        # datasets being returned (possibly)
+        indices = _GrowableArray(np.uint64)
+        data = {arg: _GrowableArray(refs[arg].dtype if arg in refs else None)
+                for arg in args}
 
-            i += chunksize
+        if nthreads > 1:
+            executor = ThreadPoolExecutor(nthreads)
+            results = _ordered_map(executor, evaluate, chunks, 2 * nthreads)
+        else:
+            results = map(evaluate, chunks)
+
+        try:
+            for idx, parts in results:
+                # Keep the indices which pass the function
+                indices.append(idx)
+                if return_data:
+                    # Store the dataset results that pass the function
+                    for arg, part in zip(args, parts):
+                        data[arg].append(part)
+        finally:
+            if nthreads > 1:
+                executor.shutdown(cancel_futures=True)
+            if prefetch > 0:
+                chunks.close()
 
         if return_data:
-            return_tuple = tuple(np.concatenate(data[arg])
-                                 for arg in args)
+            return_tuple = tuple(data[arg].array for arg in args)
         else:
             return_tuple = None
 
-        return indices.astype(np.uint64), return_tuple
+        return indices.array, return_tuple
+
+
+def _prefetch(iterable, depth):
+    """ Iterate over an iterable in a background thread
+
+    Parameters
+    ----------
+    iterable : iterable
+        The items to produce.
+    depth : int
+        The maximum number of items produced ahead of being consumed.
+
+    Returns
+    -------
+    generator
+        Yields the items of the iterable in order. Any exception raised by
+        the iterable is re-raised in the consuming thread.
+    """
+    done = object()
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item, exc=None):
+        # Give up once the consumer has stopped, so that the producer can
+        # not block forever on a full queue
+        while not stop.is_set():
+            try:
+                items.put((item, exc), timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(done)
+        except Exception as exc:
+            put(done, exc)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, exc = items.get()
+            if exc is not None:
+                raise exc
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _ordered_map(executor, fcn, iterable, depth):
+    """ Map a function over an iterable using an executor, in order
+
+    Unlike `Executor.map`, at most `depth` items are taken from the
+    iterable ahead of the results being consumed.
+    """
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(fcn, item))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class _GrowableArray(object):
+    """ An array which can be efficiently appended to
+
+    Storage is over-allocated by doubling, so that appending n elements in
+    total costs O(n) copies rather than the O(n**2) of repeated calls to
+    numpy.concatenate.
+    """
+    def __init__(self, dtype=None):
+        self._dtype = dtype
+        self._data = None
+        self.size = 0
+
+    def append(self, values):
+        values = np.asarray(values)
+        size = self.size + len(values)
+        if self._data is None:
+            dtype = values.dtype if self._dtype is None else self._dtype
+            self._data = np.empty((max(size, 1024),) + values.shape[1:],
+                                  dtype=dtype)
+        elif size > len(self._data):
+            data = np.empty((max(size, 2 * len(self._data)),)
+                            + self._data.shape[1:], dtype=self._data.dtype)
+            data[:self.size] = self._data[:self.size]
+            self._data = data
+        self._data[self.size:size] = values
+        self.size = size
+
+    @property
+    def array(self):
+        """ A copy of the values appended so far, with no spare storage """
+        if self._data is None:
+            return np.array([], dtype=self._dtype)
+        return self._data[:self.size].copy()
 
 
 class DictArray(object):
@@ -1456,6 +1598,137 @@ class ReadByTemplate(object):
                 self.segs = (self.segs - gating_veto_segs).coalesce()
         self.valid = veto.segments_to_start_end(self.segs)
 
+        # State of the bulk reader, see load_templates
+        self._bulk_ids = None
+        self._bulk_data = {}
+        self._bulk_valid = None
+        self._bank_data = None
+
+    def load_templates(self, template_ids, chunksize=10**7):
+        """Read the triggers of many templates in bulk.
+
+        Triggers are stored sorted by template hash, and the position of the
+        first trigger of each template is given by 'template_boundaries'.
+        This is used to locate the triggers of all the requested templates
+        at once, so that each column can later be read in large contiguous
+        slabs rather than by dereferencing one region reference per
+        template. Columns are read on first access, and only the triggers
+        of the requested templates are kept in memory. Vetoes are applied
+        to all of them in a single pass.
+
+        After calling this, `set_template`, `get_data` and `__getitem__`
+        are served from views of the in-memory arrays for the given
+        templates. Other templates are still read from the file.
+
+        Parameters
+        ----------
+        template_ids: numpy.ndarray
+            The ids of the templates which will be accessed.
+        chunksize: {10**7, int}, optional
+            Maximum number of triggers to read from the file at a time.
+        """
+        grp = self.file[self.ifo]
+        boundaries = grp['template_boundaries'][:].astype(np.int64)
+        ntrigs = grp['template_id'].size
+        ids = np.unique(np.asarray(template_ids, dtype=np.int64))
+        starts = boundaries[ids]
+
+        # The triggers of a template extend up to the next distinct boundary
+        edges = np.unique(np.append(boundaries, ntrigs))
+        nxt = np.searchsorted(edges, starts, side='right')
+        ends = edges[np.minimum(nxt, len(edges) - 1)]
+        lengths = ends - starts
+
+        # Templates without triggers share their boundary with the template
+        # which follows them in hash order, so check which template the
+        # triggers at a shared boundary really belong to
+        _, inverse, counts = np.unique(boundaries, return_inverse=True,
+                                       return_counts=True)
+        shared = np.flatnonzero((counts[inverse][ids] > 1) & (lengths > 0))
+        if len(shared):
+            locs = np.unique(starts[shared])
+            owner = grp['template_id'][locs]
+            owner = owner[np.searchsorted(locs, starts[shared])]
+            lengths[shared[owner != ids[shared]]] = 0
+
+        # Lay the triggers out in memory in the same order as in the file
+        order = np.argsort(starts, kind='stable')
+        offsets = np.zeros(len(ids), dtype=np.int64)
+        offsets[order] = np.cumsum(lengths[order]) - lengths[order]
+        total = lengths.sum()
+        index = np.arange(total, dtype=np.int64)
+        index += np.repeat(starts[order] - offsets[order], lengths[order])
+
+        self._bulk_ids = ids
+        self._bulk_boundaries = boundaries
+        self._bulk_layout = order
+        self._bulk_offsets = offsets
+        self._bulk_lengths = lengths
+        self._bulk_index = index
+        self._bulk_chunksize = chunksize
+        self._bulk_data = {}
+        self._bulk_valid = None
+
+        if self.bank != {}:
+            if 'parameters' in self.bank.attrs:
+                cols = self.bank.attrs['parameters']
+            else:
+                cols = self.bank.keys()
+            self._bank_data = {col: self.bank[col][:] for col in cols}
+
+    def _bulk_slice(self, num):
+        """Return the slice of the bulk arrays holding template 'num', or
+        None if it was not loaded by `load_templates`.
+        """
+        if self._bulk_ids is None:
+            return None
+        i = np.searchsorted(self._bulk_ids, num)
+        if i == len(self._bulk_ids) or self._bulk_ids[i] != num:
+            return None
+        start = self._bulk_offsets[i]
+        return slice(start, start + self._bulk_lengths[i])
+
+    def _bulk_column(self, col):
+        """Return a column for all triggers loaded by `load_templates`,
+        reading it from the file in contiguous slabs if needed.
+        """
+        if col not in self._bulk_data:
+            dset = self.file['%s/%s' % (self.ifo, col)]
+            index = self._bulk_index
+            data = np.empty(len(index), dtype=dset.dtype)
+            i = 0
+            while i < len(index):
+                left = index[i]
+                j = np.searchsorted(index, left + self._bulk_chunksize)
+                slab = dset[left:index[j - 1] + 1]
+                data[i:j] = slab[index[i:j] - left]
+                i = j
+            self._bulk_data[col] = data
+        return self._bulk_data[col]
+
+    def _bulk_vetoes(self):
+        """Apply the vetoes to all triggers loaded by `load_templates`.
+
+        Returns
+        -------
+        order: numpy.ndarray
+            Index array which sorts the triggers of each template by time.
+        keep: numpy.ndarray
+            Boolean array, True for triggers which survive the vetoes.
+        """
+        # The valid times may be changed after the triggers were loaded
+        if self._bulk_valid is not self.valid:
+            times = self._bulk_column('end_time')
+            layout = self._bulk_layout
+            owner = np.repeat(np.arange(len(layout)),
+                              self._bulk_lengths[layout])
+            self._bulk_order = np.lexsort((times, owner))
+            self._bulk_keep = np.zeros(len(times), dtype=bool)
+            self._bulk_keep[veto.indices_within_times(times, self.valid[0],
+                                                      self.valid[1])] = True
+            self._bulk_valid = self.valid
+        return self._bulk_order, self._bulk_keep
+
     def get_data(self, col, num):
         """Get a column of data for template with id 'num'.
 
@@ -1471,6 +1744,9 @@ class ReadByTemplate(object):
         data: numpy.ndarray
             The requested column of data
         """
+        sl = self._bulk_slice(num)
+        if sl is not None:
+            return self._bulk_column(col)[sl]
         ref = self.file['%s/%s_template' % (self.ifo, col)][num]
         return self.file['%s/%s' % (self.ifo, col)][ref]
 
@@ -1488,18 +1764,26 @@ class ReadByTemplate(object):
             The indices of this templates triggers.
         """
         self.template_num = num
-        times = self.get_data('end_time', num)
+        sl = self._bulk_slice(num)
 
         # Determine which of these template's triggers are kept after
         # applying vetoes
-        if self.valid:
+        if sl is not None and self.valid:
+            order, keep = self._bulk_vetoes()
+            order = order[sl]
+            self.keep = order[keep[order]] - sl.start
+        elif self.valid:
+            times = self.get_data('end_time', num)
             self.keep = veto.indices_within_times(times, self.valid[0],
                                                   self.valid[1])
 #            logger.info('applying vetoes')
         else:
-            self.keep = np.arange(0, len(times))
+            self.keep = np.arange(0, len(self.get_data('end_time', num)))
 
-        if self.bank != {}:
+        if self._bank_data is not None:
+            self.param = {col: self._bank_data[col][self.template_num]
+                          for col in self._bank_data}
+        elif self.bank != {}:
             self.param = {}
             if 'parameters' in self.bank.attrs:
                 for col in self.bank.attrs['parameters']:
@@ -1511,8 +1795,11 @@ class ReadByTemplate(object):
         # Calculate the trigger id by adding the relative offset in self.keep
         # to the absolute beginning index of this templates triggers stored
         # in 'template_boundaries'
-        trigger_id = self.keep + \
-                         self.file['%s/template_boundaries' % self.ifo][num]
+        if sl is not None:
+            boundary = self._bulk_boundaries[num]
+        else:
+            boundary = self.file['%s/template_boundaries' % self.ifo][num]
+        trigger_id = self.keep + boundary
         return trigger_id
 
     def __getitem__(self, col):
@@ -28,16 +28,29 @@ useful for storing and retrieving data created by a search for gravitationa
 waves.
 """
 
-import types, re, copy, numpy, inspect
+import types, re, copy, numpy, inspect, functools
+from collections import ChainMap
 from igwn_ligolw import types as ligolw_types
 from pycbc import coordinates, conversions, cosmology
 from pycbc.population import population_models
 from pycbc.waveform import parameters
 
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
 # what functions are given to the eval in FieldArray's __getitem__:
 _numpy_function_lib = {_x: _y for _x,_y in numpy.__dict__.items()
                        if isinstance(_y, (numpy.ufunc, float))}
 
+# the subset of those that numexpr evaluates the same way
+_numexpr_function_lib = frozenset([
+    'where', 'sin', 'cos', 'tan', 'arcsin', 'arccos', 'arctan', 'arctan2',
+    'sinh', 'cosh', 'tanh', 'arcsinh', 'arccosh', 'arctanh', 'log', 'log10',
+    'log1p', 'exp', 'expm1', 'sqrt', 'abs', 'conj', 'real', 'imag']) \
+    & set(_numpy_function_lib)
+
 #
 # =============================================================================
 #
@@ -493,6 +506,63 @@ _fieldarray_functionlib = {_funcname : getattr(_mod, _funcname)
                               for _mod in _modules_for_functionlib
                               for _funcname in getattr(_mod, '__all__')}
 
+_evaluation_status = {'fused': False}
+
+def fused_evaluation(true_or_false=None):
+    """Sets whether or not FieldArray should use numexpr to evaluate string
+    expressions of numeric fields, such as ``'mass1*mass2/(mass1+mass2)'``,
+    in one pass without making temporary arrays. Expressions that use
+    anything other than fields and the basic functions that numexpr supports
+    are always evaluated by python. Default is False. If numexpr is not
+    installed, this has no effect. If no argument is provided, just returns
+    the current state.
+    """
+    if true_or_false is not None:
+        _evaluation_status['fused'] = true_or_false
+    return _evaluation_status['fused'] and numexpr is not None
+
+@functools.lru_cache(maxsize=1024)
+def _compile_item(item, dtype):
+    """Compiles a string expression of the fields of an array with the given
+    dtype.
+
+    Returns
+    -------
+    code : code
+        The compiled expression.
+    itemvars : list of str
+        The names that the expression uses, excluding numbers.
+    aliases : dict
+        Maps the names that are aliases of fields of the dtype to the field.
+    fusable : bool
+        Whether numexpr can evaluate the expression, provided that none of
+        the names that are not fields are overridden by the array.
+    """
+    code = compile(item, '<string>', 'eval')
+
+    # parse to get possible fields
+    itemvars = []
+    for it in get_fields_from_arg(item):
+        try:
+            float(it)
+        except ValueError:
+            itemvars.append(it)
+
+    fields = dtype.names or ()
+    aliases = dict(c[0] for c in dtype.descr if isinstance(c[0], tuple))
+    aliases = {it: aliases[it] for it in itemvars
+               if it not in fields and it in aliases}
+    fusable = True
+    for it in itemvars:
+        if it in fields or it in aliases:
+            field_dtype = dtype[aliases.get(it, it)]
+            fusable &= field_dtype.kind in 'biufc' and field_dtype.shape == ()
+        else:
+            fusable &= (it in _numexpr_function_lib or
+                        isinstance(_numpy_function_lib.get(it), float))
+    fusable &= any(it in fields or it in aliases for it in itemvars)
+    return code, itemvars, aliases, fusable
+
 class FieldArray(numpy.recarray):
     """
     Subclass of numpy.recarray that adds additional functionality.
@@ -881,54 +951,40 @@ class FieldArray(numpy.recarray):
             #
             #   arg isn't a simple argument of row, so we'll have to eval it
             #
-            if not hasattr(self, '_code_cache'):
-                self._code_cache = {}
-
-            if item not in self._code_cache:
-                code = compile(item, '<string>', 'eval')
-
-                # get the function library
-                item_dict = dict(_numpy_function_lib.items())
-                item_dict.update(self._functionlib)
-
-                # parse to get possible fields
-                itemvars_raw = get_fields_from_arg(item)
-
-                itemvars = []
-                for it in itemvars_raw:
-                    try:
-                        float(it)
-                        is_num = True
-                    except ValueError:
-                        is_num = False
-
-                    if not is_num:
-                        itemvars.append(it)
-
-                self._code_cache[item] = (code, itemvars, item_dict)
-
-            code, itemvars, item_dict = self._code_cache[item]
+            code, itemvars, aliases, fusable = _compile_item(item, self.dtype)
+            fieldnames = self.fieldnames
             added = {}
             for it in itemvars:
-                if it in self.fieldnames:
+                if it in fieldnames:
                     # pull out the fields: note, by getting the parent fields
                     # we also get the sub fields name
                     added[it] = self.__getbaseitem__(it)
                 elif (it in self.__dict__) or (it in self._virtualfields):
                     # pull out any needed attributes
                     added[it] = self.__getattribute__(it, no_fallback=True)
-                else:
+                    fusable = False
+                elif it in aliases:
                     # add any aliases
-                    aliases = self.aliases
-                    if it in aliases:
-                        added[it] = self.__getbaseitem__(aliases[it])
-            if item_dict is not None:
-                item_dict.update(added)
-
-            ans = eval(code, {"__builtins__": None}, item_dict)
-            for k in added:
-                item_dict.pop(k)
-            return ans
+                    added[it] = self.__getbaseitem__(aliases[it])
+                elif it in self._functionlib:
+                    fusable = False
+
+            if fusable and self.ndim and fused_evaluation():
+                constants = {it: _numpy_function_lib[it] for it in itemvars
+                             if it not in added and
+                             it not in _numexpr_function_lib}
+                constants.update(added)
+                try:
+                    return numexpr.evaluate(item, local_dict=constants,
+                                            global_dict={})
+                except Exception:
+                    # numexpr does not support everything python does
+                    # (e.g., some dtypes and operators), so fall back to eval
+                    pass
+
+            item_dict = ChainMap(added, self._functionlib,
+                                 _numpy_function_lib)
+            return eval(code, {"__builtins__": None}, item_dict)
 
     def __contains__(self, field):
         """Returns True if the given field name is in self's fields."""
@@ -7,6 +7,9 @@ import types
 import signal
 import atexit
 import logging
+import secrets
+import numpy
+from multiprocessing import shared_memory, resource_tracker
 
 logger = logging.getLogger('pycbc.pool')
 
@@ -28,39 +31,187 @@ def _noint(init, *args):
     if init is not None:
         return init(*args)
 
-_process_lock = None
-_numdone = None
+_barrier = None
+def _broadcast_init(barrier, init, *args):
+    """ Worker initializer which stores the barrier used by broadcasts """
+    global _barrier
+    _barrier = barrier
+    return _noint(init, *args)
+
 def _lockstep_fcn(values):
     """ Wrapper to ensure that all processes execute together """
-    numrequired, fcn, args = values
-    with _process_lock:
-        _numdone.value += 1
-    # yep this is an ugly busy loop, do something better please
-    # when we care about the performance of this call and not just the
-    # guarantee it provides (ok... maybe never)
-    while 1:
-        if _numdone.value == numrequired:
-            return fcn(args)
+    fcn, args = values
+    # Block (without spinning) until every worker holds one of the calls,
+    # so that no worker can pick up two of them
+    _barrier.wait()
+    return fcn(args)
 
 def _shutdown_pool(p):
     p.terminate()
     p.join()
 
+
+class _SharedArray(object):
+    """ Placeholder for a numpy array stored in a shared memory segment """
+    def __init__(self, offset, shape, dtype):
+        self.offset = offset
+        self.shape = shape
+        self.dtype = dtype
+
+
+class _SharedPayload(object):
+    """ An object whose numpy arrays have been moved to shared memory
+
+    Parameters
+    ----------
+    obj: object
+        The object to send. Numpy arrays found within (nested) dicts, lists
+        and tuples are copied into a single shared memory segment and
+        replaced by descriptors, so that only those need to be pickled.
+    threshold: int
+        If the arrays take fewer bytes than this in total, the object is
+        left as is and pickled normally.
+    name: str, optional
+        The name of the shared memory segment to create. Defaults to a
+        random name.
+    """
+    alignment = 64
+
+    def __init__(self, obj, threshold=0, name=None):
+        arrays = []
+        self.name = None
+        self.obj = self._collect(obj, arrays)
+        nbytes = sum(a.nbytes for _, a in arrays)
+        if not arrays or nbytes < threshold:
+            self.obj = obj
+            return
+
+        shm = shared_memory.SharedMemory(name=name, create=True,
+                                         size=max(nbytes, 1)
+                                         + self.alignment * len(arrays))
+        try:
+            for ref, arr in arrays:
+                numpy.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf,
+                              offset=ref.offset)[...] = arr
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        self.name = shm.name
+        shm.close()
+
+    def _collect(self, obj, arrays):
+        if isinstance(obj, dict):
+            return {k: self._collect(v, arrays) for k, v in obj.items()}
+        if type(obj) in (list, tuple):
+            return type(obj)(self._collect(v, arrays) for v in obj)
+        if type(obj) is numpy.ndarray and not obj.dtype.hasobject:
+            offset = 0
+            if arrays:
+                last_ref, last = arrays[-1]
+                offset = last_ref.offset + last.nbytes
+                offset += -offset % self.alignment
+            ref = _SharedArray(offset, obj.shape, obj.dtype)
+            arrays.append((ref, obj))
+            return ref
+        return obj
+
+    def _restore(self, obj, buf, copy):
+        if isinstance(obj, dict):
+            return {k: self._restore(v, buf, copy) for k, v in obj.items()}
+        if type(obj) in (list, tuple):
+            return type(obj)(self._restore(v, buf, copy) for v in obj)
+        if isinstance(obj, _SharedArray):
+            arr = numpy.ndarray(obj.shape, dtype=obj.dtype, buffer=buf,
+                                offset=obj.offset)
+            if copy:
+                return arr.copy()
+            arr.flags.writeable = False
+            return arr
+        return obj
+
+    def load(self, copy=False):
+        """ Rebuild the object
+
+        Parameters
+        ----------
+        copy: bool
+            If True, arrays are copied out of shared memory and the segment
+            is removed. Otherwise they are read-only views of the segment.
+        """
+        if self.name is None:
+            return self.obj
+        shm = shared_memory.SharedMemory(name=self.name)
+        obj = self._restore(self.obj, shm.buf, copy)
+        if copy:
+            shm.close()
+            shm.unlink()
+        else:
+            _attached.append(shm)
+        return obj
+
+    def unlink(self):
+        """ Remove the shared memory segment """
+        if self.name is not None:
+            _unlink_segment(self.name)
+
+
+def _unlink_segment(name):
+    """ Remove a shared memory segment, if it exists """
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+# Segments attached by a worker, closed once nothing refers to them anymore
+_attached = []
+def _release_attached():
+    for shm in list(_attached):
+        try:
+            shm.close()
+            _attached.remove(shm)
+        except BufferError:
+            # Arrays still refer to this segment
+            pass
+
+def _shared_fcn(values):
+    """ Wrapper which passes arguments and results through shared memory """
+    fcn, payload, threshold, result_name = values
+    _release_attached()
+    result = fcn(payload.load())
+    return _SharedPayload(result, threshold, name=result_name)
+
 class BroadcastPool(multiprocessing.pool.Pool):
     """ Multiprocessing pool with a broadcast method
+
+    Parameters
+    ----------
+    shared_memory_threshold: int, optional
+        If given, numpy arrays in the arguments and results of `map`,
+        `broadcast` and `allmap` are passed through shared memory rather
+        than being pickled, whenever they add up to at least this many
+        bytes. Workers then receive read-only views of the arrays, and
+        a broadcast argument is only copied once for all workers.
     """
     def __init__(self, processes=None, initializer=None, initargs=(),
-                 context=None, **kwds):
-        global _process_lock
-        global _numdone
-        _process_lock = multiprocessing.Lock()
-        _numdone = multiprocessing.Value('i', 0)
-        noint = functools.partial(_noint, initializer)
-
+                 context=None, shared_memory_threshold=None, **kwds):
+        self.shared_memory_threshold = shared_memory_threshold
         # Default is fork to preserve child memory inheritance and
         # copy on write
         if context is None:
             context = get_context("fork")
+        if processes is None:
+            processes = cpu_count()
+        barrier = context.Barrier(processes)
+        if shared_memory_threshold is not None:
+            # Workers must share the tracker of the shared memory segments,
+            # as these are created and removed by different processes
+            resource_tracker.ensure_running()
+        noint = functools.partial(_broadcast_init, barrier, initializer)
+
         super(BroadcastPool, self).__init__(processes, noint, initargs,
                                             context=context, **kwds)
         atexit.register(_shutdown_pool, self)
@@ -78,9 +229,7 @@ class BroadcastPool(multiprocessing.pool.Pool):
         args: tuple
             The arguments for Pool.map
         """
-        results = self.map(_lockstep_fcn, [(len(self), fcn, args)] * len(self))
-        _numdone.value = 0
-        return results
+        return self.map(_lockstep_fcn, [(fcn, args)] * len(self))
 
     def allmap(self, fcn, args):
         """ Do a function call on every worker with different arguments
@@ -92,10 +241,7 @@ class BroadcastPool(multiprocessing.pool.Pool):
         args: tuple
             The arguments for Pool.map
         """
-        results = self.map(_lockstep_fcn,
-                           [(len(self), fcn, arg) for arg in args])
-        _numdone.value = 0
-        return results
+        return self.map(_lockstep_fcn, [(fcn, arg) for arg in args])
 
     def map(self, func, items, chunksize=None):
         """ Catch keyboard interrupts to allow the pool to exit cleanly.
@@ -109,6 +255,9 @@ class BroadcastPool(multiprocessing.pool.Pool):
         chunksize: int, Optional
             Number of calls for each process to handle at once
         """
+        if self.shared_memory_threshold is not None:
+            return self._shared_map(func, items, chunksize)
+
         results = self.map_async(func, items, chunksize)
         while True:
             try:
@@ -120,6 +269,44 @@ class BroadcastPool(multiprocessing.pool.Pool):
                 self.join()
                 raise KeyboardInterrupt
 
+    def _shared_map(self, func, items, chunksize=None):
+        """ Map passing arrays through shared memory, see `map` """
+        threshold = self.shared_memory_threshold
+        # Identical items, as in a broadcast, share one segment
+        payloads = {}
+        for item in items:
+            if id(item) not in payloads:
+                payloads[id(item)] = (item, _SharedPayload(item, threshold))
+        # The results are stored in segments named here, so that those
+        # already made can be removed if any call fails
+        prefix = 'psm_{}_'.format(secrets.token_hex(4))
+        result_names = [prefix + str(i) for i in range(len(items))]
+        try:
+            results = self.map_async(
+                _shared_fcn,
+                [(func, payloads[id(item)][1], threshold, name)
+                 for item, name in zip(items, result_names)],
+                chunksize
+            )
+            while True:
+                try:
+                    results = results.get(1800)
+                    break
+                except TimeoutError:
+                    pass
+                except KeyboardInterrupt:
+                    self.terminate()
+                    self.join()
+                    raise KeyboardInterrupt
+        except BaseException:
+            for name in result_names:
+                _unlink_segment(name)
+            raise
+        finally:
+            for _, payload in payloads.values():
+                payload.unlink()
+        return [r.load(copy=True) for r in results]
+
     def close_pool(self):
         """ Close the pool and remove the reference
         """
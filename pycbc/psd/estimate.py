@@ -32,6 +32,10 @@ USE_CACHING_FOR_INV_SPEC_TRUNC = False
 WELCH_UNIQUE_ID = 438716587
 INVSPECTRUNC_UNIQUE_ID = 100257896
 
+_WINDOW_MAP = {
+    'hann': numpy.hanning
+}
+
 def median_bias(n):
     """Calculate the bias of the median average PSD computed from `n` segments.
 
@@ -97,27 +101,8 @@ def welch(timeseries, seg_len=4096, seg_stride=2048, window='hann',
     -----
     See arXiv:gr-qc/0509116 for details.
     """
-    from pycbc.strain.strain import execute_cached_fft
-
-    window_map = {
-        'hann': numpy.hanning
-    }
-
     # sanity checks
-    if isinstance(window, numpy.ndarray) and window.size != seg_len:
-        raise ValueError('Invalid window: incorrect window length')
-    if not isinstance(window, numpy.ndarray) and window not in window_map:
-        raise ValueError('Invalid window: unknown window {!r}'.format(window))
-    if avg_method not in ('mean', 'median', 'median-mean'):
-        raise ValueError('Invalid averaging method')
-    if type(seg_len) is not int or type(seg_stride) is not int \
-        or seg_len <= 0 or seg_stride <= 0:
-        raise ValueError('Segment length and stride must be positive integers')
-
-    if timeseries.precision == 'single':
-        fs_dtype = numpy.complex64
-    elif timeseries.precision == 'double':
-        fs_dtype = numpy.complex128
+    _check_welch_args(seg_len, seg_stride, window, avg_method)
 
     num_samples = len(timeseries)
     if num_segments is None:
@@ -148,18 +133,11 @@ def welch(timeseries, seg_len=4096, seg_stride=2048, window='hann',
     if num_samples != (num_segments - 1) * seg_stride + seg_len:
         raise ValueError('Incorrect choice of segmentation parameters')
 
-    if not isinstance(window, numpy.ndarray):
-        window = window_map[window](seg_len)
-    w = Array(window.astype(timeseries.dtype))
+    w = _welch_window(window, seg_len, timeseries.dtype)
 
     # calculate psd of each segment
     delta_f = 1. / timeseries.delta_t / seg_len
-    if not USE_CACHING_FOR_WELCH_FFTS:
-        segment_tilde = FrequencySeries(
-            numpy.zeros(int(seg_len / 2 + 1)),
-            delta_f=delta_f,
-            dtype=fs_dtype,
-        )
+    segment_tilde = _segment_tilde(seg_len, delta_f, timeseries.precision)
 
     segment_psds = []
     for i in range(num_segments):
@@ -167,21 +145,71 @@ def welch(timeseries, seg_len=4096, seg_stride=2048, window='hann',
         segment_end = segment_start + seg_len
         segment = timeseries[segment_start:segment_end]
         assert len(segment) == seg_len
-        if not USE_CACHING_FOR_WELCH_FFTS:
-            fft(segment * w, segment_tilde)
-        else:
-            segment_tilde = execute_cached_fft(segment * w,
-                                               uid=WELCH_UNIQUE_ID)
-        seg_psd = abs(segment_tilde * segment_tilde.conj()).numpy()
+        segment_psds.append(_segment_psd(segment, w, segment_tilde))
 
-        #halve the DC and Nyquist components to be consistent with TO10095
-        seg_psd[0] /= 2
-        seg_psd[-1] /= 2
+    segment_psds = numpy.array(segment_psds)
 
-        segment_psds.append(seg_psd)
+    return _average_segment_psds(segment_psds, avg_method, w, delta_f,
+                                 timeseries.dtype, timeseries.start_time)
 
-    segment_psds = numpy.array(segment_psds)
+def _check_welch_args(seg_len, seg_stride, window, avg_method):
+    """Raise a ValueError for invalid Welch segmentation, window or averaging
+    choices.
+    """
+    if isinstance(window, numpy.ndarray) and window.size != seg_len:
+        raise ValueError('Invalid window: incorrect window length')
+    if not isinstance(window, numpy.ndarray) and window not in _WINDOW_MAP:
+        raise ValueError('Invalid window: unknown window {!r}'.format(window))
+    if avg_method not in ('mean', 'median', 'median-mean'):
+        raise ValueError('Invalid averaging method')
+    if type(seg_len) is not int or type(seg_stride) is not int \
+        or seg_len <= 0 or seg_stride <= 0:
+        raise ValueError('Segment length and stride must be positive integers')
+
+def _welch_window(window, seg_len, dtype):
+    """Return the window applied to each Welch segment as an Array."""
+    if not isinstance(window, numpy.ndarray):
+        window = _WINDOW_MAP[window](seg_len)
+    return Array(window.astype(dtype))
+
+def _segment_tilde(seg_len, delta_f, precision):
+    """Return the output vector for the FFT of a Welch segment, or None if
+    the FFTs are cached.
+    """
+    if USE_CACHING_FOR_WELCH_FFTS:
+        return None
+    if precision == 'single':
+        fs_dtype = numpy.complex64
+    elif precision == 'double':
+        fs_dtype = numpy.complex128
+    return FrequencySeries(
+        numpy.zeros(int(seg_len / 2 + 1)),
+        delta_f=delta_f,
+        dtype=fs_dtype,
+    )
+
+def _segment_psd(segment, w, segment_tilde):
+    """Return the periodogram of a single windowed Welch segment."""
+    from pycbc.strain.strain import execute_cached_fft
 
+    if not USE_CACHING_FOR_WELCH_FFTS:
+        fft(segment * w, segment_tilde)
+    else:
+        segment_tilde = execute_cached_fft(segment * w,
+                                           uid=WELCH_UNIQUE_ID)
+    seg_psd = abs(segment_tilde * segment_tilde.conj()).numpy()
+
+    #halve the DC and Nyquist components to be consistent with TO10095
+    seg_psd[0] /= 2
+    seg_psd[-1] /= 2
+    return seg_psd
+
+def _average_segment_psds(segment_psds, avg_method, w, delta_f, dtype,
+                          epoch):
+    """Average the periodograms of the Welch segments, given in time order,
+    into a normalized PSD.
+    """
+    num_segments = len(segment_psds)
     if avg_method == 'mean':
         psd = numpy.mean(segment_psds, axis=0)
     elif avg_method == 'median':
@@ -196,10 +224,114 @@ def welch(timeseries, seg_len=4096, seg_stride=2048, window='hann',
         psd = (odd_median + even_median) / 2
 
     w = w.numpy()
-    psd *= 2 * delta_f * seg_len / (w*w).sum()
+    psd *= 2 * delta_f * len(w) / (w*w).sum()
+
+    return FrequencySeries(psd, delta_f=delta_f, dtype=dtype, epoch=epoch)
+
+class StreamingWelch(object):
+    """Welch PSD estimator for a stream of data, which reuses the periodograms
+    of the segments transformed by previous estimates.
 
-    return FrequencySeries(psd, delta_f=delta_f, dtype=timeseries.dtype,
-                           epoch=timeseries.start_time)
+    Each call estimates the PSD of the given time series exactly as
+    :py:func:`welch` would. The periodogram of each segment is kept in a ring,
+    together with a copy of the data it was computed from and keyed by the
+    GPS sample at which the segment starts. When the series has moved forward
+    by a multiple of the segment stride since the last call, only the
+    segments which are new, or whose data has changed since (e.g. through
+    gating), are Fourier transformed again.
+
+    Parameters
+    ----------
+    seg_len : int
+        Segment length in samples.
+    seg_stride : int
+        Separation between consecutive segments, in samples.
+    window : {'hann', numpy.ndarray}
+        Function used to window segments before Fourier transforming, or
+        a `numpy.ndarray` that specifies the window.
+    avg_method : {'median', 'mean', 'median-mean'}
+        Method used for averaging individual segment PSDs.
+    """
+    def __init__(self, seg_len, seg_stride, window='hann',
+                 avg_method='median'):
+        _check_welch_args(seg_len, seg_stride, window, avg_method)
+        self.seg_len = seg_len
+        self.seg_stride = seg_stride
+        self.window = window
+        self.avg_method = avg_method
+        self.reset()
+
+    def reset(self):
+        """Forget the periodograms of all the segments."""
+        self._layout = None
+        self._slots = {}
+        self.num_computed = 0
+
+    def __call__(self, timeseries):
+        """Estimate the PSD of a time series.
+
+        Parameters
+        ----------
+        timeseries : TimeSeries
+            Time series for which the PSD is to be estimated. Its length must
+            be the segment length plus a whole number of strides.
+
+        Returns
+        -------
+        psd : FrequencySeries
+            The PSD which :py:func:`welch` returns for this time series.
+        """
+        seg_len = self.seg_len
+        seg_stride = self.seg_stride
+        num_samples = len(timeseries)
+        num_segments = (num_samples - seg_len) // seg_stride + 1
+        if num_segments < 1 or \
+                num_samples != (num_segments - 1) * seg_stride + seg_len:
+            raise ValueError('Incorrect choice of segmentation parameters')
+
+        layout = (num_segments, float(timeseries.delta_t), timeseries.dtype)
+        if layout != self._layout:
+            self.reset()
+            self._layout = layout
+            self._w = _welch_window(self.window, seg_len, timeseries.dtype)
+            self._delta_f = 1. / timeseries.delta_t / seg_len
+            self._tilde = _segment_tilde(seg_len, self._delta_f,
+                                         timeseries.precision)
+            self._data = numpy.zeros((num_segments, seg_len),
+                                     dtype=timeseries.dtype)
+            self._psds = numpy.zeros((num_segments, seg_len // 2 + 1),
+                                     dtype=timeseries.dtype)
+
+        # The GPS sample index at which each segment starts identifies it
+        # across calls
+        first = int(round(float(timeseries.start_time)
+                          * timeseries.sample_rate))
+        keys = [first + i * seg_stride for i in range(num_segments)]
+        slots = {k: self._slots[k] for k in keys if k in self._slots}
+        used = set(slots.values())
+        free = [i for i in range(num_segments) if i not in used]
+
+        data = timeseries.numpy()
+        order = []
+        for i, key in enumerate(keys):
+            segment_start = i * seg_stride
+            segment_end = segment_start + seg_len
+            slot = slots.get(key)
+            if slot is None or not numpy.array_equal(
+                    data[segment_start:segment_end], self._data[slot]):
+                if slot is None:
+                    slot = slots[key] = free.pop()
+                self._data[slot] = data[segment_start:segment_end]
+                self._psds[slot] = _segment_psd(
+                    timeseries[segment_start:segment_end], self._w,
+                    self._tilde)
+                self.num_computed += 1
+            order.append(slot)
+        self._slots = slots
+
+        return _average_segment_psds(self._psds[order], self.avg_method,
+                                     self._w, self._delta_f, timeseries.dtype,
+                                     timeseries.start_time)
 
 def inverse_spectrum_truncation(psd, max_filter_len, which_spectrum='invasd',
                                 low_frequency_cutoff=None, 
@@ -219,18 +219,20 @@ def from_cli(opt, dyn_range_fac=1, precision='single',
         else:
             sieve = None
 
+        nthreads = getattr(opt, 'frame_read_threads', None) or 1
+
         if opt.frame_type:
             strain = pycbc.frame.query_and_read_frame(
                     opt.frame_type, opt.channel_name,
                     start_time=opt.gps_start_time-opt.pad_data,
                     end_time=opt.gps_end_time+opt.pad_data,
-                    sieve=sieve)
+                    sieve=sieve, nthreads=nthreads)
         elif opt.frame_files or opt.frame_cache:
             strain = pycbc.frame.read_frame(
                     frame_source, opt.channel_name,
                     start_time=opt.gps_start_time-opt.pad_data,
                     end_time=opt.gps_end_time+opt.pad_data,
-                    sieve=sieve)
+                    sieve=sieve, nthreads=nthreads)
         elif opt.hdf_store:
             strain = pycbc.frame.read_store(opt.hdf_store, opt.channel_name,
                                             opt.gps_start_time - opt.pad_data,
@@ -548,6 +550,11 @@ def insert_strain_option_group(parser, gps_times=True):
                             type=str,
                             help="(optional), Only use frame files where the "
                                  "URL matches the regular expression given.")
+    data_reading_group.add_argument("--frame-read-threads", type=int,
+                            default=1,
+                            help="(optional), Number of threads with which "
+                                 "to read the frame files concurrently. "
+                                 "Default 1.")
 
     # Generate gaussian noise with given psd
     data_reading_group.add_argument("--fake-strain",
@@ -774,6 +781,13 @@ def insert_strain_option_group_multi_ifo(parser, gps_times=True):
                             metavar='IFO:FRAME_SIEVE',
                             help="(optional), Only use frame files where the "
                                  "URL matches the regular expression given.")
+    data_reading_group_multi.add_argument("--frame-read-threads", type=int,
+                            nargs="+", default=1,
+                            action=MultiDetOptionAction,
+                            metavar='IFO:NUM_THREADS',
+                            help="(optional), Number of threads with which "
+                                 "to read the frame files concurrently. "
+                                 "Default 1.")
     # Generate gaussian noise with given psd
     data_reading_group_multi.add_argument("--fake-strain", type=str, nargs="+",
                             action=MultiDetOptionAction, metavar='IFO:CHOICE',
@@ -1537,7 +1551,8 @@ class StrainBuffer(pycbc.frame.DataBuffer):
                  increment_update_cache=None,
                  analyze_flags=None,
                  data_quality_flags=None,
-                 dq_padding=0):
+                 dq_padding=0,
+                 read_ahead=False):
         """ Class to produce overwhitened strain incrementally
 
         Parameters
@@ -1621,11 +1636,15 @@ class StrainBuffer(pycbc.frame.DataBuffer):
             is an alternate to the forced updated of the frame cache, and
             apptempts to predict the next frame file name without probing the
             filesystem.
+        read_ahead: {boolean, False}, Optional
+            Wait for and read the next strain frame in a background thread
+            while the current block is being analyzed.
         """
         super(StrainBuffer, self).__init__(frame_src, channel_name, start_time,
                                            max_buffer=max_buffer,
                                            force_update_cache=force_update_cache,
-                                           increment_update_cache=increment_update_cache)
+                                           increment_update_cache=increment_update_cache,
+                                           read_ahead=read_ahead)
 
         self.low_frequency_cutoff = low_frequency_cutoff
 
@@ -1711,6 +1730,9 @@ class StrainBuffer(pycbc.frame.DataBuffer):
         self.psd_inverse_length = psd_inverse_length
         self.psd = None
         self.psds = {}
+        psd_seg_len = int(self.sample_rate * self.psd_segment_length)
+        self.psd_estimator = pycbc.psd.StreamingWelch(psd_seg_len,
+                                                      psd_seg_len // 2)
 
         strain_len = int(max_buffer * self.sample_rate)
         self.strain = TimeSeries(zeros(strain_len, dtype=numpy.float32),
@@ -1774,7 +1796,9 @@ class StrainBuffer(pycbc.frame.DataBuffer):
         seg_len = int(self.sample_rate * self.psd_segment_length)
         e = len(self.strain)
         s = e - (self.psd_samples + 1) * seg_len // 2
-        psd = pycbc.psd.welch(self.strain[s:e], seg_len=seg_len, seg_stride=seg_len//2)
+        # Equivalent to pycbc.psd.welch, but only transforms the segments
+        # which have changed since the last estimate
+        psd = self.psd_estimator(self.strain[s:e])
 
         psd.dist = spa_distance(psd, 1.4, 1.4, self.low_frequency_cutoff) * pycbc.DYN_RANGE_FAC
 
@@ -2107,5 +2131,6 @@ class StrainBuffer(pycbc.frame.DataBuffer):
             increment_update_cache=args.increment_update_cache[ifo],
             analyze_flags=analyze_flags,
             data_quality_flags=dq_flags,
-            dq_padding=args.data_quality_padding
+            dq_padding=args.data_quality_padding,
+            read_ahead=getattr(args, 'frame_read_ahead', False)
         )
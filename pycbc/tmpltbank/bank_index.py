@@ -0,0 +1,144 @@
+# Copyright (C) 2026 The PyCBC development team
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+This module provides an index of the templates of a bank which is being
+built, to find the templates that may match a proposed one without scanning
+the whole bank.
+"""
+
+import itertools
+import numpy
+
+__all__ = ['TemplateBankIndex']
+
+
+class TemplateBankIndex(object):
+    """
+    Grid of the templates of a bank over their chirp time tau0 and their
+    sigma.
+
+    Templates are binned in tau0 with bins of a given width, and in log sigma
+    with bins as wide as the largest ratio of sigmas for which two templates
+    can match better than a given match. The templates which may match a
+    proposed one are then found in the neighbouring cells of its own, in
+    time that depends on the number of templates near it rather than on the
+    size of the bank.
+
+    Parameters
+    ----------
+    tau0_width : float, optional
+        Width of the tau0 bins. Templates are candidates for a query if their
+        tau0 bin, ``int(tau0 / tau0_width)``, is at most one away from the
+        query's. If not given, tau0 is not used.
+    sigma_ratio : float, optional
+        Templates are candidates for a query only if the ratio of the
+        smaller to the larger of their sigma and the query's, which bounds
+        the match between them, is greater than this. Must be between 0 and
+        1. If not given, sigma is not used.
+    """
+    def __init__(self, tau0_width=None, sigma_ratio=None):
+        if sigma_ratio is not None and not 0 < sigma_ratio < 1:
+            raise ValueError("sigma_ratio must be between 0 and 1, "
+                             "got {}".format(sigma_ratio))
+        self.tau0_width = tau0_width
+        self.sigma_ratio = sigma_ratio
+        if sigma_ratio is not None:
+            # Slightly wider than the largest log sigma difference allowed,
+            # so that all candidates are at most one bin away despite
+            # rounding
+            self._log_sigma_width = -numpy.log(sigma_ratio) * (1 + 1e-6)
+        self.cells = {}
+        self.size = 0
+        self._sigma = numpy.zeros(16)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def sigma(self):
+        """ The sigma of each template in the index """
+        return self._sigma[:self.size]
+
+    def _cell(self, tau0, sigma):
+        tbin = sbin = 0
+        if self.tau0_width is not None:
+            tbin = int(tau0 / self.tau0_width)
+        if self.sigma_ratio is not None:
+            sbin = int(numpy.floor(numpy.log(sigma) / self._log_sigma_width))
+        return tbin, sbin
+
+    def insert(self, tau0=None, sigma=None):
+        """ Add a template to the index.
+
+        Parameters
+        ----------
+        tau0 : float, optional
+            The chirp time of the template. Required if the index has a
+            ``tau0_width``.
+        sigma : float, optional
+            The sigma of the template. Required if the index has a
+            ``sigma_ratio``.
+
+        Returns
+        -------
+        int
+            The index of the template, which is the number of templates
+            inserted before it.
+        """
+        index = self.size
+        if index == len(self._sigma):
+            self._sigma = numpy.resize(self._sigma, 2 * len(self._sigma))
+        self._sigma[index] = numpy.nan if sigma is None else sigma
+        self.cells.setdefault(self._cell(tau0, sigma), []).append(index)
+        self.size += 1
+        return index
+
+    def sigma_match_bound(self, sigma, indices):
+        """ The upper bound on the match between a template with the given
+        sigma and the templates with the given indices.
+        """
+        sig = self._sigma[indices]
+        return numpy.minimum(sigma / sig, sig / sigma)
+
+    def query(self, tau0=None, sigma=None):
+        """ Find the templates which may match a proposed template.
+
+        Parameters
+        ----------
+        tau0 : float, optional
+            The chirp time of the proposed template.
+        sigma : float, optional
+            The sigma of the proposed template.
+
+        Returns
+        -------
+        numpy.ndarray
+            The sorted indices of the templates whose tau0 bin is at most one
+            away from the proposed template's, and whose sigma match bound
+            with it is greater than ``sigma_ratio``.
+        """
+        tbin, sbin = self._cell(tau0, sigma)
+        tbins = (0,) if self.tau0_width is None else (-1, 0, 1)
+        sbins = (0,) if self.sigma_ratio is None else (-1, 0, 1)
+        found = [self.cells.get((tbin + i, sbin + j), ())
+                 for i in tbins for j in sbins]
+        indices = numpy.fromiter(itertools.chain(*found), dtype=int,
+                                 count=sum(len(f) for f in found))
+        indices.sort()
+        if self.sigma_ratio is not None:
+            bound = self.sigma_match_bound(sigma, indices)
+            indices = indices[bound > self.sigma_ratio]
+        return indices
@@ -43,6 +43,10 @@ class SkyGrid:
         self.positions = np.vstack([ra, dec]).T
         self.detectors = sorted(detectors)
         self.ref_gps_time = ref_gps_time
+        # Antenna patterns and time delays of each detector at each point,
+        # computed when first needed
+        self._antenna_patterns = {}
+        self._time_delays = {}
 
     def __len__(self):
         """Returns the number of points in the sky grid."""
@@ -89,57 +93,93 @@ class SkyGrid:
 
     @classmethod
     def read_from_file(cls, path):
-        """Initialize a sky grid from a given HDF5 file."""
+        """Initialize a sky grid from a given HDF5 file, including any
+        antenna pattern and time delay tables stored in it.
+        """
         with h5py.File(path, 'r') as hf:
             ra = hf['ra'][:]
             dec = hf['dec'][:]
             detectors = hf.attrs['detectors']
             ref_gps_time = hf.attrs['ref_gps_time']
-        return cls(ra, dec, detectors, ref_gps_time)
+            sky_grid = cls(ra, dec, detectors, ref_gps_time)
+            for det_name in hf.get('antenna_patterns', {}):
+                sky_grid._antenna_patterns[det_name] = \
+                    hf['antenna_patterns'][det_name][:]
+            for det_name in hf.get('time_delays', {}):
+                sky_grid._time_delays[det_name] = \
+                    hf['time_delays'][det_name][:]
+        return sky_grid
 
     def write_to_file(self, path, extra_attrs=None, extra_datasets=None):
-        """Writes a sky grid to an HDF5 file."""
+        """Writes a sky grid to an HDF5 file, together with the antenna
+        pattern and time delay tables of its detectors and of any other
+        detectors computed so far. Both tables are written for the same
+        detectors.
+        """
+        detectors = sorted(set(self.detectors) | set(self._antenna_patterns)
+                           | set(self._time_delays))
+        antenna_patterns = self.calculate_antenna_patterns(detectors)
+        time_delays = self.calculate_time_delays(detectors)
         with h5py.File(path, 'w') as hf:
             hf['ra'] = self.ras
             hf['dec'] = self.decs
             hf.attrs['detectors'] = self.detectors
             hf.attrs['ref_gps_time'] = self.ref_gps_time
+            for det_name in antenna_patterns:
+                hf['antenna_patterns/' + det_name] = \
+                    antenna_patterns[det_name]
+            for det_name in time_delays:
+                hf['time_delays/' + det_name] = time_delays[det_name]
             for attribute in (extra_attrs or {}):
                 hf.attrs[attribute] = extra_attrs[attribute]
             for dataset in (extra_datasets or {}):
                 hf[dataset] = extra_datasets[dataset]
 
-    def calculate_antenna_patterns(self):
+    def calculate_antenna_patterns(self, detectors=None):
         """Calculate the antenna pattern functions at each point in the grid
-        for the list of GW detectors specified at instantiation. Return a dict,
-        keyed by detector name, whose items are 2-dimensional Numpy arrays.
-        The first dimension of these arrays runs over the sky grid, and the
-        second dimension runs over the plus and cross polarizations.
+        for the list of GW detectors specified at instantiation, or for the
+        given detectors. Return a dict, keyed by detector name, whose items
+        are 2-dimensional Numpy arrays. The first dimension of these arrays
+        runs over the sky grid, and the second dimension runs over the plus
+        and cross polarizations.
+
+        The patterns are computed for the whole grid at once, and kept so
+        that later calls for the same detectors do not compute them again.
         """
         result = {}
-        for det_name in self.detectors:
-            det = Detector(det_name)
-            result[det_name] = np.empty((len(self), 2))
-            for i, (ra, dec) in enumerate(self):
-                result[det_name][i] = det.antenna_pattern(
-                    ra, dec, 0, t_gps=self.ref_gps_time
+        for det_name in (self.detectors if detectors is None else detectors):
+            if det_name not in self._antenna_patterns:
+                det = Detector(det_name)
+                fplus, fcross = det.antenna_pattern(
+                    self.ras, self.decs, 0, t_gps=self.ref_gps_time
                 )
+                self._antenna_patterns[det_name] = np.ascontiguousarray(
+                    np.vstack([fplus, fcross]).T, dtype=np.float64
+                )
+            result[det_name] = self._antenna_patterns[det_name]
         return result
 
-    def calculate_time_delays(self):
+    def calculate_time_delays(self, detectors=None):
         """Calculate the time delays from the Earth center to each GW detector
-        specified at instantiation, for each point in the grid. Return a dict,
-        keyed by detector name, whose items are 1-dimensional Numpy arrays
-        containing the time delays for each sky point.
+        specified at instantiation, or to each of the given detectors, for
+        each point in the grid. Return a dict, keyed by detector name, whose
+        items are 1-dimensional Numpy arrays containing the time delays for
+        each sky point.
+
+        The delays are computed for the whole grid at once, and kept so that
+        later calls for the same detectors do not compute them again.
         """
         result = {}
-        for det_name in self.detectors:
-            det = Detector(det_name)
-            result[det_name] = np.empty(len(self))
-            for i, (ra, dec) in enumerate(self):
-                result[det_name][i] = det.time_delay_from_earth_center(
-                    ra, dec, t_gps=self.ref_gps_time
+        for det_name in (self.detectors if detectors is None else detectors):
+            if det_name not in self._time_delays:
+                det = Detector(det_name)
+                self._time_delays[det_name] = np.ascontiguousarray(
+                    det.time_delay_from_earth_center(
+                        self.ras, self.decs, self.ref_gps_time
+                    ),
+                    dtype=np.float64
                 )
+            result[det_name] = self._time_delays[det_name]
         return result
 
 
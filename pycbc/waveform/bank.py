@@ -41,35 +41,98 @@ import pycbc.io
 from pycbc.io.ligolw import LIGOLWContentHandler
 import hashlib
 import warnings
+import weakref
+
+
+_psd_fingerprints = {}
+_filter_norms = None
+_inverse_psds = None
+
+
+def psd_fingerprint(psd):
+    """ Return a key identifying the contents of a PSD
+
+    The key combines a digest of the PSD values with its frequency step and
+    length. Quantities cached by this key are therefore shared by identical
+    PSDs, and are never picked up by a different PSD which happens to reuse
+    the memory of an old one. The digest is computed once for the lifetime
+    of the PSD object, which must not be modified in place afterwards.
+
+    Parameters
+    ----------
+    psd : FrequencySeries
+        The PSD to identify.
+
+    Returns
+    -------
+    key : str
+        The fingerprint of the PSD.
+    """
+    ref, key = _psd_fingerprints.get(id(psd), (None, None))
+    if ref is None or ref() is not psd:
+        digest = hashlib.sha256(psd.numpy().tobytes()).hexdigest()
+        key = '%s-%r-%i' % (digest, float(psd.delta_f), len(psd))
+        _psd_fingerprints[id(psd)] = (weakref.ref(psd), key)
+        weakref.finalize(psd, _psd_fingerprints.pop, id(psd), None)
+    return key
+
+
+def cached_filter_norm(approximant, psd, f_lower):
+    """ Return the cumulative normalization vector of an approximant
+
+    See `pycbc.waveform.get_waveform_filter_norm`. The vector is cached by
+    the contents of the PSD, see `psd_fingerprint`.
+    """
+    global _filter_norms
+    if _filter_norms is None:
+        from pycbc.opt import LimitedSizeDict
+        _filter_norms = LimitedSizeDict(size_limit=2**5)
+
+    key = (psd_fingerprint(psd), approximant, f_lower)
+    if key not in _filter_norms:
+        _filter_norms[key] = pycbc.waveform.get_waveform_filter_norm(
+            approximant,
+            psd,
+            len(psd),
+            psd.delta_f,
+            f_lower
+        )
+    return _filter_norms[key]
+
+
+def cached_inverse_psd(psd):
+    """ Return the inverse of a PSD, cached by its contents """
+    global _inverse_psds
+    if _inverse_psds is None:
+        from pycbc.opt import LimitedSizeDict
+        _inverse_psds = LimitedSizeDict(size_limit=2**5)
+
+    key = psd_fingerprint(psd)
+    if key not in _inverse_psds:
+        _inverse_psds[key] = 1.0 / psd
+    return _inverse_psds[key]
 
 
 def sigma_cached(self, psd):
     """ Cache sigma calculate for use in tandem with the FilterBank class
+
+    Values are cached by the contents of the PSD, see `psd_fingerprint`.
+    Templates which know the bank they come from take their value from the
+    table of the bank, see `FilterBank.sigmasq_table`.
     """
     if not hasattr(self, '_sigmasq'):
         from pycbc.opt import LimitedSizeDict
         self._sigmasq = LimitedSizeDict(size_limit=2**5)
 
-    key = id(psd)
-    if not hasattr(psd, '_sigma_cached_key'):
-        psd._sigma_cached_key = {}
+    key = psd_fingerprint(psd)
 
-    if key not in self._sigmasq or id(self) not in psd._sigma_cached_key:
-        psd._sigma_cached_key[id(self)] = True
+    if key not in self._sigmasq:
         # If possible, we precalculate the sigmasq vector for all possible waveforms
         if pycbc.waveform.waveform_norm_exists(self.approximant):
-            if not hasattr(psd, 'sigmasq_vec'):
-                psd.sigmasq_vec = {}
-
-            if self.approximant not in psd.sigmasq_vec:
-                psd.sigmasq_vec[self.approximant] = \
-                    pycbc.waveform.get_waveform_filter_norm(
-                        self.approximant,
-                        psd,
-                        len(psd),
-                        psd.delta_f,
-                        self.min_f_lower
-                    )
+            if hasattr(self, 'sigmasq_table'):
+                self._sigmasq[key] = self.sigmasq_table(
+                    psd, self.template_index)[self.template_index]
+                return self._sigmasq[key]
 
             if not hasattr(self, 'sigma_scale'):
                 # Get an amplitude normalization (mass dependant constant norm)
@@ -78,7 +141,8 @@ def sigma_cached(self, psd):
                 amp_norm = 1 if amp_norm is None else amp_norm
                 self.sigma_scale = (DYN_RANGE_FAC * amp_norm) ** 2.0
 
-            curr_sigmasq = psd.sigmasq_vec[self.approximant]
+            curr_sigmasq = cached_filter_norm(self.approximant, psd,
+                                              self.min_f_lower)
 
             kmin = int(self.f_lower / psd.delta_f)
             self._sigmasq[key] = self.sigma_scale * \
@@ -94,10 +158,8 @@ def sigma_cached(self, psd):
                 self.sslice = slice(kmin, kmax)
                 self.sigma_view = self[self.sslice].squared_norm() * 4.0 * self.delta_f
 
-            if not hasattr(psd, 'invsqrt'):
-                psd.invsqrt = 1.0 / psd
-
-            self._sigmasq[key] = self.sigma_view.inner(psd.invsqrt[self.sslice])
+            invsqrt = cached_inverse_psd(psd)
+            self._sigmasq[key] = self.sigma_view.inner(invsqrt[self.sslice])
     return self._sigmasq[key]
 
 
@@ -207,6 +269,36 @@ def tuple_to_hash(tuple_to_be_hashed):
     return np.frombuffer(h.digest(), dtype=int)[0]
 
 
+def read_bank_column(dset, index_range=None):
+    """Read part of a column of a template bank from an hdf file.
+
+    Datasets stored contiguously and uncompressed are memory mapped, so only
+    the pages of the file holding the range are read. Other datasets are
+    read with a hyperslab selection.
+
+    Parameters
+    ----------
+    dset : h5py.Dataset
+        The column to read.
+    index_range : {None, slice}
+        The templates to read. If None, the whole column is read.
+
+    Returns
+    -------
+    numpy.ndarray
+        The values of the column in the range.
+    """
+    if index_range is None:
+        index_range = slice(None)
+    offset = dset.id.get_offset()
+    if (offset is not None and dset.chunks is None and dset.ndim == 1
+            and not dset.dtype.hasobject and dset.dtype.metadata is None):
+        column = np.memmap(dset.file.filename, dtype=dset.dtype, mode='r',
+                           offset=offset, shape=dset.shape)
+        return np.array(column[index_range])
+    return dset[index_range]
+
+
 class TemplateBank(object):
     r"""Class to provide some basic helper functions and information
     about elements of a template bank.
@@ -240,6 +332,10 @@ class TemplateBank(object):
         the file. Note that derived parameters can only be used if the
         needed parameters are in the file; e.g., you cannot use `chi_eff` if
         `spin1z`, `spin2z`, `mass1`, and `mass2` are in the input file.
+    index_range : {None, tuple}
+        Only use the templates from index ``index_range[0]`` up to (but not
+        including) ``index_range[1]`` of the file. Either may be None, as for
+        a slice. Templates are then indexed from the start of this range.
     \**kwds :
         Any additional keyword arguments are stored to the `extra_args`
         attribute.
@@ -248,7 +344,11 @@ class TemplateBank(object):
     ----------
     table : WaveformArray
         An instance of a WaveformArray containing all of the information about
-        the parameters of the bank.
+        the parameters of the bank. For an hdf file, the table is read from
+        the file the first time it is used, and then only for the templates
+        in `index_range`. Contiguous, uncompressed datasets (as written by
+        `write_to_hdf`) are memory mapped, so only the part of the file
+        holding the range is read.
     has_compressed_waveforms : {False, bool}
         True if compressed waveforms are present in the the (hdf) file; False
         otherwise.
@@ -262,24 +362,32 @@ class TemplateBank(object):
         Any extra keyword arguments that were provided on initialization.
     """
     def __init__(self, filename, approximant=None, parameters=None,
-                 **kwds):
+                 index_range=None, **kwds):
         self.has_compressed_waveforms = False
+        self._table = None
+        self._approximant_arg = approximant
+        if index_range is None:
+            index_range = (None, None)
+        self.index_range = slice(*index_range)
         ext = os.path.basename(filename)
         if ext.endswith(('.xml', '.xml.gz', '.xmlgz')):
             self.filehandler = None
             self.indoc = ligolw_utils.load_filename(
                 filename, False, contenthandler=LIGOLWContentHandler)
-            self.table = lsctables.SnglInspiralTable.get_table(self.indoc)
-            self.table = pycbc.io.WaveformArray.from_ligolw_table(self.table,
+            table = lsctables.SnglInspiralTable.get_table(self.indoc)
+            table = pycbc.io.WaveformArray.from_ligolw_table(table,
                 columns=parameters)
 
             # inclination stored in xml alpha3 column
-            names = list(self.table.dtype.names)
+            names = list(table.dtype.names)
             names = tuple([n if n != 'alpha3' else 'inclination' for n in names])
 
             # low frequency cutoff in xml alpha6 column
             names = tuple([n if n!= 'alpha6' else 'f_lower' for n in names])
-            self.table.dtype.names = names
+            table.dtype.names = names
+            self._num_templates = len(table[self.index_range])
+            self._table_columns = None
+            self._table = table[self.index_range]
 
         elif ext.endswith(('hdf', '.h5', '.hdf5')):
             self.indoc = None
@@ -311,34 +419,65 @@ class TemplateBank(object):
                 names=parameters).fieldnames)
             add_fields = list(set(parameters) &
                 (set(fileparams) - set(common_fields)))
-            # load
-            dtype = []
-            data = {}
-            for key in common_fields+add_fields:
-                data[key] = f[key][:]
-                dtype.append((key, data[key].dtype))
+            # the columns are loaded when the table is first used
+            self._table_columns = common_fields + add_fields
             num = f[fileparams[0]].size
-            self.table = pycbc.io.WaveformArray(num, dtype=dtype)
-            for key in data:
-                self.table[key] = data[key]
+            self._num_templates = len(range(num)[self.index_range])
             # add the compressed waveforms, if they exist
             self.has_compressed_waveforms = 'compressed_waveforms' in f
         else:
             raise ValueError("Unsupported template bank file extension %s" %(
                 ext))
 
+        self.extra_args = kwds
+        if self._table is not None:
+            self._finalize_table()
+
+    @property
+    def table(self):
+        """WaveformArray: The parameters of the templates in the bank."""
+        if self._table is None:
+            self._table = self._read_table()
+            self._finalize_table()
+        return self._table
+
+    @table.setter
+    def table(self, value):
+        self._table = value
+
+    def _read_table(self):
+        """Read the columns of the bank from the hdf file, for the templates
+        in the index range only.
+        """
+        logging.info("Reading %s templates of %s", self._num_templates,
+                     self.filehandler.filename)
+        dtype = []
+        data = {}
+        for key in self._table_columns:
+            data[key] = read_bank_column(self.filehandler[key],
+                                         self.index_range)
+            dtype.append((key, data[key].dtype))
+        table = pycbc.io.WaveformArray(self._num_templates, dtype=dtype)
+        for key in data:
+            table[key] = data[key]
+        return table
+
+    def _finalize_table(self):
+        """Apply the approximant given on initialization to the table and
+        make sure it has template hashes.
+        """
         # if approximant is specified, override whatever was in the file
         # (if anything was in the file)
+        approximant = self._approximant_arg
         if approximant is not None:
             # get the approximant for each template
             dtype = h5py.string_dtype(encoding='utf-8')
             apprxs = np.array(self.parse_approximant(approximant),
                               dtype=dtype)
-            if 'approximant' not in self.table.fieldnames:
-                self.table = self.table.add_fields(apprxs, 'approximant')
+            if 'approximant' not in self._table.fieldnames:
+                self._table = self._table.add_fields(apprxs, 'approximant')
             else:
-                self.table['approximant'] = apprxs
-        self.extra_args = kwds
+                self._table['approximant'] = apprxs
         self.ensure_hash()
 
     @property
@@ -457,7 +596,9 @@ class TemplateBank(object):
         return apx
 
     def __len__(self):
-        return len(self.table)
+        if self._table is None:
+            return self._num_templates
+        return len(self._table)
 
     def template_thinning(self, inj_filter_rejector):
         """Remove templates from bank that are far from all injections."""
@@ -695,6 +836,7 @@ class FilterBank(TemplateBank):
                  enable_compressed_waveforms=True,
                  low_frequency_cutoff=None,
                  waveform_decompression_method=None,
+                 sigmasq_cache_dir=None,
                  **kwds):
         self.out = out
         self.dtype = dtype
@@ -707,11 +849,152 @@ class FilterBank(TemplateBank):
         self.max_template_length = max_template_length
         self.enable_compressed_waveforms = enable_compressed_waveforms
         self.waveform_decompression_method = waveform_decompression_method
+        self.sigmasq_cache_dir = sigmasq_cache_dir
+        from pycbc.opt import LimitedSizeDict
+        self._sigmasq_tables = LimitedSizeDict(size_limit=2**6)
 
         super(FilterBank, self).__init__(filename, approximant=approximant,
             parameters=parameters, **kwds)
         self.ensure_standard_filter_columns(low_frequency_cutoff=low_frequency_cutoff)
 
+    def sigmasq_table(self, psd, indices=None):
+        """Return the normalization of the templates in the bank.
+
+        Templates are normalized from the cumulative normalization vector
+        of their approximant, only once they are asked for. This gives the
+        same values as the `sigmasq` method of the templates returned by
+        this bank, for approximants which have such a vector (see
+        `pycbc.waveform.waveform_norm_exists`), and NaN for the others.
+
+        The table is cached for each distinct PSD (see `psd_fingerprint`).
+        If `sigmasq_cache_dir` was given, it is also saved there and reused
+        by any process filtering the same bank with the same PSD. Each
+        process adds the templates it has normalized to the saved table.
+
+        Parameters
+        ----------
+        psd: FrequencySeries
+            The PSD to normalize the templates with.
+        indices: {None, int or array of ints}, optional
+            The templates to normalize. Defaults to all of them.
+
+        Returns
+        -------
+        sigmasq: numpy.ndarray
+            The normalization of each template in the bank, NaN for the
+            templates which have not been normalized yet.
+        """
+        psd_key = psd_fingerprint(psd)
+        cached = self._sigmasq_tables.get(psd_key)
+        if cached is None or cached['table'] is not self.table:
+            fname = self._sigmasq_cache_file(psd_key)
+            if fname is not None and os.path.exists(fname):
+                logging.info('Loading template normalizations from %s', fname)
+                sigmasq = np.load(fname)
+            else:
+                sigmasq = np.full(len(self.table), np.nan)
+            cached = {'table': self.table, 'sigmasq': sigmasq,
+                      'fname': fname,
+                      'saved': np.count_nonzero(~np.isnan(sigmasq))}
+            self._sigmasq_tables[psd_key] = cached
+
+        sigmasq = cached['sigmasq']
+        if indices is None:
+            indices = np.arange(len(sigmasq))
+        indices = np.atleast_1d(indices)
+        missing = np.unique(indices[np.isnan(sigmasq[indices])])
+        if len(missing) == 0:
+            return sigmasq
+        sigmasq[missing] = self._calculate_sigmasq(psd, missing)
+
+        # Save the table each time the number of templates normalized has
+        # doubled, so that it is written a few times only
+        fname = cached['fname']
+        num = np.count_nonzero(~np.isnan(sigmasq))
+        if fname is not None and num > cached['saved'] \
+                and num >= 2 * cached['saved']:
+            os.makedirs(self.sigmasq_cache_dir, exist_ok=True)
+            if os.path.exists(fname):
+                # Merge in the templates normalized by other processes
+                saved = np.load(fname)
+                if len(saved) == len(sigmasq):
+                    todo = np.isnan(sigmasq)
+                    sigmasq[todo] = saved[todo]
+            tmpname = '%s.%i.tmp.npy' % (fname[:-4], os.getpid())
+            np.save(tmpname, sigmasq)
+            os.replace(tmpname, fname)
+            cached['saved'] = np.count_nonzero(~np.isnan(sigmasq))
+        return sigmasq
+
+    def _sigmasq_cache_file(self, psd_key):
+        """Return the file to save the normalizations of the templates with
+        the PSD of fingerprint psd_key in, or None if they are not saved.
+        """
+        if self.sigmasq_cache_dir is None:
+            return None
+        key = hashlib.sha256(psd_key.encode())
+        for name in sorted(self.table.fieldnames):
+            # The template duration is updated as templates are made
+            if name != 'template_duration':
+                values = self.table[name]
+                if values.dtype.hasobject:
+                    values = values.astype(str)
+                key.update(name.encode())
+                key.update(np.ascontiguousarray(values).tobytes())
+        key.update(repr((self.filter_length, self.delta_f, self.f_lower,
+                         self.max_template_length,
+                         sorted(self.extra_args.items()))).encode())
+        return os.path.join(self.sigmasq_cache_dir,
+                            'sigmasq-%s.npy' % key.hexdigest())
+
+    def _calculate_sigmasq(self, psd, indices):
+        """Calculate the normalization of the templates at indices, see
+        `sigmasq_table`.
+        """
+        sigmasq = np.full(len(indices), np.nan)
+        apxs = np.array([self.approximant(i) for i in indices])
+        for apx in np.unique(apxs):
+            if not pycbc.waveform.waveform_norm_exists(apx):
+                continue
+            sel = np.flatnonzero(apxs == apx)
+            idx = indices[sel]
+            params = {name: self.table[name][idx]
+                      for name in self.table.fieldnames}
+            params.update(self.extra_args)
+            params['approximant'] = apx
+
+            # Mirror the choices made for each template in __getitem__
+            if 'f_final' in self.table.fieldnames:
+                f_end = self.table['f_final'][idx]
+            else:
+                f_end = pycbc.waveform.get_waveform_end_frequency(**params)
+            f_max = (self.filter_length - 1) * self.delta_f
+            if f_end is None:
+                f_end = np.full(len(idx), f_max)
+            f_end = np.where(f_end >= self.filter_length * self.delta_f,
+                             f_max, f_end)
+            end_idx = (f_end / self.delta_f).astype(int)
+
+            if self.f_lower is None:
+                f_low = self.table['f_lower'][idx]
+            elif self.max_template_length is None:
+                f_low = np.full(len(idx), self.f_lower)
+            else:
+                f_low = np.array([
+                    find_variable_start_frequency(apx, self.table[i],
+                                                  self.f_lower,
+                                                  self.max_template_length)
+                    for i in idx])
+            kmin = (f_low / psd.delta_f).astype(int)
+
+            amp_norm = pycbc.waveform.get_template_amplitude_norm(**params)
+            amp_norm = 1 if amp_norm is None else amp_norm
+            sigma_scale = (DYN_RANGE_FAC * amp_norm) ** 2.0
+
+            norm = cached_filter_norm(apx, psd, self.min_f_lower)
+            sigmasq[sel] = sigma_scale * (norm[end_idx - 1] - norm[kmin])
+        return sigmasq
+
     def get_decompressed_waveform(self, tempout, index, f_lower=None,
                                   approximant=None, df=None):
         """Returns a frequency domain decompressed waveform for the template
@@ -885,6 +1168,8 @@ class FilterBank(TemplateBank):
         # Add sigmasq as a method of this instance
         htilde.sigmasq = types.MethodType(sigma_cached, htilde)
         htilde._sigmasq = {}
+        htilde.sigmasq_table = self.sigmasq_table
+        htilde.template_index = index
         return htilde
 
 
@@ -997,7 +1282,7 @@ class FilterBankSkyMax(TemplateBank):
         return hplus, hcross
 
 
-__all__ = ('sigma_cached', 'boolargs_from_apprxstr', 'add_approximant_arg',
+__all__ = ('sigma_cached', 'psd_fingerprint', 'boolargs_from_apprxstr', 'add_approximant_arg',
            'parse_approximant_arg', 'tuple_to_hash', 'TemplateBank',
            'LiveFilterBank', 'FilterBank', 'find_variable_start_frequency',
            'FilterBankSkyMax')
@@ -0,0 +1,148 @@
+"""
+Unit tests for reading template banks and the template normalizations of
+FilterBank
+"""
+import os
+import tempfile
+import unittest
+import numpy
+
+from utils import simple_exit
+
+import pycbc.psd
+from pycbc import DYN_RANGE_FAC
+from pycbc.io import HFile
+from pycbc.types import complex64, float32
+from pycbc.waveform import FilterBank, TemplateBank
+from pycbc.waveform.bank import psd_fingerprint
+
+
+class TestFilterBankSigmasq(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.bank_file = os.path.join(self.tmpdir.name, 'bank.hdf')
+        rng = numpy.random.default_rng(0)
+        self.num = 10
+        with HFile(self.bank_file, 'w') as f:
+            f['mass1'] = rng.uniform(1, 10, self.num)
+            f['mass2'] = rng.uniform(1, 3, self.num)
+            f['spin1z'] = numpy.zeros(self.num)
+            f['spin2z'] = numpy.zeros(self.num)
+            f['template_hash'] = numpy.arange(self.num)
+        self.flen = 2 ** 12 + 1
+        self.delta_f = 1. / 16
+        psd = pycbc.psd.aLIGOZeroDetHighPower(self.flen, self.delta_f, 20.)
+        psd.data[psd.data == 0] = 1.
+        self.psd = (psd * DYN_RANGE_FAC ** 2).astype(float32)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def bank(self, approximant, cache_dir=None):
+        return FilterBank(self.bank_file, self.flen, self.delta_f, complex64,
+                          approximant=approximant, low_frequency_cutoff=30.,
+                          sigmasq_cache_dir=cache_dir)
+
+    def test_psd_fingerprint(self):
+        same = self.psd.copy()
+        other = self.psd * 2
+        self.assertEqual(psd_fingerprint(self.psd), psd_fingerprint(same))
+        self.assertNotEqual(psd_fingerprint(self.psd), psd_fingerprint(other))
+
+    def test_table_matches_templates(self):
+        for approximant in ['SPAtmplt', 'TaylorF2']:
+            bank = self.bank(approximant)
+            for i in range(self.num):
+                htilde = bank[i]
+                single = bank[i]
+                del single.sigmasq_table
+                self.assertEqual(htilde.sigmasq(self.psd),
+                                 single.sigmasq(self.psd))
+                # An identical PSD reuses the cached value
+                self.assertEqual(htilde.sigmasq(self.psd.copy()),
+                                 htilde.sigmasq(self.psd))
+
+    def test_table_disk_cache(self):
+        cache_dir = os.path.join(self.tmpdir.name, 'cache')
+        sigmasq = self.bank('SPAtmplt', cache_dir).sigmasq_table(self.psd)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertFalse(numpy.isnan(sigmasq).any())
+        bank = self.bank('SPAtmplt', cache_dir)
+        bank._calculate_sigmasq = None
+        numpy.testing.assert_array_equal(bank.sigmasq_table(self.psd.copy()),
+                                         sigmasq)
+
+    def test_table_lazy(self):
+        cache_dir = os.path.join(self.tmpdir.name, 'cache')
+        full = self.bank('SPAtmplt').sigmasq_table(self.psd)
+        # Only the templates asked for are normalized
+        bank = self.bank('SPAtmplt', cache_dir)
+        bank[2].sigmasq(self.psd)
+        sigmasq = bank.sigmasq_table(self.psd, [3, 7])
+        done = numpy.flatnonzero(~numpy.isnan(sigmasq))
+        numpy.testing.assert_array_equal(done, [2, 3, 7])
+        numpy.testing.assert_array_equal(sigmasq[done], full[done])
+
+        # Another process starts from the saved table, and saves it again
+        # with its own templates once their number has doubled
+        other = self.bank('SPAtmplt', cache_dir)
+        other._calculate_sigmasq = lambda psd, indices: full[indices]
+        other.sigmasq_table(self.psd, [0, 1, 2, 5])
+        fname = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        saved = numpy.load(fname)
+        done = numpy.flatnonzero(~numpy.isnan(saved))
+        numpy.testing.assert_array_equal(done, [0, 1, 2, 3, 5, 7])
+        numpy.testing.assert_array_equal(saved[done], full[done])
+
+
+class TestTemplateBankRange(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.bank_file = os.path.join(self.tmpdir.name, 'bank.hdf')
+        rng = numpy.random.default_rng(0)
+        self.num = 100
+        self.columns = {
+            'mass1': rng.uniform(1, 10, self.num),
+            'mass2': rng.uniform(1, 3, self.num).astype(numpy.float32),
+            'spin1z': rng.uniform(-1, 1, self.num),
+            'template_hash': numpy.arange(self.num),
+        }
+        with HFile(self.bank_file, 'w') as f:
+            f.attrs['parameters'] = list(self.columns)
+            for name, values in self.columns.items():
+                # Read by memory mapping, and through h5py
+                if name == 'spin1z':
+                    f.create_dataset(name, data=values, compression='gzip')
+                else:
+                    f[name] = values
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_lazy_read(self):
+        bank = TemplateBank(self.bank_file)
+        self.assertEqual(len(bank), self.num)
+        self.assertIsNone(bank._table)
+        for name, values in self.columns.items():
+            numpy.testing.assert_array_equal(bank.table[name], values)
+
+    def test_index_range(self):
+        for start, stop in [(10, 35), (90, None), (None, 5), (50, 50)]:
+            bank = TemplateBank(self.bank_file, index_range=(start, stop))
+            expected = len(range(self.num)[start:stop])
+            self.assertEqual(len(bank), expected)
+            self.assertEqual(len(bank.table), expected)
+            for name, values in self.columns.items():
+                numpy.testing.assert_array_equal(bank.table[name],
+                                                 values[start:stop])
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+    TestFilterBankSigmasq))
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+    TestTemplateBankRange))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
@@ -0,0 +1,68 @@
+"""
+Unit tests for the template bank index used when building stochastic banks
+"""
+import unittest
+import numpy
+
+from utils import simple_exit
+from pycbc.tmpltbank import TemplateBankIndex
+
+
+class TestTemplateBankIndex(unittest.TestCase):
+    def setUp(self):
+        rng = numpy.random.default_rng(0)
+        self.num = 2000
+        self.tau0 = rng.uniform(0, 50, self.num)
+        self.sigma = numpy.exp(rng.uniform(0, 3, self.num))
+        self.query_tau0 = rng.uniform(0, 50, 200)
+        self.query_sigma = numpy.exp(rng.uniform(0, 3, 200))
+
+    def make_index(self, tau0_width, sigma_ratio):
+        index = TemplateBankIndex(tau0_width=tau0_width,
+                                  sigma_ratio=sigma_ratio)
+        for i, (t, s) in enumerate(zip(self.tau0, self.sigma)):
+            self.assertEqual(index.insert(tau0=t, sigma=s), i)
+        self.assertEqual(len(index), self.num)
+        return index
+
+    def brute_force(self, tau0, sigma, tau0_width, sigma_ratio):
+        keep = numpy.ones(self.num, dtype=bool)
+        if tau0_width is not None:
+            tbins = (self.tau0 / tau0_width).astype(int)
+            keep &= abs(tbins - int(tau0 / tau0_width)) <= 1
+        if sigma_ratio is not None:
+            bound = numpy.minimum(sigma / self.sigma, self.sigma / sigma)
+            keep &= bound > sigma_ratio
+        return numpy.flatnonzero(keep)
+
+    def test_query(self):
+        for tau0_width, sigma_ratio in [(0.5, None), (None, 0.97),
+                                        (0.5, 0.97), (2.0, 0.5),
+                                        (None, None)]:
+            index = self.make_index(tau0_width, sigma_ratio)
+            for t, s in zip(self.query_tau0, self.query_sigma):
+                numpy.testing.assert_array_equal(
+                    index.query(tau0=t, sigma=s),
+                    self.brute_force(t, s, tau0_width, sigma_ratio))
+
+    def test_sigma_bound_edge(self):
+        # Templates just inside and outside the sigma bound of the query
+        index = TemplateBankIndex(sigma_ratio=0.9)
+        sigmas = [0.9 * (1 - 1e-12), 0.9 * (1 + 1e-12), 1.0,
+                  1 / 0.9 * (1 - 1e-12), 1 / 0.9 * (1 + 1e-12)]
+        for s in sigmas:
+            index.insert(sigma=s)
+        numpy.testing.assert_array_equal(index.query(sigma=1.0), [1, 2, 3])
+
+    def test_invalid_ratio(self):
+        with self.assertRaises(ValueError):
+            TemplateBankIndex(sigma_ratio=1.0)
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+    TestTemplateBankIndex))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
@@ -0,0 +1,179 @@
+"""
+Regression tests of the sky position and time slide batched coherent
+statistics against evaluating the sky positions and slides one at a time
+"""
+import unittest
+import numpy as np
+
+from utils import simple_exit
+from pycbc.events import coherent as coh
+
+
+def loop_triggers(snr_dict, idx, time_delay_idx, wraparound_dict, min_nifos,
+                  threshold, fp, fc, sigma, projection, apply_null_cut):
+    """ The nested loops over slides and sky positions of
+    pycbc_multi_inspiral, returning the surviving triggers """
+    ifos = list(snr_dict)
+    nslides, npos = time_delay_idx[ifos[0]].shape
+    out = []
+    for slide in range(nslides):
+        for pos in range(npos):
+            delays = {ifo: time_delay_idx[ifo][slide, pos] for ifo in ifos}
+            zerolag = {ifo: time_delay_idx[ifo][0, pos] for ifo in ifos}
+            idx_dict = {
+                ifo: idx[ifo][(idx[ifo] > zerolag[ifo])
+                              & (idx[ifo] < zerolag[ifo]
+                                 + wraparound_dict[ifo])]
+                for ifo in ifos
+            }
+            coinc_idx = coh.get_coinc_indexes(idx_dict, delays, min_nifos,
+                                              wraparound_dict)
+            if len(coinc_idx) == 0:
+                continue
+            rho_coinc, coinc_idx, coinc_triggers = coh.coincident_snr(
+                snr_dict, coinc_idx, threshold, delays)
+            rho_coh = null = None
+            if len(coinc_idx) != 0 and len(ifos) > 1:
+                fpp = {ifo: fp[ifo][pos] for ifo in ifos}
+                fcc = {ifo: fc[ifo][pos] for ifo in ifos}
+                if projection == 'left+right':
+                    res = [coh.coherent_snr(
+                        coinc_triggers, coinc_idx, 0.0,
+                        coh.get_projection_matrix(fpp, fcc, sigma, name),
+                        rho_coinc) for name in ['left', 'right']]
+                    above = (res[0][0] > threshold) & (res[1][0] > threshold)
+                    rho_coh = np.maximum(res[0][0], res[1][0])[above]
+                    coinc_idx = res[0][1][above]
+                    coinc_triggers = {ifo: res[0][2][ifo][above]
+                                      for ifo in ifos}
+                    rho_coinc = res[0][3][above]
+                else:
+                    rho_coh, coinc_idx, coinc_triggers, rho_coinc = \
+                        coh.coherent_snr(
+                            coinc_triggers, coinc_idx, threshold,
+                            coh.get_projection_matrix(fpp, fcc, sigma,
+                                                      projection),
+                            rho_coinc)
+                if len(coinc_idx) != 0:
+                    null, rho_coh, rho_coinc, coinc_idx, coinc_triggers = \
+                        coh.null_snr(rho_coh, rho_coinc,
+                                     apply_cut=apply_null_cut,
+                                     snrv=coinc_triggers, index=coinc_idx)
+            for i, index in enumerate(coinc_idx):
+                out.append((
+                    slide, pos, index,
+                    {ifo: (index + delays[ifo]) % wraparound_dict[ifo]
+                     for ifo in ifos},
+                    rho_coinc[i],
+                    None if rho_coh is None else rho_coh[i],
+                    None if null is None else null[i],
+                ))
+    return out
+
+
+class TestCoherentSkyTriggers(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+        self.length = 2000
+
+    def make_data(self, ifos, nslides, npos):
+        rng = self.rng
+        snr_dict = {}
+        idx = {}
+        for ifo in ifos:
+            snr = (rng.normal(size=self.length)
+                   + 1j * rng.normal(size=self.length)).astype(np.complex64)
+            # Loud points, some of which are coincident after time delays
+            loud = np.sort(rng.choice(self.length, 60, replace=False))
+            snr[loud] *= 4
+            snr_dict[ifo] = snr
+            idx[ifo] = np.flatnonzero(abs(snr) > 4).astype(np.int32)
+        # Small time delays so that coincidences are found, with short
+        # time slides on top
+        delays = rng.integers(-3, 4, size=(len(ifos), npos))
+        time_delay_idx = {
+            ifo: delays[i][np.newaxis, :]
+            + 7 * i * np.arange(nslides)[:, np.newaxis]
+            for i, ifo in enumerate(ifos)
+        }
+        wraparound = {ifo: self.length for ifo in ifos}
+        fp = {ifo: rng.uniform(-1, 1, npos) for ifo in ifos}
+        fc = {ifo: rng.uniform(-1, 1, npos) for ifo in ifos}
+        sigma = {ifo: rng.uniform(1, 2) for ifo in ifos}
+        return snr_dict, idx, time_delay_idx, wraparound, fp, fc, sigma
+
+    def compare(self, ifos, min_nifos, projection, apply_null_cut,
+                nslides=3, npos=20):
+        snr_dict, idx, tdi, wrap, fp, fc, sigma = \
+            self.make_data(ifos, nslides, npos)
+        threshold = 5.
+        expected = loop_triggers(snr_dict, idx, tdi, wrap, min_nifos,
+                                 threshold, fp, fc, sigma, projection,
+                                 apply_null_cut)
+        # A small batch size makes the combinations spread over batches
+        batches = list(coh.coherent_sky_triggers(
+            snr_dict, idx, tdi, wrap, min_nifos, threshold, f_plus=fp,
+            f_cross=fc, sigma=sigma, projection=projection,
+            apply_null_cut=apply_null_cut, max_batch_size=1000))
+        self.assertGreater(len(expected), 0)
+        self.assertGreater(len(batches), 1)
+
+        def cat(key):
+            return np.concatenate([b[key] for b in batches])
+
+        np.testing.assert_array_equal(cat('slide'), [e[0] for e in expected])
+        np.testing.assert_array_equal(cat('position'),
+                                      [e[1] for e in expected])
+        np.testing.assert_array_equal(cat('index'), [e[2] for e in expected])
+        for ifo in ifos:
+            det_index = np.concatenate([b['det_index'][ifo] for b in batches])
+            np.testing.assert_array_equal(det_index,
+                                          [e[3][ifo] for e in expected])
+            np.testing.assert_array_equal(
+                np.concatenate([b['snr'][ifo] for b in batches]),
+                snr_dict[ifo][det_index])
+        np.testing.assert_allclose(cat('coinc_snr'), [e[4] for e in expected],
+                                   rtol=1e-6)
+        if len(ifos) > 1:
+            np.testing.assert_allclose(cat('coherent_snr'),
+                                       [e[5] for e in expected], rtol=1e-6)
+            np.testing.assert_allclose(cat('null_snr'),
+                                       [e[6] for e in expected],
+                                       rtol=1e-5, atol=1e-5)
+        else:
+            self.assertTrue(all(b['coherent_snr'] is None for b in batches))
+
+    def test_two_ifos(self):
+        for projection in ['standard', 'left', 'left+right']:
+            self.compare(['H1', 'L1'], 2, projection, True)
+        self.compare(['H1', 'L1'], 1, 'standard', False)
+
+    def test_three_ifos(self):
+        self.compare(['H1', 'L1', 'V1'], 2, 'standard', True)
+        self.compare(['H1', 'L1', 'V1'], 1, 'right', False)
+
+    def test_one_ifo(self):
+        self.compare(['H1'], 1, 'standard', True)
+
+    def test_projection_matrices(self):
+        ifos = ['H1', 'L1', 'V1']
+        _, _, _, _, fp, fc, sigma = self.make_data(ifos, 1, 10)
+        for projection in ['standard', 'left', 'right']:
+            batched = coh.get_projection_matrices(fp, fc, sigma, projection)
+            for pos in range(10):
+                np.testing.assert_allclose(
+                    batched[pos],
+                    coh.get_projection_matrix(
+                        {ifo: fp[ifo][pos] for ifo in ifos},
+                        {ifo: fc[ifo][pos] for ifo in ifos},
+                        sigma, projection),
+                    rtol=1e-10, atol=1e-12)
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+    TestCoherentSkyTriggers))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
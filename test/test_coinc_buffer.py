@@ -0,0 +1,90 @@
+"""
+Unit tests for the buffer of background coincs used by PyCBC Live
+"""
+import unittest
+import numpy
+
+from utils import simple_exit
+from pycbc.events.coinc import CoincExpireBuffer
+
+
+class LinearBuffer(object):
+    """ Straightforward version of CoincExpireBuffer to compare against """
+    def __init__(self, expiration, ifos):
+        self.expiration = expiration
+        self.ifos = ifos
+        self.time = {ifo: 0 for ifo in ifos}
+        self.values = numpy.zeros(0, dtype=numpy.float32)
+        self.timer = {ifo: numpy.zeros(0, dtype=numpy.int32) for ifo in ifos}
+
+    def add(self, values, times, ifos):
+        for ifo in ifos:
+            self.time[ifo] += 1
+        if len(values):
+            self.values = numpy.append(
+                self.values, numpy.array(values, dtype=numpy.float32))
+            for ifo in self.ifos:
+                self.timer[ifo] = numpy.append(self.timer[ifo], times[ifo])
+        keep = numpy.ones(len(self.values), dtype=bool)
+        for ifo in ifos:
+            keep &= self.timer[ifo] >= self.time[ifo] - self.expiration
+        self.values = self.values[keep]
+        for ifo in self.ifos:
+            self.timer[ifo] = self.timer[ifo][keep]
+
+    def remove(self, num):
+        self.values = self.values[:len(self.values) - num]
+        for ifo in self.ifos:
+            self.timer[ifo] = self.timer[ifo][:len(self.values)]
+
+    def num_greater(self, value):
+        return (self.values > numpy.float32(value)).sum()
+
+
+class TestCoincExpireBuffer(unittest.TestCase):
+    def test_against_linear(self):
+        rng = numpy.random.default_rng(0)
+        # Small runs exercise the capped merging of the sorted values
+        for ifos, max_run_size in [(['H1', 'L1'], None),
+                                   (['H1', 'L1', 'V1'], None),
+                                   (['H1', 'L1'], 64)]:
+            buf = CoincExpireBuffer(20, ifos)
+            if max_run_size is not None:
+                buf.max_run_size = max_run_size
+            ref = LinearBuffer(20, ifos)
+            for stride in range(200):
+                valid = [ifo for ifo in ifos if rng.uniform() > 0.1]
+                num = rng.integers(0, 50)
+                # Rounded values so that there are many repeated ones
+                values = numpy.round(rng.normal(size=num), 1)
+                values[rng.uniform(size=num) < 0.02] = numpy.nan
+                # Elements may use timers from a few strides before
+                times = {ifo: buf.time[ifo] + 1 - rng.integers(0, 5, num)
+                         for ifo in ifos}
+                if num == 0:
+                    buf.increment(valid)
+                    ref.add([], times, valid)
+                else:
+                    buf.add(values, times, valid)
+                    ref.add(values, times, valid)
+                if stride % 17 == 0:
+                    buf.remove(num // 2)
+                    ref.remove(num // 2)
+                self.assertEqual(len(buf), len(ref.values))
+                numpy.testing.assert_array_equal(buf.data, ref.values)
+                for value in [-numpy.inf, -1, 0, 0.1, 0.15, 1.3,
+                              numpy.nan, numpy.inf]:
+                    self.assertEqual(buf.num_greater(value),
+                                     ref.num_greater(value))
+                for value in values[:5]:
+                    self.assertEqual(buf.num_greater(value),
+                                     ref.num_greater(value))
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+    TestCoincExpireBuffer))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
@@ -1,9 +1,14 @@
 """Unit test for coincident ranking statistic implementations."""
 
+import os
+import tempfile
 import unittest
+import itertools
 import numpy as np
+import h5py
 from utils import parse_args_cpu_only, simple_exit
 from pycbc.events.stat import statistic_dict
+from pycbc.events.stat import parse_statistic_feature_options
 
 
 # this test only needs to happen on the CPU
@@ -70,9 +75,87 @@ for stat_name in statistic_dict:
 
     setattr(CoincStatTest, 'test_' + stat_name, stat_test_method)
 
+
+class PhaseTDLookupTest(unittest.TestCase):
+    """Compare the combined signal rate lookup of the phasetd statistic
+    with looking up each reference ifo in turn.
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(0)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_hist(self, ifos):
+        """Write a signal histogram in which roughly half of the bins near
+        zero time delay are occupied.
+        """
+        ranges = [range(-12, 13), range(0, 6), range(0, 6)]
+        ranges = ranges * (len(ifos) - 1)
+        bins = np.array(list(itertools.product(*ranges)))
+        fname = os.path.join(self.tmpdir.name, 'hist.hdf')
+        stat = 'phasetd_newsnr_' + ''.join(ifos)
+        with h5py.File(fname, 'w') as f:
+            f.attrs['stat'] = stat
+            f.attrs['ifos'] = ifos
+            f.attrs['twidth'] = 0.001
+            f.attrs['pwidth'] = 2 * np.pi / 6
+            f.attrs['swidth'] = 0.5
+            f.attrs['srbmin'] = 0
+            f.attrs['srbmax'] = 6
+            f.attrs['sensitivity_ratios'] = np.linspace(1, 0.5, len(ifos))
+            for ifo in ifos:
+                keep = self.rng.uniform(size=len(bins)) < 0.5
+                param = np.zeros(keep.sum(), dtype=[
+                    ('c%s' % i, np.int32) for i in range(bins.shape[1])
+                ])
+                for i in range(bins.shape[1]):
+                    param['c%s' % i] = bins[keep, i]
+                f[ifo + '/param_bin'] = param
+                f[ifo + '/weights'] = self.rng.uniform(1, 2, size=keep.sum())
+        return fname
+
+    def check_lookup(self, ifos):
+        # Set up the statistic as from the command line options, which
+        # reads the histogram
+        kwargs = parse_statistic_feature_options(['phasetd'], [])
+        stat = statistic_dict['phasetd']('snr', files=[self.make_hist(ifos)],
+                                         ifos=ifos, **kwargs)
+        self.assertTrue(stat.has_hist)
+        self.assertIsNotNone(stat.lookup_weights)
+        n = 5000
+        stats = {}
+        for ifo in ifos:
+            stats[ifo] = {
+                'snr': self.rng.uniform(4, 10, size=n),
+                'coa_phase': self.rng.uniform(0, 2 * np.pi, size=n),
+                'end_time': 1e9 + self.rng.uniform(-0.01, 0.01, size=n),
+                'sigmasq': self.rng.uniform(1, 10, size=n),
+            }
+        shift = self.rng.integers(-3, 3, size=n) * 0.004
+        to_shift = list(range(len(ifos)))
+        rate = stat.logsignalrate(stats, shift, to_shift)
+        expected = stat.logsignalrate_by_ifo(stats, shift, to_shift)
+        # The SNR rescaling is done in single precision in both
+        np.testing.assert_allclose(rate, expected, rtol=1e-5, atol=1e-6)
+        # Some, but not all, of the coincs should have missed the histogram
+        min_snr = np.array([stats[ifo]['snr'] for ifo in ifos]).min(axis=0)
+        penalty = np.log(stat.max_penalty) - 4 * np.log(min_snr / stat.ref_snr)
+        missed = np.isclose(rate, penalty, rtol=1e-5)
+        self.assertTrue(0 < missed.sum() < n)
+
+    def test_two_detectors(self):
+        self.check_lookup(['H1', 'L1'])
+
+    def test_three_detectors(self):
+        self.check_lookup(['H1', 'L1', 'V1'])
+
+
 # create and populate unittest's test suite
 suite = unittest.TestSuite()
 suite.addTest(unittest.TestLoader().loadTestsFromTestCase(CoincStatTest))
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(PhaseTDLookupTest))
 
 if __name__ == '__main__':
     results = unittest.TextTestRunner(verbosity=2).run(suite)
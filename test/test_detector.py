@@ -96,6 +96,64 @@ class TestDetector(unittest.TestCase):
 
             self.assertLess(diff.max(), tolerance)
 
+    def test_network(self):
+        names = [d.name for d in self.d]
+        network = det.DetectorNetwork(names)
+        # Use a block size which splits the samples unevenly
+        network.block_size = 300
+        fp, fc = network.antenna_pattern(self.ra, self.dec, self.pol,
+                                         self.time)
+        dt = network.time_delay_from_earth_center(self.ra, self.dec,
+                                                  self.time)
+        self.assertEqual(fp.shape, (len(names), len(self.ra)))
+        for i, ifo in enumerate(self.d):
+            fp1, fc1 = ifo.antenna_pattern(self.ra, self.dec, self.pol,
+                                           self.time)
+            numpy.testing.assert_allclose(fp[i], fp1, rtol=1e-12, atol=1e-14)
+            numpy.testing.assert_allclose(fc[i], fc1, rtol=1e-12, atol=1e-14)
+            dt1 = ifo.time_delay_from_earth_center(self.ra, self.dec,
+                                                   self.time)
+            numpy.testing.assert_allclose(dt[i], dt1, rtol=1e-12,
+                                          atol=1e-16)
+
+        # Preallocated outputs, and broadcasting of scalar inputs
+        out = (numpy.zeros((len(names), 10, 2)),
+               numpy.zeros((len(names), 10, 2)))
+        ra = self.ra[:20].reshape(10, 2)
+        fp2, fc2 = network.antenna_pattern(ra, 0.3, 0.1, self.time[0],
+                                           out=out)
+        self.assertIs(fp2, out[0])
+        self.assertIs(fc2, out[1])
+        for i, ifo in enumerate(self.d):
+            fp1, fc1 = ifo.antenna_pattern(ra.ravel(), 0.3, 0.1, self.time[0])
+            numpy.testing.assert_allclose(fp2[i].ravel(), fp1, rtol=1e-12,
+                                          atol=1e-14)
+            numpy.testing.assert_allclose(fc2[i].ravel(), fc1, rtol=1e-12,
+                                          atol=1e-14)
+        with self.assertRaises(ValueError):
+            network.antenna_pattern(self.ra, self.dec, self.pol, self.time,
+                                    out=out)
+
+    def test_network_accurate_gmst(self):
+        # The interpolated sidereal time against calculating it accurately
+        # at each time
+        names = ['H1', 'L1', 'V1']
+        time = uniform(1187008882.0, 1187008882.0 + 86400, size=50)
+        network = det.DetectorNetwork(names, reference_time=None)
+        fp, fc = network.antenna_pattern(self.ra[:50], self.dec[:50],
+                                         self.pol[:50], time)
+        dt = network.time_delay_from_earth_center(self.ra[:50],
+                                                  self.dec[:50], time)
+        for i, name in enumerate(names):
+            ifo = det.Detector(name, reference_time=None)
+            fp1, fc1 = ifo.antenna_pattern(self.ra[:50], self.dec[:50],
+                                           self.pol[:50], time)
+            numpy.testing.assert_allclose(fp[i], fp1, atol=1e-9)
+            numpy.testing.assert_allclose(fc[i], fc1, atol=1e-9)
+            dt1 = ifo.time_delay_from_earth_center(self.ra[:50],
+                                                   self.dec[:50], time)
+            numpy.testing.assert_allclose(dt[i], dt1, atol=1e-12)
+
     def test_delay_from_detector(self):
         ra, dec, time = self.ra[0:10], self.dec[0:10], self.time[0:10]
         for d1 in self.d:
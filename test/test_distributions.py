@@ -23,6 +23,7 @@ import numpy
 import os
 import unittest
 from pycbc import distributions
+from pycbc import pool
 from pycbc.inference import entropy
 from utils import parse_args_cpu_only
 from utils import simple_exit
@@ -260,8 +261,53 @@ class TestDistributions(unittest.TestCase):
                           "greater than the threshold for azimuthal angle"
                           "of {}".format(dist.name, kl_val, threshold))
 
+def _mtotal_lt_30(params):
+    return params["mass1"] + params["mass2"] < 30
+
+
+class TestJointDistribution(unittest.TestCase):
+
+    def setUp(self):
+        numpy.random.seed(1024)
+        uniform = distributions.Uniform(mass1=(2, 50), mass2=(2, 50))
+        self.dist = distributions.JointDistribution(
+            ["mass1", "mass2"], uniform, constraints=[_mtotal_lt_30])
+
+    def test_rvs_constraints(self):
+        # a small max_draw forces several rounds
+        for max_draw in [100, int(1e7)]:
+            samples = self.dist.rvs(size=10000, max_draw=max_draw)
+            self.assertEqual(len(samples), 10000)
+            self.assertTrue(_mtotal_lt_30(samples).all())
+            self.assertTrue((samples["mass1"] >= 2).all())
+            # the samples are not biased towards either parameter
+            self.assertAlmostEqual(samples["mass1"].mean(),
+                                   samples["mass2"].mean(), delta=0.5)
+
+    def test_rvs_pool(self):
+        single = pool.SinglePool()
+        state = numpy.random.get_state()
+        samples = self.dist.rvs(size=2500, pool=single, seed=10,
+                                chunksize=1000)
+        self.assertEqual(len(samples), 2500)
+        # drawing the chunks leaves the global random state alone
+        numpy.testing.assert_array_equal(numpy.random.get_state()[1],
+                                         state[1])
+        self.assertEqual(numpy.random.get_state()[2], state[2])
+        self.assertTrue(_mtotal_lt_30(samples).all())
+        procs = pool.choose_pool(2)
+        try:
+            psamples = self.dist.rvs(size=2500, pool=procs, seed=10,
+                                     chunksize=1000)
+        finally:
+            procs.close_pool()
+        numpy.testing.assert_array_equal(samples["mass1"], psamples["mass1"])
+        numpy.testing.assert_array_equal(samples["mass2"], psamples["mass2"])
+
 suite = unittest.TestSuite()
 suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestDistributions))
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+    TestJointDistribution))
 
 if __name__ == "__main__":
     results = unittest.TextTestRunner(verbosity=2).run(suite)
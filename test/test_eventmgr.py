@@ -0,0 +1,113 @@
+"""
+Unit tests for writing triggers with pycbc.events.EventManager
+"""
+import os
+import pickle
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+import h5py
+import numpy
+
+from utils import simple_exit
+from pycbc.events import EventManager
+
+
+class TestEventManagerStreaming(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.opt = SimpleNamespace(
+            channel_name='H1:STRAIN', sample_rate=2048,
+            gps_start_time=1000000000, segment_start_pad=8,
+            segment_end_pad=8, gps_end_time=1000004096,
+            trig_start_time=None, trig_end_time=None,
+            autochi_number_points=0, autochi_onesided=None,
+            autochi_two_phase=False, autochi_max_valued_dof=None,
+            psdvar_segment=None)
+        self.names = ['time_index', 'snr', 'chisq', 'chisq_dof',
+                      'bank_chisq', 'bank_chisq_dof', 'cont_chisq',
+                      'sigmasq']
+        self.types = [int, complex, float, int, float, int, float, float]
+        rng = numpy.random.default_rng(0)
+        self.templates = []
+        for i in range(50):
+            num = rng.integers(0, 40)
+            events = [rng.integers(0, 2048 * 4096, num),
+                      rng.normal(size=num) + 1j * rng.normal(size=num)]
+            events += [rng.uniform(1, 10, num) for _ in self.names[2:]]
+            tmplt = SimpleNamespace(template_hash=1000 + i,
+                                    template_duration=rng.uniform(1, 100))
+            self.templates.append((tmplt, events))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_templates(self, mgr, templates):
+        for tmplt, events in templates:
+            mgr.new_template(tmplt=tmplt)
+            mgr.add_template_events(self.names, events)
+            mgr.finalize_template_events()
+            mgr.flush_events()
+
+    def read(self, fname):
+        with h5py.File(fname, 'r') as f:
+            return {k: f['H1'][k][:] for k in f['H1']
+                    if isinstance(f['H1'][k], h5py.Dataset)}
+
+    def assert_same_file(self, fname, expected):
+        values = self.read(fname)
+        self.assertEqual(sorted(values), sorted(expected))
+        # The order of the triggers of each template is not defined
+        order = numpy.lexsort((values['end_time'], values['template_hash']))
+        eorder = numpy.lexsort((expected['end_time'],
+                                expected['template_hash']))
+        for key in values:
+            numpy.testing.assert_array_equal(values[key][order],
+                                             expected[key][eorder])
+
+    def test_stream_matches_single_write(self):
+        fname = os.path.join(self.tmpdir.name, 'H1-ALL.hdf')
+        mgr = EventManager(self.opt, self.names, self.types)
+        self.run_templates(mgr, self.templates)
+        mgr.write_events(fname)
+        expected = self.read(fname)
+
+        sname = os.path.join(self.tmpdir.name, 'H1-STREAM.hdf')
+        mgr = EventManager(self.opt, self.names, self.types,
+                           array_minsize=16)
+        mgr.stream_events(sname, 100)
+        self.run_templates(mgr, self.templates)
+        self.assertTrue(0 < mgr.stream_size < len(expected['snr']))
+        mgr.write_events(sname)
+        self.assert_same_file(sname, expected)
+
+    def test_stream_restore(self):
+        fname = os.path.join(self.tmpdir.name, 'H1-ALL.hdf')
+        mgr = EventManager(self.opt, self.names, self.types)
+        self.run_templates(mgr, self.templates)
+        mgr.write_events(fname)
+        expected = self.read(fname)
+
+        sname = os.path.join(self.tmpdir.name, 'H1-STREAM.hdf')
+        mgr = EventManager(self.opt, self.names, self.types)
+        mgr.stream_events(sname, 100)
+        self.run_templates(mgr, self.templates[:30])
+        state = pickle.dumps(mgr)
+        # Triggers written after the checkpoint are discarded on restore
+        self.run_templates(mgr, self.templates[30:40])
+        mgr.stream_file.f.close()
+
+        mgr = pickle.loads(state)
+        self.run_templates(mgr, self.templates[30:])
+        mgr.write_events(sname)
+        self.assert_same_file(sname, expected)
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+    TestEventManagerStreaming))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
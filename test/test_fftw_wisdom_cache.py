@@ -0,0 +1,99 @@
+# Copyright (C) 2026 The PyCBC development team
+#
+# This program is free software; you can redistribute it and/or modify it
+# under the terms of the GNU General Public License as published by the
+# Free Software Foundation; either version 3 of the License, or (at your
+# option) any later version.
+#
+# This program is distributed in the hope that it will be useful, but
+# WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+# Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+"""
+Unit tests for the on-disk FFTW wisdom cache of pycbc.fft.fftw
+"""
+
+import os
+import tempfile
+import unittest
+import multiprocessing
+import pycbc.fft
+from pycbc.types import zeros, float32, complex64
+from utils import simple_exit
+
+if 'fftw' not in pycbc.fft.get_backend_names():
+    raise unittest.SkipTest("FFTW does not seem to be an available backend")
+
+import pycbc.fft.fftw as fftw
+
+
+def _plan_in_process(cache_dir, size):
+    """ Plan a transform using the wisdom cache in cache_dir, and return
+    whether the plan had to be measured and saved to the cache """
+    fftw.set_measure_level(1)
+    fftw.set_wisdom_cache_dir(cache_dir)
+    saved = []
+    save = fftw._save_wisdom_cache
+    def record_save(*args):
+        saved.append(args)
+        save(*args)
+    fftw._save_wisdom_cache = record_save
+    fftw.FFT(zeros(size, dtype=float32), zeros(size // 2 + 1, dtype=complex64))
+    return len(saved) > 0
+
+
+class TestWisdomCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.mlvl = fftw.get_measure_level()
+        fftw.set_measure_level(1)
+        fftw.set_wisdom_cache_dir(self.tmpdir.name)
+
+    def tearDown(self):
+        fftw.set_wisdom_cache_dir(None)
+        fftw.set_measure_level(self.mlvl)
+        self.tmpdir.cleanup()
+
+    def test_plans_are_cached(self):
+        invec = zeros(1024, dtype=float32)
+        outvec = zeros(513, dtype=complex64)
+        fftw.FFT(invec, outvec)
+        fnames = [f for f in os.listdir(self.tmpdir.name)
+                  if f.endswith('.wisdom')]
+        self.assertEqual(len(fnames), 1)
+        self.assertTrue(fnames[0].startswith('float-'))
+
+    def test_cache_shared_between_processes(self):
+        # Fresh processes, which know no wisdom but that of the cache
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(1) as pool:
+            self.assertTrue(pool.apply(_plan_in_process,
+                                       (self.tmpdir.name, 2048)))
+        fnames = [f for f in os.listdir(self.tmpdir.name)
+                  if f.endswith('.wisdom')]
+        self.assertEqual(len(fnames), 1)
+        fname = os.path.join(self.tmpdir.name, fnames[0])
+        mtime = os.stat(fname).st_mtime_ns
+
+        # The second process plans from the stored wisdom alone
+        with ctx.Pool(1) as pool:
+            self.assertFalse(pool.apply(_plan_in_process,
+                                        (self.tmpdir.name, 2048)))
+        self.assertEqual(os.stat(fname).st_mtime_ns, mtime)
+
+    def test_estimate_does_not_use_cache(self):
+        fftw.set_measure_level(0)
+        fftw.FFT(zeros(512, dtype=complex64), zeros(512, dtype=complex64))
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestWisdomCache))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
@@ -26,6 +26,9 @@ These are the unittests for the pycbc frame/cache reading functions
 '''
 
 
+import os
+import time
+import tempfile
 import unittest
 import numpy
 from astropy.utils.data import download_file
@@ -134,6 +137,137 @@ class FrameTestBase(unittest.TestCase):
                           'channel1', start_time=self.epoch+1,
                           end_time=self.epoch)
 
+class TestFrameThreads(unittest.TestCase):
+    """ Reading several frame files with threads, and reading ahead the
+    frames of a live buffer as they appear
+    """
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.channel = 'H1:TEST'
+        self.sample_rate = 16
+        self.duration = 4
+        # Recent enough for the buffers to wait for the frames which have
+        # not been written yet
+        self.start = int(pycbc.gps_now()) - 100
+        self.timeout = 130
+        self.source = [os.path.join(self.tmpdir.name, 'H-TEST-*.gwf')]
+        self.rng = numpy.random.default_rng(0)
+        self.data = {}
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, num):
+        """ Write the num'th frame file, all at once as a live frame
+        appears """
+        start = self.start + num * self.duration
+        ts = TimeSeries(self.rng.normal(size=self.duration * self.sample_rate),
+                        delta_t=1.0 / self.sample_rate, epoch=start)
+        self.data[num] = ts
+        tmp = os.path.join(self.tmpdir.name, 'frame.tmp')
+        pycbc.frame.write_frame(tmp, self.channel, ts)
+        path = os.path.join(self.tmpdir.name,
+                            'H-TEST-{}-{}.gwf'.format(start, self.duration))
+        os.replace(tmp, path)
+        return path
+
+    def buffer(self, **kwargs):
+        return pycbc.frame.DataBuffer(self.source, self.channel, self.start,
+                                      max_buffer=32, **kwargs)
+
+    def test_read_frame_threads(self):
+        paths = [self.write(n) for n in range(4)]
+        for kwargs in [{}, {'start_time': self.start + 2,
+                            'end_time': self.start + 13}]:
+            ref = pycbc.frame.read_frame(paths, [self.channel], **kwargs)[0]
+            ts = pycbc.frame.read_frame(paths, [self.channel], nthreads=3,
+                                        **kwargs)[0]
+            self.assertEqual(ts.start_time, ref.start_time)
+            self.assertEqual(ts.delta_t, ref.delta_t)
+            self.assertEqual(ts.dtype, ref.dtype)
+            numpy.testing.assert_array_equal(ts.numpy(), ref.numpy())
+
+        # A gap in the files fails as without threads
+        del paths[2]
+        with self.assertRaises(Exception) as ref:
+            pycbc.frame.read_frame(paths, self.channel,
+                                   start_time=self.start,
+                                   end_time=self.start + 16)
+        with self.assertRaises(type(ref.exception)):
+            pycbc.frame.read_frame(paths, self.channel,
+                                   start_time=self.start,
+                                   end_time=self.start + 16, nthreads=3)
+
+    def test_read_ahead(self):
+        self.write(0)
+        ahead = self.buffer(read_ahead=True)
+        plain = self.buffer()
+        try:
+            for n in range(4):
+                # Except for the first, the frames are written after the
+                # read ahead has started waiting for them
+                if n:
+                    self.write(n)
+                ts = ahead.attempt_advance(self.duration,
+                                           timeout=self.timeout)
+                ref = plain.attempt_advance(self.duration,
+                                            timeout=self.timeout)
+                self.assertEqual(ts.start_time, ref.start_time)
+                numpy.testing.assert_array_equal(ts.numpy(), ref.numpy())
+                numpy.testing.assert_array_equal(ts.numpy(),
+                                                 self.data[n].numpy())
+            self.assertEqual(ahead.read_pos, plain.read_pos)
+            numpy.testing.assert_array_equal(ahead.raw_buffer.numpy(),
+                                             plain.raw_buffer.numpy())
+        finally:
+            ahead.close()
+
+    def test_read_ahead_late_frame(self):
+        self.write(0)
+        buf = self.buffer(read_ahead=True)
+        try:
+            buf.attempt_advance(self.duration, timeout=self.timeout)
+            time.sleep(0.5)
+            self.assertFalse(buf._next_block[2].done())
+            # The frame appears after the cache of the read ahead was first
+            # updated
+            self.write(1)
+            ts = buf.attempt_advance(self.duration, timeout=self.timeout)
+            self.assertIsNotNone(ts)
+            numpy.testing.assert_array_equal(ts.numpy(),
+                                             self.data[1].numpy())
+        finally:
+            buf.close()
+
+    def test_read_ahead_discarded(self):
+        self.write(0)
+        buf = self.buffer(read_ahead=True)
+        try:
+            buf.attempt_advance(self.duration, timeout=self.timeout)
+            # Moving the buffer discards the block read ahead
+            buf.null_advance(self.duration)
+            self.write(1)
+            self.write(2)
+            ts = buf.attempt_advance(self.duration, timeout=self.timeout)
+            self.assertEqual(ts.start_time, self.start + 2 * self.duration)
+            numpy.testing.assert_array_equal(ts.numpy(),
+                                             self.data[2].numpy())
+
+            # So does reading a block of another size
+            half = self.duration // 2
+            nhalf = half * self.sample_rate
+            self.write(3)
+            ts = buf.attempt_advance(half, timeout=self.timeout)
+            self.assertEqual(ts.start_time, self.start + 3 * self.duration)
+            numpy.testing.assert_array_equal(ts.numpy(),
+                                             self.data[3].numpy()[:nhalf])
+            ts = buf.attempt_advance(half, timeout=self.timeout)
+            numpy.testing.assert_array_equal(ts.numpy(),
+                                             self.data[3].numpy()[nhalf:])
+            self.assertEqual(buf.read_pos, self.start + 4 * self.duration)
+        finally:
+            buf.close()
+
 # We take a factory approach so we can test all possible dtypes we support
 TestClasses = []
 types = [numpy.float32, numpy.float64, numpy.complex64, numpy.complex128]
@@ -147,7 +281,7 @@ for ty in types:
 
 if __name__ == '__main__':
     suite = unittest.TestSuite()
-    for klass in TestClasses:
+    for klass in TestClasses + [TestFrameThreads]:
         suite.addTest(unittest.TestLoader().loadTestsFromTestCase(klass))
     results = unittest.TextTestRunner(verbosity=2).run(suite)
     simple_exit(results)
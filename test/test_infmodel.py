@@ -24,6 +24,8 @@
 """
 These are the unittests for pycbc.inference.models
 """
+import os
+import tempfile
 import unittest
 import copy
 from utils import simple_exit
@@ -133,6 +135,43 @@ class TestModels(unittest.TestCase):
         model.update(**self.q1)
         self.assertAlmostEqual(self.a1, model.loglr, delta=0.002)
 
+    def test_relative_batch(self):
+        model = models.Relative(self.variable, copy.deepcopy(self.data),
+                                 low_frequency_cutoff=self.flow,
+                                 psds = self.psds,
+                                 static_params = self.static,
+                                 prior = self.prior,
+                                 fiducial_params = {'mass1':1.3756},
+                                 epsilon = .1,
+                                )
+        self.assertTrue(model.supports_batch)
+        points = numpy.array([[42.0, 2.5], [50.0, 2.0], [200.0, 2.5]])
+        expected = []
+        for values in points:
+            model.update(**dict(zip(model.sampling_params, values)))
+            expected.append(model.loglikelihood)
+        numpy.testing.assert_allclose(model.loglikelihood_batch(points),
+                                      expected)
+
+    def test_relative_fiducial_cache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            lls = []
+            for _ in range(2):
+                model = models.Relative(self.variable,
+                                        copy.deepcopy(self.data),
+                                        low_frequency_cutoff=self.flow,
+                                        psds = self.psds,
+                                        static_params = self.static,
+                                        prior = self.prior,
+                                        fiducial_params = {'mass1':1.3756},
+                                        epsilon = .1,
+                                        fiducial_cache_dir = tmpdir,
+                                       )
+                self.assertEqual(len(os.listdir(tmpdir)), 1)
+                model.update(**self.q1)
+                lls.append(model.loglikelihood)
+            self.assertAlmostEqual(lls[0], lls[1])
+
     def test_single_phase_marg(self):
         model = models.SingleTemplate(
                         self.variable, copy.deepcopy(self.data),
@@ -460,10 +499,48 @@ class TestMarginalizedPolModels(unittest.TestCase):
         self._test_models(margpol_model, orig_model, polsamples)
 
 
+class TestBatchModels(unittest.TestCase):
+    def setUp(self):
+        self.variable = ['x', 'y', 'z']
+        self.prior = JointDistribution(
+            self.variable, Uniform(x=(-5, 5), y=(-5, 5), z=(-5, 5)))
+        rng = numpy.random.default_rng(0)
+        self.points = rng.uniform(-6, 6, size=(20, 3))
+
+    def check_batch(self, model):
+        self.assertTrue(model.supports_batch)
+        call = models.CallModel(model, 'logposterior')
+        expected = [call(p) for p in self.points]
+        result = call.batch(self.points)
+        self.assertEqual(len(result), len(expected))
+        for (val, stats), (eval_, estats) in zip(result, expected):
+            self.assertAlmostEqual(val, eval_)
+            numpy.testing.assert_allclose(stats, estats)
+        loglikelihood = model.loglikelihood_batch(self.points)
+        call.callstat = 'loglikelihood'
+        numpy.testing.assert_allclose(
+            loglikelihood, [call(p)[0] for p in self.points])
+
+    def test_analytic_models(self):
+        for cls in [models.TestNormal, models.TestEggbox,
+                    models.TestRosenbrock, models.TestPrior]:
+            self.check_batch(cls(self.variable, prior=self.prior))
+        self.check_batch(models.TestVolcano(self.variable[:2]))
+
+    def test_no_batch_support(self):
+        model = models.TestNormal(self.variable, prior=self.prior)
+        model.supports_batch = False
+        call = models.CallModel(model, 'logposterior',
+                                return_all_stats=False)
+        self.assertEqual(call.batch(self.points),
+                         [call(p) for p in self.points])
+
+
 suite = unittest.TestSuite()
 suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestModels))
 suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestWaveformErrors))
 suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestMarginalizedPolModels))
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestBatchModels))
 
 if __name__ == '__main__':
     from astropy.utils import iers
@@ -3,11 +3,41 @@ import unittest
 import tempfile
 import numpy as np
 from utils import simple_exit, parse_args_cpu_only
-from pycbc.io.hdf import HFile
+import h5py
+from pycbc.io.hdf import HFile, ReadByTemplate
 
 parse_args_cpu_only("io.hdf")
 
 
+def make_merged_trigger_file(path, ifo, template_ids, end_time, snr):
+    """Write a minimal merged single-detector trigger file, laid out as
+    by pycbc_coinc_mergetrigs with the template hash equal to the
+    template id, reversed."""
+    num_templates = template_ids.max() + 2
+    hashes = num_templates - np.arange(num_templates)
+    trigger_hashes = hashes[template_ids]
+    trigger_sort = trigger_hashes.argsort(kind='stable')
+    bank_tids = hashes.argsort()
+    full_boundaries = np.searchsorted(trigger_hashes[trigger_sort],
+                                      hashes[bank_tids])
+    full_boundaries = np.append(full_boundaries, len(template_ids))
+    unsort = bank_tids.argsort()
+    with HFile(path, "w") as f:
+        f[ifo + "/search/start_time"] = [end_time.min() - 1]
+        f[ifo + "/search/end_time"] = [end_time.max() + 1]
+        f[ifo + "/template_boundaries"] = full_boundaries[unsort]
+        for col, data in [("template_id", template_ids),
+                          ("end_time", end_time), ("snr", snr)]:
+            dset = f.create_dataset(ifo + "/" + col, data=data[trigger_sort])
+            refs = []
+            for j in range(num_templates):
+                l = full_boundaries[unsort[j]]
+                r = full_boundaries[unsort[j] + 1]
+                refs.append(dset.regionref[l:r])
+            f.create_dataset(ifo + "/" + col + "_template", data=refs,
+                             dtype=h5py.special_dtype(ref=h5py.RegionReference))
+
+
 class TestIOHDF(unittest.TestCase):
 
     def test_hfile_select_basic_and_premask(self):
@@ -43,6 +73,63 @@ class TestIOHDF(unittest.TestCase):
                     idxs3, np.array([8, 9], dtype=np.uint64)
                 )
 
+    def test_hfile_select_pipelined(self):
+        """Threaded and prefetched select give the same result as serial."""
+        with tempfile.TemporaryDirectory() as td:
+            p = os.path.join(td, "pipelined.hdf")
+            x = np.random.default_rng(1).uniform(0, 10, size=1000)
+            with HFile(p, "w") as f:
+                f.create_dataset("grp/x", data=x)
+                f.create_dataset("grp/y", data=np.arange(1000))
+
+            premask = np.arange(1000) % 3 > 0
+            derived = {"x2": (lambda d: d["x"] ** 2, ["x"])}
+            with HFile(p, "r") as f:
+                ref = f.select(lambda x2, y: x2 > 50, "x2", "y",
+                               derived=derived, group="grp", chunksize=1000,
+                               premask=premask, prefetch=0)
+                for nthreads, prefetch in [(1, 2), (3, 0), (4, 3)]:
+                    idxs, (x2s, ys) = f.select(
+                        lambda x2, y: x2 > 50, "x2", "y", derived=derived,
+                        group="grp", chunksize=37, premask=premask,
+                        nthreads=nthreads, prefetch=prefetch)
+                    np.testing.assert_array_equal(idxs, ref[0])
+                    self.assertEqual(idxs.dtype, np.uint64)
+                    np.testing.assert_array_equal(x2s, ref[1][0])
+                    np.testing.assert_array_equal(ys, ref[1][1])
+                    np.testing.assert_array_equal(ys, idxs)
+
+                # nothing selected
+                idxs, (ys,) = f.select(lambda y: y < 0, "y", group="grp",
+                                       chunksize=37)
+                self.assertEqual(len(idxs), 0)
+                self.assertEqual(ys.dtype, f["grp/y"].dtype)
+
+                # errors raised while evaluating chunks are passed on
+                def fail(y):
+                    raise ValueError
+                with self.assertRaises(ValueError):
+                    f.select(fail, "y", group="grp", chunksize=37, nthreads=2)
+
+    def test_hfile_select_prefetch_error(self):
+        """An error in the first chunk stops the prefetching of the rest."""
+        with tempfile.TemporaryDirectory() as td:
+            p = os.path.join(td, "prefetch_error.hdf")
+            with HFile(p, "w") as f:
+                f.create_dataset("y", data=np.arange(100))
+
+            def fail(y):
+                raise ValueError
+
+            with HFile(p, "r") as f:
+                # More chunks than the prefetch depth, so that the queue is
+                # full when the error is raised
+                with self.assertRaises(ValueError):
+                    f.select(fail, "y", chunksize=20)
+                # The file is still usable afterwards
+                idxs, _ = f.select(lambda y: y > 90, "y", chunksize=20)
+                self.assertEqual(len(idxs), 9)
+
     def test_hfile_select_mismatched_lengths_raises(self):
         """If datasets have different lengths, select should raise RuntimeError."""
         with tempfile.TemporaryDirectory() as td:
@@ -122,6 +209,32 @@ class TestIOHDF(unittest.TestCase):
             out = df.get_column("val")
             np.testing.assert_array_equal(out, np.array([1, 2, 3, 4, 5]))
 
+    def test_readbytemplate_bulk_matches_regionref(self):
+        """Bulk reads give the same triggers as region references."""
+        rng = np.random.default_rng(0)
+        # template 3 has no triggers
+        template_ids = rng.choice([0, 1, 2, 4, 5, 6], size=200)
+        end_time = rng.uniform(1000, 2000, size=200)
+        snr = rng.uniform(4, 10, size=200)
+
+        with tempfile.TemporaryDirectory() as td:
+            p = os.path.join(td, "H1-MERGED.hdf")
+            make_merged_trigger_file(p, "H1", template_ids, end_time, snr)
+
+            ref = ReadByTemplate(p)
+            bulk = ReadByTemplate(p)
+            bulk.load_templates(np.arange(7), chunksize=17)
+            for valid in [None, (np.array([1100., 1500.]),
+                                 np.array([1300., 1900.]))]:
+                ref.valid = bulk.valid = valid
+                for tnum in range(8):
+                    # template 7 is not loaded in bulk
+                    np.testing.assert_array_equal(ref.set_template(tnum),
+                                                  bulk.set_template(tnum))
+                    for col in ["template_id", "end_time", "snr"]:
+                        np.testing.assert_array_equal(ref[col], bulk[col])
+                    self.assertTrue((bulk["template_id"] == tnum).all())
+
 
 suite = unittest.TestSuite()
 suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestIOHDF))
@@ -0,0 +1,217 @@
+"""
+Unit tests of the coincidences of several ifos found by the PyCBC Live
+background estimator
+"""
+import itertools
+import unittest
+from types import SimpleNamespace
+import numpy
+
+from utils import simple_exit
+from pycbc.events.coinc import LiveCoincTimeslideBackgroundEstimator as \
+    Coincer
+from pycbc.events.coinc import time_coincidence
+import validation_code.old_coinc as old_coinc
+
+OriginalCoincer = old_coinc.LiveCoincTimeslideBackgroundEstimator
+
+
+def make_args(**kwargs):
+    args = SimpleNamespace(
+        sngl_ranking="snr",
+        ranking_statistic="quadsum",
+        statistic_files=None,
+        statistic_keywords=None,
+        statistic_features=None,
+        timeslide_interval=0.1,
+        background_ifar_limit=100,
+        store_background=True,
+        coinc_window_pad=0.002,
+        statistic_refresh_rate=None,
+    )
+    for key, value in kwargs.items():
+        setattr(args, key, value)
+    return args
+
+
+class TrigSimulator(object):
+    """ Make at most one trigger per template and ifo in each block, as the
+    matched filtering of PyCBC Live does. The triggers of the different
+    ifos are close in time, so that there are coincidences of all the
+    combinations of ifos, both at zerolag and in time slides.
+    """
+    def __init__(self, num_templates, analysis_chunk, ifos, seed=0):
+        self.rng = numpy.random.default_rng(seed)
+        self.num_templates = num_templates
+        self.analysis_chunk = analysis_chunk
+        self.ifos = ifos
+        self.start_time = 1300000000
+
+    def get_trigs(self):
+        rng = self.rng
+        base = self.start_time + rng.uniform(0.1, self.analysis_chunk - 0.1,
+                                             self.num_templates)
+        trigs = {}
+        for ifo in self.ifos:
+            tids = numpy.flatnonzero(rng.uniform(size=self.num_templates) < .7)
+            num = len(tids)
+            trigs[ifo] = {
+                "snr": rng.uniform(4.5, 10, num).astype(numpy.float32),
+                "end_time": base[tids] + rng.uniform(-.006, .006, num),
+                "chisq": rng.uniform(0.5, 1.5, num).astype(numpy.float32),
+                "chisq_dof": numpy.full(num, 10, dtype=numpy.int32),
+                "coa_phase": rng.uniform(0, 2 * numpy.pi,
+                                         num).astype(numpy.float32),
+                "sigmasq": numpy.ones(num, dtype=numpy.float32),
+                "template_id": tids.astype(numpy.int32),
+                "mass1": rng.uniform(2, 100, num).astype(numpy.float32),
+                "mass2": rng.uniform(2, 100, num).astype(numpy.float32),
+            }
+        self.start_time += self.analysis_chunk
+        return trigs
+
+
+def brute_force_coincs(coincer, combo, results, valid_ifos):
+    """ Find the coincidences of the new triggers one at a time, as sets of
+    (fixed ifo, template, positions of the triggers, slide) """
+    found = set()
+    for fixed_num, fixed_ifo in enumerate(combo):
+        if fixed_ifo not in valid_ifos:
+            continue
+        others = [ifo for ifo in combo if ifo != fixed_ifo]
+        for i, template in enumerate(results[fixed_ifo]['template_id']):
+            fbuf = coincer.singles[fixed_ifo]
+            fdata = fbuf.data(template)
+            # There is one trigger per template, so it is the last one
+            fpos = fbuf.valid_slice(template).stop - 1
+            self_time = fdata['end_time'][-1]
+            pairs = {}
+            for ifo in others:
+                data = coincer.singles[ifo].data(template)
+                start = coincer.singles[ifo].valid_slice(template).start
+                idx, _, slide = time_coincidence(
+                    data['end_time'],
+                    numpy.array([self_time], dtype=numpy.float64),
+                    coincer.time_windows[fixed_ifo, ifo],
+                    coincer.timeslide_interval)
+                pairs[ifo] = [(start + j, data['end_time'][j], s)
+                              for j, s in zip(idx, slide)]
+            for members in itertools.product(*[pairs[ifo] for ifo in others]):
+                if len(set(m[2] for m in members)) != 1:
+                    continue
+                zerolag = all(
+                    members[b][1] >= members[a][1]
+                    - coincer.time_windows[others[a], others[b]]
+                    and members[b][1] < members[a][1]
+                    + coincer.time_windows[others[a], others[b]]
+                    for a, b in itertools.combinations(range(len(others)), 2))
+                if not zerolag:
+                    continue
+                pos = dict(zip(others, [m[0] for m in members]))
+                pos[fixed_ifo] = fpos
+                found.add((fixed_num, int(template),
+                           tuple(int(pos[ifo]) for ifo in combo),
+                           int(members[0][2])))
+    return found
+
+
+class TestLiveCoincMultiIfo(unittest.TestCase):
+    def setUp(self):
+        self.num_templates = 20
+        self.analysis_chunk = 8
+        self.ifos = ['H1', 'L1', 'V1']
+        sim = TrigSimulator(self.num_templates, self.analysis_chunk,
+                            self.ifos)
+        self.trigs = [sim.get_trigs() for _ in range(12)]
+        # Some blocks with an ifo down
+        del self.trigs[4]['V1']
+        del self.trigs[7]['H1']
+
+    def test_combo_coincs(self):
+        coincer = Coincer.from_cli(make_args(max_coinc_ifos=3),
+                                   self.num_templates, self.analysis_chunk,
+                                   self.ifos)
+        self.assertEqual(len(coincer.combos), 4)
+        # Search in small blocks of pairs of triggers
+        coincer.max_join_size = 7
+        num_triples = 0
+        for trigs in self.trigs:
+            valid_ifos = [ifo for ifo in trigs if trigs[ifo]]
+            coincer._add_singles_to_buffer(trigs, valid_ifos)
+            for combo in coincer.combos:
+                coincs = coincer._combo_coincs(combo, trigs, valid_ifos)
+                found = set(zip(
+                    coincs['fixed'].tolist(),
+                    coincs['template'].tolist(),
+                    zip(*[coincs['positions'][ifo].tolist()
+                          for ifo in combo]),
+                    coincs['slide'].tolist()))
+                self.assertEqual(len(found), len(coincs['slide']))
+                self.assertEqual(
+                    found,
+                    brute_force_coincs(coincer, combo, trigs, valid_ifos))
+                if len(combo) == 3:
+                    num_triples += len(found)
+
+                # Each coinc is ranked as if on its own
+                for n in range(len(coincs['slide'])):
+                    sngls = [[ifo, coincer.singles[ifo].buffer['stat'][
+                                 coincs['positions'][ifo][n:n + 1]]]
+                             for ifo in combo]
+                    expected = coincer.stat_calculators[combo].rank_stat_coinc(
+                        sngls, coincs['slide'][n:n + 1], 0.1,
+                        [0] * len(combo))
+                    numpy.testing.assert_allclose(coincs['stat'][n],
+                                                  expected[0], rtol=1e-6)
+        self.assertGreater(num_triples, 0)
+
+    def test_pairs_match_two_ifo_estimators(self):
+        # The pairs of ifos are found as by the original estimator of a
+        # single pair, run for each pair
+        coincer = Coincer.from_cli(make_args(), self.num_templates,
+                                   self.analysis_chunk, self.ifos)
+        pair_coincers = {
+            combo: OriginalCoincer.from_cli(make_args(), self.num_templates,
+                                            self.analysis_chunk, list(combo))
+            for combo in itertools.combinations(self.ifos, 2)
+        }
+        self.assertEqual(coincer.combos, list(pair_coincers))
+        num_foreground = 0
+        for trigs in self.trigs:
+            # The estimators add the ranking statistic to the triggers
+            results = coincer.add_singles(
+                {ifo: dict(t) for ifo, t in trigs.items()})
+            pair_results = [
+                c.add_singles({ifo: dict(t) for ifo, t in trigs.items()})
+                for c in pair_coincers.values()
+            ]
+            best = OriginalCoincer.pick_best_coinc(pair_results)
+            self.assertEqual(results.get('foreground/type'),
+                             best.get('foreground/type'))
+            if 'foreground/ifar' in results:
+                num_foreground += 1
+                self.assertAlmostEqual(results['foreground/ifar'],
+                                       best['foreground/ifar'])
+                numpy.testing.assert_allclose(results['foreground/stat'],
+                                              best['foreground/stat'],
+                                              rtol=1e-6)
+                for ifo in results['foreground/type'].split('-'):
+                    for key in ['snr', 'end_time', 'template_id', 'stat']:
+                        path = f'foreground/{ifo}/{key}'
+                        self.assertEqual(results[path], best[path])
+            for combo, pair_coincer in pair_coincers.items():
+                numpy.testing.assert_allclose(
+                    numpy.sort(coincer.background[combo].data),
+                    numpy.sort(pair_coincer.coincs.data), rtol=1e-6)
+                self.assertEqual(coincer.combo_background_time(combo),
+                                 pair_coincer.background_time)
+        self.assertGreater(num_foreground, 0)
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+    TestLiveCoincMultiIfo))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
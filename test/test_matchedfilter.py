@@ -220,6 +220,58 @@ class TestMatchedFilter(unittest.TestCase):
             self.assertAlmostEqual(sqrt(0.5), o, places=3)
             self.assertAlmostEqual(132327.27060, i, places=2)
 
+    def test_batch_matched_filter_control(self):
+        from pycbc.filter import (
+            MatchedFilterControl, BatchMatchedFilterControl
+        )
+        tlen = 2 ** 12
+        delta_f = 1.0 / 4
+        rng = numpy.random.RandomState(0)
+
+        def random_series(length):
+            data = rng.normal(size=length) + 1j * rng.normal(size=length)
+            return FrequencySeries(data, delta_f=delta_f, dtype=complex64)
+
+        with self.context:
+            segments = [random_series(tlen) for _ in range(2)]
+            for seg in segments:
+                seg.analyze = slice(256, tlen - 256)
+            templates = [random_series(tlen // 2 + 1) for _ in range(3)]
+            norms = [1e4, 2e4, 4e4]
+
+            for use_cluster, cfunc in [(False, 'findchirp'),
+                                       (True, 'findchirp'),
+                                       (True, 'symmetric')]:
+                template_mem = zeros(tlen, dtype=complex64)
+                single = MatchedFilterControl(20, None, 0.35, tlen, delta_f,
+                                              complex64, segments,
+                                              template_mem, use_cluster,
+                                              cluster_function=cfunc)
+                batch = BatchMatchedFilterControl(20, None, 0.35, tlen,
+                                                  delta_f, complex64,
+                                                  segments, 4, use_cluster,
+                                                  cluster_function=cfunc)
+                batch.set_templates(templates)
+                for snum in range(len(segments)):
+                    results = batch.matched_filter_and_cluster(snum, norms, 64)
+                    self.assertEqual(len(results), len(templates))
+                    for tmplt, norm, res in zip(templates, norms, results):
+                        template_mem.clear()
+                        template_mem[:len(tmplt)] = tmplt
+                        snr, n, corr, idx, snrv = \
+                            single.matched_filter_and_cluster(snum, norm, 64)
+                        self.assertTrue(len(idx) > 0)
+                        self.assertEqual(list(idx), list(res[3]))
+                        self.assertAlmostEqual(n, res[1])
+                        numpy.testing.assert_allclose(
+                            numpy.array(snrv), numpy.array(res[4]),
+                            rtol=1e-4)
+                        numpy.testing.assert_allclose(
+                            snr.numpy(), res[0].numpy(), rtol=1e-4,
+                            atol=1e-3 * abs(snr.numpy()).max())
+                        numpy.testing.assert_allclose(
+                            corr.numpy(), res[2].numpy(), rtol=1e-6)
+
     def test_errors(self):
         with self.context:
             #Check that an incompatible data and filter produce an error
@@ -0,0 +1,110 @@
+"""
+Unit tests for the arena-backed MultiRingBuffer of pycbc.events.coinc
+"""
+import unittest
+import numpy
+
+from utils import simple_exit
+from pycbc.events.coinc import MultiRingBuffer
+
+
+class ListRingBuffer(object):
+    """Reference ring buffers holding a list of (time, value) per ring"""
+    def __init__(self, num_rings, max_time):
+        self.rings = [[] for _ in range(num_rings)]
+        self.max_time = max_time
+        self.time = 0
+
+    def add(self, indices, values):
+        for i, v in zip(indices, values):
+            self.rings[i].append((self.time, v))
+        self.time += 1
+
+    def discard_last(self, indices):
+        for i in indices:
+            self.rings[i].pop()
+
+    def valid(self, i):
+        return [(t, v) for t, v in self.rings[i]
+                if t >= self.time - self.max_time]
+
+    def data(self, i):
+        return [v for _, v in self.valid(i)]
+
+    def expire_vector(self, i):
+        return [t for t, _ in self.valid(i)]
+
+
+class TestMultiRingBuffer(unittest.TestCase):
+    def setUp(self):
+        self.dtype = [('end_time', numpy.float64), ('stat', numpy.float32)]
+        self.num_rings = 200
+        self.max_time = 20
+
+    def make_buffers(self, **kwds):
+        new = MultiRingBuffer(self.num_rings, self.max_time, self.dtype,
+                              **kwds)
+        ref = ListRingBuffer(self.num_rings, self.max_time)
+        return new, ref
+
+    def check_same(self, new, ref):
+        self.assertEqual(new.time, ref.time)
+        for i in range(self.num_rings):
+            data = ref.data(i)
+            expected = numpy.array(data, dtype=self.dtype)
+            numpy.testing.assert_array_equal(new.data(i), expected)
+            numpy.testing.assert_array_equal(new.expire_vector(i),
+                                             ref.expire_vector(i))
+            self.assertEqual(new.data(i).dtype, expected.dtype)
+
+    def run_updates(self, new, ref, num_updates, num_trigs):
+        rng = numpy.random.default_rng(0)
+        for n in range(num_updates):
+            # Some templates are much louder than others, and may have
+            # several triggers in one update
+            indices = rng.zipf(1.5, size=num_trigs) % self.num_rings
+            values = numpy.zeros(num_trigs, dtype=self.dtype)
+            values['end_time'] = n + rng.uniform(size=num_trigs)
+            values['stat'] = rng.uniform(size=num_trigs)
+            new.add(indices, values)
+            ref.add(indices, values.tolist())
+            if n % 7 == 3:
+                new.discard_last(indices[:5])
+                ref.discard_last(indices[:5])
+            if n % 10 == 0:
+                self.check_same(new, ref)
+        self.check_same(new, ref)
+
+    def test_matches_per_ring_buffers(self):
+        new, ref = self.make_buffers()
+        self.run_updates(new, ref, 100, 50)
+
+    def test_small_buffers(self):
+        new, ref = self.make_buffers(min_buffer_size=1, buffer_increment=1)
+        self.run_updates(new, ref, 100, 50)
+
+    def test_compaction(self):
+        new, ref = self.make_buffers()
+        self.run_updates(new, ref, 100, 200)
+        new.compact()
+        self.assertEqual(new.valid_starts.sum(), 0)
+        self.assertEqual(new.arena_end, new.capacities.sum())
+        self.assertEqual(new.num_elements(),
+                         sum(len(ref.valid(i)) for i in range(self.num_rings)))
+        self.check_same(new, ref)
+        self.run_updates(new, ref, 30, 200)
+
+    def test_empty_update(self):
+        new, ref = self.make_buffers()
+        new.add(numpy.array([], dtype=int),
+                numpy.array([], dtype=self.dtype))
+        self.assertEqual(new.time, 1)
+        self.assertEqual(new.num_elements(), 0)
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestMultiRingBuffer))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
@@ -0,0 +1,76 @@
+"""
+Unit tests for the multiprocessing pools
+"""
+import os
+import unittest
+import numpy
+from utils import simple_exit
+from pycbc.pool import BroadcastPool
+
+
+def _getpid(_):
+    return os.getpid()
+
+
+def _double(results):
+    return {ifo: {k: v * 2 for k, v in trigs.items()}
+            for ifo, trigs in results.items()}
+
+
+def _is_writeable(arr):
+    return arr.flags.writeable
+
+
+def _fail_on_one(num):
+    if num == 1:
+        raise ValueError
+    return numpy.zeros(1000)
+
+
+class TestBroadcastPool(unittest.TestCase):
+    def test_broadcast_reaches_every_worker(self):
+        pool = BroadcastPool(3)
+        for _ in range(5):
+            pids = pool.broadcast(_getpid, None)
+            self.assertEqual(len(set(pids)), 3)
+            pids = pool.allmap(_getpid, range(3))
+            self.assertEqual(len(set(pids)), 3)
+        pool.close_pool()
+
+    def test_shared_memory_transport(self):
+        results = {'H1': {'snr': numpy.arange(1000, dtype=numpy.float32),
+                          'end_time': numpy.linspace(0, 1, 1000)},
+                   'L1': {}}
+        for threshold in [None, 0, 10**9]:
+            pool = BroadcastPool(2, shared_memory_threshold=threshold)
+            out = pool.broadcast(_double, results)
+            self.assertEqual(len(out), 2)
+            for o in out:
+                self.assertEqual(o['L1'], {})
+                for k, v in results['H1'].items():
+                    numpy.testing.assert_array_equal(o['H1'][k], v * 2)
+                    self.assertEqual(o['H1'][k].dtype, v.dtype)
+            # Arrays shared between workers must not be modified
+            writeable = pool.map(_is_writeable, [numpy.zeros(10)] * 2)
+            self.assertEqual(writeable, [threshold != 0] * 2)
+            pool.close_pool()
+
+    @unittest.skipUnless(os.path.isdir('/dev/shm'),
+                         'shared memory segments are not files')
+    def test_shared_memory_error(self):
+        pool = BroadcastPool(2, shared_memory_threshold=0)
+        before = set(os.listdir('/dev/shm'))
+        # Calls which succeed in the same chunk as a failing one, or in
+        # other chunks, have already stored their results
+        with self.assertRaises(ValueError):
+            pool.map(_fail_on_one, range(6), chunksize=2)
+        self.assertEqual(set(os.listdir('/dev/shm')) - before, set())
+        pool.close_pool()
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestBroadcastPool))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
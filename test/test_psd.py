@@ -106,6 +106,46 @@ class TestPSD(unittest.TestCase):
                         msg='seg_len=%d seg_stride=%d method=%s -> rms=%.3f' % \
                         (seg_len, seg_stride, method, err_rms))
 
+    def test_streaming_welch(self):
+        """Test that the streaming Welch estimator matches welch"""
+        seg_len = 2048
+        seg_stride = seg_len // 2
+        num_segments = 15
+        length = (num_segments - 1) * seg_stride + seg_len
+        for method in ('mean', 'median', 'median-mean'):
+            with self.context:
+                estimator = pycbc.psd.StreamingWelch(seg_len, seg_stride,
+                                                     avg_method=method)
+                noise = self.noise.copy()
+                # Advance by whole strides, by part of a stride, and gate
+                # data inside the window after the first estimate
+                for i, start in enumerate([0, 2048, 3072, 3072, 3500,
+                                           10000, 10000 + 3 * seg_stride]):
+                    if i == 3:
+                        noise[start + 5000:start + 5100] = 0
+                    data = noise[start:start + length]
+                    computed = estimator.num_computed
+                    psd = estimator(data)
+                    expected = pycbc.psd.welch(data, seg_len=seg_len,
+                                               seg_stride=seg_stride,
+                                               avg_method=method)
+                    # Segments transformed in an earlier call may have had
+                    # another alignment, and so another FFTW plan
+                    numpy.testing.assert_allclose(psd.numpy(),
+                                                  expected.numpy(),
+                                                  rtol=1e-12)
+                    self.assertEqual(psd.delta_f, expected.delta_f)
+                    if i == 1:
+                        # Two strides forward, only two new segments
+                        self.assertEqual(estimator.num_computed - computed,
+                                         2)
+                    if i == 3:
+                        # The gate overlaps two segments
+                        self.assertEqual(estimator.num_computed - computed,
+                                         2)
+                with self.assertRaises(ValueError):
+                    estimator(noise[:length - 1])
+
     def test_truncation(self):
         """Test inverse PSD truncation"""
         for seg_len in (2048, 4096, 8192):
@@ -0,0 +1,65 @@
+"""
+Unit tests for evaluating string expressions of FieldArray fields
+"""
+import unittest
+import numpy
+
+from utils import simple_exit
+from pycbc.io import record
+from pycbc.io.record import WaveformArray
+
+
+class TestFieldArrayExpressions(unittest.TestCase):
+    def setUp(self):
+        rng = numpy.random.default_rng(0)
+        self.arr = WaveformArray.from_arrays(
+            [rng.uniform(1, 50, 100), rng.uniform(1, 50, 100),
+             rng.integers(0, 10, 100)],
+            dtype=[('mass1', float), ('mass2', float),
+                   (('number', 'n'), int)])
+        self.mass1 = self.arr['mass1']
+        self.mass2 = self.arr['mass2']
+
+    def tearDown(self):
+        record.fused_evaluation(False)
+
+    def check_expressions(self):
+        mtotal = self.mass1 + self.mass2
+        eta = self.mass1 * self.mass2 / mtotal**2
+        numpy.testing.assert_allclose(self.arr['mass1*mass2/(mass1+mass2)'],
+                                      self.mass1 * self.mass2 / mtotal)
+        numpy.testing.assert_allclose(self.arr['sqrt(mass1)+pi*number'],
+                                      numpy.sqrt(self.mass1)
+                                      + numpy.pi * self.arr['n'])
+        numpy.testing.assert_allclose(self.arr['mchirp'],
+                                      mtotal * eta**0.6)
+        numpy.testing.assert_allclose(self.arr['mchirp/mass1'],
+                                      mtotal * eta**0.6 / self.mass1)
+        numpy.testing.assert_allclose(
+            self.arr['mchirp_from_mass1_mass2(mass1, mass2)'],
+            mtotal * eta**0.6)
+        numpy.testing.assert_allclose(self.arr[:10]['mass1+mass2'],
+                                      mtotal[:10])
+
+    def test_expressions(self):
+        self.check_expressions()
+        # the compiled expressions are reused by other arrays and slices
+        info = record._compile_item.cache_info()
+        self.check_expressions()
+        self.assertEqual(record._compile_item.cache_info().misses,
+                         info.misses)
+
+    @unittest.skipIf(record.numexpr is None, 'numexpr is not installed')
+    def test_fused_expressions(self):
+        record.fused_evaluation(True)
+        self.assertTrue(record.fused_evaluation())
+        self.check_expressions()
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(
+    TestFieldArrayExpressions))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
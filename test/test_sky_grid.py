@@ -0,0 +1,74 @@
+"""
+Unit tests for the antenna pattern and time delay tables of
+pycbc.tmpltbank.sky_grid.SkyGrid
+"""
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from utils import simple_exit
+from pycbc.detector import Detector
+from pycbc.tmpltbank.sky_grid import SkyGrid
+
+
+class TestSkyGrid(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.ra = rng.uniform(0, 2 * np.pi, 50)
+        self.dec = np.arcsin(rng.uniform(-1, 1, 50))
+        self.time = 1187008882.4
+        self.grid = SkyGrid(self.ra, self.dec, ['L1', 'H1'], self.time)
+
+    def check_tables(self, grid, detectors):
+        patterns = grid.calculate_antenna_patterns(detectors)
+        delays = grid.calculate_time_delays(detectors)
+        self.assertEqual(sorted(patterns), sorted(detectors))
+        for det_name in detectors:
+            det = Detector(det_name)
+            self.assertEqual(patterns[det_name].shape, (len(self.ra), 2))
+            for i, (ra, dec) in enumerate(zip(self.ra, self.dec)):
+                np.testing.assert_allclose(
+                    patterns[det_name][i],
+                    det.antenna_pattern(ra, dec, 0, t_gps=self.time),
+                    rtol=1e-12, atol=1e-14)
+                np.testing.assert_allclose(
+                    delays[det_name][i],
+                    det.time_delay_from_earth_center(ra, dec, self.time),
+                    rtol=1e-12, atol=1e-16)
+
+    def test_tables(self):
+        self.check_tables(self.grid, ['H1', 'L1'])
+        self.assertEqual(sorted(self.grid.calculate_antenna_patterns()),
+                         ['H1', 'L1'])
+        # Extended lazily to detectors which are not part of the grid
+        self.check_tables(self.grid, ['V1'])
+        # Tables are computed once
+        self.assertIs(self.grid.calculate_time_delays(['V1'])['V1'],
+                      self.grid.calculate_time_delays(['V1'])['V1'])
+
+    def test_file_round_trip(self):
+        # Both tables are stored for a detector with only one computed
+        self.grid.calculate_antenna_patterns(['V1'])
+        self.grid.calculate_time_delays(['K1'])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'grid.hdf')
+            self.grid.write_to_file(path)
+            grid = SkyGrid.read_from_file(path)
+        detectors = ['H1', 'K1', 'L1', 'V1']
+        self.assertEqual(sorted(grid._antenna_patterns), detectors)
+        self.assertEqual(sorted(grid._time_delays), detectors)
+        np.testing.assert_array_equal(grid.ras, self.ra)
+        for det_name in detectors:
+            np.testing.assert_array_equal(
+                grid.calculate_antenna_patterns([det_name])[det_name],
+                self.grid.calculate_antenna_patterns([det_name])[det_name])
+        self.check_tables(grid, detectors)
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestSkyGrid))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
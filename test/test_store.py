@@ -0,0 +1,82 @@
+"""
+Unit tests for reading strain from hdf stores with pycbc.frame.StrainStore
+"""
+import os
+import tempfile
+import unittest
+import numpy
+
+from utils import simple_exit
+from pycbc.io import HFile
+from pycbc.frame import StrainStore, read_store
+
+
+class TestStrainStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, 'store.hdf')
+        self.rate = 16
+        # Segments are stored out of time order, with a gap from 1100 to
+        # 1110 and two adjacent segments after it
+        self.segs = [(1110, 1150), (1000, 1100), (1150, 1200)]
+        rng = numpy.random.default_rng(0)
+        self.data = {}
+        with HFile(self.fname, 'w') as f:
+            for chan, kwds in [('H1:CONTIG', {}),
+                               ('H1:CHUNKED', {'chunks': (100,),
+                                               'compression': 'gzip'})]:
+                for i, (s, e) in enumerate(self.segs):
+                    data = rng.normal(size=(e - s) * self.rate)
+                    f.create_dataset('{}/{}'.format(chan, i), data=data,
+                                     **kwds)
+                    self.data[chan, s] = data
+                f[chan + '/segments/start'] = [s for s, _ in self.segs]
+                f[chan + '/segments/end'] = [e for _, e in self.segs]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def expected(self, chan, start, end):
+        times = numpy.arange(start, end, 1. / self.rate)
+        out = numpy.zeros(len(times))
+        for s, e in self.segs:
+            keep = (times >= s) & (times < e)
+            idx = numpy.round((times[keep] - s) * self.rate).astype(int)
+            out[keep] = self.data[chan, s][idx]
+        return out
+
+    def test_read(self):
+        with StrainStore(self.fname, cache_blocks=2) as store:
+            for chan in ['H1:CONTIG', 'H1:CHUNKED']:
+                for start, end in [(1000, 1100), (1010.5, 1020),
+                                   (1120, 1180), (1150, 1200)]:
+                    for copy in [True, False]:
+                        ts = store.read(chan, start, end, copy=copy)
+                        self.assertEqual(ts.start_time, start)
+                        self.assertEqual(ts.delta_t, 1. / self.rate)
+                        numpy.testing.assert_array_equal(
+                            ts.numpy(), self.expected(chan, start, end))
+                numpy.testing.assert_array_equal(
+                    read_store(self.fname, chan, 1010, 1020).numpy(),
+                    self.expected(chan, 1010, 1020))
+
+    def test_gaps(self):
+        with StrainStore(self.fname) as store:
+            self.assertEqual(store.gaps('H1:CONTIG', 990, 1210),
+                             [(990, 1000), (1100, 1110), (1200, 1210)])
+            self.assertEqual(store.gaps('H1:CONTIG', 1120, 1180), [])
+            with self.assertRaises(ValueError):
+                store.read('H1:CONTIG', 1090, 1120)
+            ts = store.read('H1:CHUNKED', 1090, 1120, fill_value=0)
+            numpy.testing.assert_array_equal(
+                ts.numpy(), self.expected('H1:CHUNKED', 1090, 1120))
+            with self.assertRaises(ValueError):
+                store.read('H1:MISSING', 1000, 1010)
+
+
+suite = unittest.TestSuite()
+suite.addTest(unittest.TestLoader().loadTestsFromTestCase(TestStrainStore))
+
+if __name__ == '__main__':
+    results = unittest.TextTestRunner(verbosity=2).run(suite)
+    simple_exit(results)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+""" Time evaluating the antenna patterns and time delays of a network of
+detectors for a large number of samples, one detector at a time with
+Detector and all at once with DetectorNetwork.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy
+from pycbc.detector import Detector, DetectorNetwork
+
+parser = ArgumentParser()
+parser.add_argument('--samples', type=int, default=1000000)
+parser.add_argument('--detectors', nargs='+', default=['H1', 'L1', 'V1'])
+parser.add_argument('--accurate-gmst', action='store_true',
+                    help='Calculate the sidereal time accurately rather '
+                         'than from a reference time')
+parser.add_argument('--iterations', type=int, default=3)
+args = parser.parse_args()
+
+rng = numpy.random.default_rng(0)
+ra = rng.uniform(0, 2 * numpy.pi, args.samples)
+dec = numpy.arcsin(rng.uniform(-1, 1, args.samples))
+pol = rng.uniform(0, 2 * numpy.pi, args.samples)
+time = 1187008882.4 + rng.uniform(-100, 100, args.samples)
+ref = None if args.accurate_gmst else 1187008882.4
+
+dets = [Detector(d, reference_time=ref) for d in args.detectors]
+network = DetectorNetwork(args.detectors, reference_time=ref)
+fp = numpy.empty((len(dets), args.samples))
+fc = numpy.empty((len(dets), args.samples))
+dt = numpy.empty((len(dets), args.samples))
+
+
+def per_detector():
+    for i, d in enumerate(dets):
+        fp[i], fc[i] = d.antenna_pattern(ra, dec, pol, time)
+        dt[i] = d.time_delay_from_earth_center(ra, dec, time)
+
+
+def batched():
+    network.antenna_pattern(ra, dec, pol, time, out=(fp, fc))
+    network.time_delay_from_earth_center(ra, dec, time, out=dt)
+
+
+for name, func in [('Detector', per_detector),
+                   ('DetectorNetwork', batched)]:
+    times = []
+    for _ in range(args.iterations):
+        start = perf_counter()
+        func()
+        times.append(perf_counter() - start)
+    print('%s: %.3f s for %d samples and %d detectors'
+          % (name, min(times), args.samples, len(dets)))
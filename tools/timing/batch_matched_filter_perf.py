@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+""" Compare the throughput, in templates per core-second, of filtering
+templates one at a time with MatchedFilterControl against filtering them in
+batches with BatchMatchedFilterControl.
+"""
+from argparse import ArgumentParser
+from time import time
+
+import numpy
+from pycbc import fft
+from pycbc.scheme import CPUScheme
+from pycbc.types import FrequencySeries, zeros, complex64
+from pycbc.filter import MatchedFilterControl, BatchMatchedFilterControl
+
+parser = ArgumentParser()
+parser.add_argument('--size', type=int, default=20,
+                    help='Length of the filter in log2 samples')
+parser.add_argument('--num-templates', type=int, default=64)
+parser.add_argument('--num-segments', type=int, default=2)
+parser.add_argument('--batch-size', type=int, default=16)
+parser.add_argument('--num-threads', type=int, default=1)
+parser.add_argument('--cluster-function', default='findchirp',
+                    choices=['findchirp', 'symmetric'])
+parser.add_argument('--fft-backend', default=None,
+                    help='FFT backend to use, e.g. fftw or mkl')
+args = parser.parse_args()
+
+if args.fft_backend is not None:
+    fft.backend_support.set_backend([args.fft_backend])
+
+tlen = 2 ** args.size
+delta_f = 1.0 / 256
+rng = numpy.random.default_rng(0)
+
+
+def random_series(length):
+    data = rng.normal(size=length) + 1j * rng.normal(size=length)
+    return FrequencySeries(data.astype(complex64), delta_f=delta_f)
+
+
+ctx = CPUScheme(num_threads=args.num_threads)
+with ctx:
+    segments = [random_series(tlen) for _ in range(args.num_segments)]
+    for seg in segments:
+        seg.analyze = slice(tlen // 8, tlen - tlen // 8)
+    templates = [random_series(tlen // 2 + 1)
+                 for _ in range(args.num_templates)]
+    # A normalization which keeps only the loudest noise fluctuations
+    norm = 4 * delta_f * tlen ** 0.5 / 6
+
+    template_mem = zeros(tlen, dtype=complex64)
+    single = MatchedFilterControl(20, None, 1, tlen, delta_f, complex64,
+                                  segments, template_mem, True,
+                                  cluster_function=args.cluster_function)
+    batch = BatchMatchedFilterControl(20, None, 1, tlen, delta_f, complex64,
+                                      segments, args.batch_size, True,
+                                      cluster_function=args.cluster_function)
+
+    t1 = time()
+    for tmplt in templates:
+        template_mem[:len(tmplt)] = tmplt
+        for snum in range(len(segments)):
+            single.matched_filter_and_cluster(snum, norm ** 2, 4096)
+    t2 = time()
+    single_rate = args.num_templates / (t2 - t1) / args.num_threads
+
+    t1 = time()
+    for i in range(0, args.num_templates, args.batch_size):
+        batch.set_templates(templates[i:i + args.batch_size])
+        norms = [norm ** 2] * batch.num_templates
+        for snum in range(len(segments)):
+            batch.matched_filter_and_cluster(snum, norms, 4096)
+    t2 = time()
+    batch_rate = args.num_templates / (t2 - t1) / args.num_threads
+
+print("Filter length 2^%s, %s segments, %s thread(s)"
+      % (args.size, args.num_segments, args.num_threads))
+print("One at a time: {:.2f} templates per core-second".format(single_rate))
+print("Batches of {}: {:.2f} templates per core-second".format(
+      args.batch_size, batch_rate))
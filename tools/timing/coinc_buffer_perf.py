@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+""" Time adding background coincs to a CoincExpireBuffer and querying the
+IFAR of candidates against it, with a background the size PyCBC Live holds
+after days of running.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy
+from pycbc.events.coinc import CoincExpireBuffer
+
+parser = ArgumentParser()
+parser.add_argument('--background-size', type=int, default=5000000,
+                    help='Number of background coincs held in the buffer')
+parser.add_argument('--strides', type=int, default=2000,
+                    help='Number of strides the coincs are kept for')
+parser.add_argument('--iterations', type=int, default=50)
+parser.add_argument('--queries', type=int, default=10,
+                    help='Number of IFAR queries per stride')
+args = parser.parse_args()
+
+ifos = ['H1', 'L1']
+rng = numpy.random.default_rng(0)
+per_stride = args.background_size // args.strides
+buf = CoincExpireBuffer(args.strides, ifos)
+
+
+def add_stride():
+    stat = rng.exponential(size=per_stride).astype(numpy.float32)
+    times = {ifo: buf.time[ifo] + 1 - rng.integers(0, 3, per_stride)
+             for ifo in ifos}
+    buf.add(stat, times, ifos)
+
+
+# Fill the buffer up to its steady state size
+for _ in range(args.strides):
+    add_stride()
+print('%d coincs in the buffer, %.1f MB' % (len(buf), buf.nbytes / 1e6))
+
+add_times = []
+query_times = []
+for _ in range(args.iterations):
+    start = perf_counter()
+    add_stride()
+    add_times.append(perf_counter() - start)
+    values = rng.exponential(size=args.queries) + 5
+    start = perf_counter()
+    for value in values:
+        buf.num_greater(value)
+    query_times.append((perf_counter() - start) / args.queries)
+
+print('add + expire: median %.3f ms, max %.3f ms per stride'
+      % (1e3 * numpy.median(add_times), 1e3 * max(add_times)))
+print('num_greater: median %.1f us, max %.1f us per query'
+      % (1e6 * numpy.median(query_times), 1e6 * max(query_times)))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+""" Compare the throughput of evaluating an ensemble of walkers with an
+inference model one point at a time, as the samplers' CallModel does, with
+evaluating all of them at once with CallModel.batch.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy
+from pycbc.inference import models
+from pycbc.distributions import Uniform, JointDistribution
+
+parser = ArgumentParser()
+parser.add_argument('--model', default='test_normal',
+                    choices=['test_normal', 'test_eggbox', 'test_rosenbrock'])
+parser.add_argument('--ndim', type=int, default=4)
+parser.add_argument('--nwalkers', type=int, nargs='+',
+                    default=[100, 1000, 10000])
+parser.add_argument('--repeats', type=int, default=5)
+args = parser.parse_args()
+
+params = ['x{}'.format(i) for i in range(args.ndim)]
+prior = JointDistribution(params, Uniform(**{p: (-10, 10) for p in params}))
+model = models.get_model(args.model)(params, prior=prior)
+call = models.CallModel(model, 'logposterior')
+rng = numpy.random.default_rng(0)
+
+
+def single(points):
+    return [call(p) for p in points]
+
+
+for nwalkers in args.nwalkers:
+    points = rng.uniform(-10, 10, size=(nwalkers, args.ndim))
+    for name, func in [('one at a time', single), ('batch', call.batch)]:
+        start = perf_counter()
+        for _ in range(args.repeats):
+            func(points)
+        elapsed = (perf_counter() - start) / args.repeats
+        print('%d walkers, %s: %.4f s, %.3g points / s'
+              % (nwalkers, name, elapsed, nwalkers / elapsed))
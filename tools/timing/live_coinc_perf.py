@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+""" Time finding the coincidences of the triggers of a network of detectors
+in PyCBC Live, with one background estimator for each pair of detectors and
+with a single estimator for all of them.
+"""
+from argparse import ArgumentParser
+from itertools import combinations
+from time import perf_counter, process_time
+from types import SimpleNamespace
+
+import numpy
+from pycbc.events.coinc import LiveCoincTimeslideBackgroundEstimator
+
+parser = ArgumentParser()
+parser.add_argument('--ifos', nargs='+', default=['H1', 'L1', 'V1'])
+parser.add_argument('--num-templates', type=int, default=20000)
+parser.add_argument('--trigger-fraction', type=float, default=0.1,
+                    help='Fraction of templates with a trigger in each '
+                         'ifo and block')
+parser.add_argument('--analysis-chunk', type=int, default=8)
+parser.add_argument('--fill-blocks', type=int, default=200,
+                    help='Number of blocks added before timing')
+parser.add_argument('--iterations', type=int, default=20)
+parser.add_argument('--max-coinc-ifos', type=int, default=2)
+args = parser.parse_args()
+
+coinc_args = SimpleNamespace(
+    sngl_ranking='snr',
+    ranking_statistic='quadsum',
+    statistic_files=None,
+    statistic_keywords=None,
+    statistic_features=None,
+    timeslide_interval=0.1,
+    background_ifar_limit=100,
+    store_background=False,
+    coinc_window_pad=0.002,
+    statistic_refresh_rate=None,
+    max_coinc_ifos=args.max_coinc_ifos,
+)
+rng = numpy.random.default_rng(0)
+start_time = 1300000000
+
+
+def get_trigs():
+    global start_time
+    base = start_time + rng.uniform(0, args.analysis_chunk,
+                                    args.num_templates)
+    trigs = {}
+    for ifo in args.ifos:
+        tids = numpy.flatnonzero(
+            rng.uniform(size=args.num_templates) < args.trigger_fraction)
+        num = len(tids)
+        trigs[ifo] = {
+            'snr': rng.uniform(4.5, 10, num).astype(numpy.float32),
+            'end_time': base[tids] + rng.uniform(-.01, .01, num),
+            'chisq': rng.uniform(0.5, 1.5, num).astype(numpy.float32),
+            'chisq_dof': numpy.full(num, 10, dtype=numpy.int32),
+            'coa_phase': rng.uniform(0, 2 * numpy.pi,
+                                     num).astype(numpy.float32),
+            'sigmasq': numpy.ones(num, dtype=numpy.float32),
+            'template_id': tids.astype(numpy.int32),
+            'mass1': rng.uniform(2, 100, num).astype(numpy.float32),
+            'mass2': rng.uniform(2, 100, num).astype(numpy.float32),
+        }
+    start_time += args.analysis_chunk
+    return trigs
+
+
+def make(ifos):
+    return LiveCoincTimeslideBackgroundEstimator.from_cli(
+        coinc_args, args.num_templates, args.analysis_chunk, list(ifos))
+
+
+setups = {
+    'pair estimators': [make(c) for c in combinations(args.ifos, 2)],
+    'network estimator': [make(args.ifos)],
+}
+
+for _ in range(args.fill_blocks):
+    trigs = get_trigs()
+    for estimators in setups.values():
+        for estimator in estimators:
+            estimator.add_singles({i: dict(t) for i, t in trigs.items()})
+
+timings = {name: ([], []) for name in setups}
+for _ in range(args.iterations):
+    trigs = get_trigs()
+    for name, estimators in setups.items():
+        wall = perf_counter()
+        cpu = process_time()
+        for estimator in estimators:
+            estimator.add_singles({i: dict(t) for i, t in trigs.items()})
+        timings[name][0].append(perf_counter() - wall)
+        timings[name][1].append(process_time() - cpu)
+
+for name, (wall, cpu) in timings.items():
+    print('%s: median %.3f s wall, %.3f s CPU per block'
+          % (name, numpy.median(wall), numpy.median(cpu)))
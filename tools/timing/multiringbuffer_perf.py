@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+""" Measure the cost per stride of adding single detector triggers to the
+MultiRingBuffer used by the live coincidence code, and of reading back the
+buffers of the templates that were just triggered, at live-like bank sizes
+and trigger rates.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy
+from pycbc.events.coinc import MultiRingBuffer
+
+parser = ArgumentParser()
+parser.add_argument('--num-templates', type=int, default=500000)
+parser.add_argument('--triggers-per-stride', type=int, default=2000)
+parser.add_argument('--buffer-strides', type=int, default=2000,
+                    help='Number of strides for which triggers are kept')
+parser.add_argument('--strides', type=int, default=5000)
+parser.add_argument('--zipf-exponent', type=float, default=1.2,
+                    help='Exponent of the distribution of triggers over '
+                         'templates, so that some templates trigger often')
+args = parser.parse_args()
+
+dtype = [('end_time', numpy.float64), ('stat', numpy.float32),
+         ('snr', numpy.float32), ('chisq', numpy.float32),
+         ('coa_phase', numpy.float32), ('sigmasq', numpy.float32)]
+
+rng = numpy.random.default_rng(0)
+# Shuffle the templates so that the loud ones are spread through the bank
+template_order = rng.permutation(args.num_templates)
+
+start = perf_counter()
+buf = MultiRingBuffer(args.num_templates, args.buffer_strides, dtype)
+print('Setup: %.3f s' % (perf_counter() - start))
+
+add_time = read_time = 0
+for n in range(args.strides):
+    num = rng.poisson(args.triggers_per_stride)
+    tid = rng.zipf(args.zipf_exponent, size=num) % args.num_templates
+    tid = template_order[tid]
+    trigs = numpy.zeros(num, dtype=dtype)
+    trigs['end_time'] = n + rng.uniform(size=num)
+    trigs['stat'] = rng.uniform(size=num)
+
+    start = perf_counter()
+    buf.add(tid, trigs)
+    add_time += perf_counter() - start
+
+    start = perf_counter()
+    for t in tid:
+        buf.data(t)['end_time']
+    read_time += perf_counter() - start
+
+    if (n + 1) % (args.strides // 10 or 1) == 0:
+        print('Stride %d: %d triggers held, %.1f MB, add %.3f ms / stride, '
+              'read %.3f us / trigger'
+              % (n + 1, buf.num_elements(), buf.nbytes / 1e6,
+                 1e3 * add_time / (n + 1),
+                 1e6 * read_time / ((n + 1) * args.triggers_per_stride)))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+""" Compare the combined signal rate lookup of the phasetd statistic with
+looking up the coincs of each reference ifo in turn.
+"""
+import os
+import itertools
+import tempfile
+from argparse import ArgumentParser
+from time import time
+
+import h5py
+import numpy
+from pycbc.events.stat import (PhaseTDStatistic,
+                               parse_statistic_feature_options)
+
+parser = ArgumentParser()
+parser.add_argument('--ifos', nargs='+', default=['H1', 'L1', 'V1'])
+parser.add_argument('--num-coincs', type=int, default=10**6)
+parser.add_argument('--repeats', type=int, default=5)
+args = parser.parse_args()
+
+
+def make_hist(fname):
+    """ Write a signal histogram with a third of the bins occupied """
+    rng = numpy.random.default_rng(0)
+    ranges = [range(-15, 16), range(0, 16), range(0, 10)]
+    bins = numpy.array(list(itertools.product(*ranges)))
+    ncol = 3 * (len(args.ifos) - 1)
+    with h5py.File(fname, 'w') as f:
+        f.attrs['stat'] = 'phasetd_newsnr_' + ''.join(args.ifos)
+        f.attrs['ifos'] = args.ifos
+        f.attrs['twidth'] = 0.001
+        f.attrs['pwidth'] = 2 * numpy.pi / 16
+        f.attrs['swidth'] = 0.5
+        f.attrs['srbmin'] = 0
+        f.attrs['srbmax'] = 10
+        f.attrs['sensitivity_ratios'] = numpy.ones(len(args.ifos))
+        for ifo in args.ifos:
+            # Random occupied bins of every other-ifo combination
+            pbins = numpy.concatenate([
+                bins[rng.integers(0, len(bins), size=2 * 10**5)]
+                for _ in range(len(args.ifos) - 1)
+            ], axis=1)
+            pbins = numpy.unique(pbins, axis=0)
+            param = numpy.zeros(len(pbins), dtype=[
+                ('c%s' % i, numpy.int32) for i in range(ncol)
+            ])
+            for i in range(ncol):
+                param['c%s' % i] = pbins[:, i]
+            f[ifo + '/param_bin'] = param
+            f[ifo + '/weights'] = rng.uniform(1, 2, size=len(pbins))
+
+
+def make_stats():
+    rng = numpy.random.default_rng(1)
+    n = args.num_coincs
+    stats = {}
+    for ifo in args.ifos:
+        stats[ifo] = {
+            'snr': rng.uniform(4, 10, size=n),
+            'coa_phase': rng.uniform(0, 2 * numpy.pi, size=n),
+            'end_time': 1e9 + rng.uniform(-0.01, 0.01, size=n),
+            'sigmasq': rng.uniform(1, 10, size=n),
+        }
+    shift = rng.integers(-100, 100, size=n) * 0.1
+    return stats, shift
+
+
+with tempfile.TemporaryDirectory() as tdir:
+    fname = os.path.join(tdir, 'hist.hdf')
+    make_hist(fname)
+    kwargs = parse_statistic_feature_options(['phasetd'], [])
+    stat = PhaseTDStatistic('snr', files=[fname], ifos=args.ifos, **kwargs)
+    stats, shift = make_stats()
+    to_shift = list(range(len(args.ifos)))
+
+    for name, func in [('by reference ifo', stat.logsignalrate_by_ifo),
+                       ('combined lookup', stat.logsignalrate)]:
+        func(stats, shift, to_shift)
+        start = time()
+        for _ in range(args.repeats):
+            func(stats, shift, to_shift)
+        elapsed = (time() - start) / args.repeats
+        print('%s: %.3f s, %.3g coincs / s'
+              % (name, elapsed, args.num_coincs / elapsed))
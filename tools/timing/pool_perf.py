@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+""" Measure the round-trip latency of BroadcastPool.broadcast and allmap
+as a function of the number of worker processes, optionally sending a
+dictionary of arrays to every worker.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy
+from pycbc.pool import BroadcastPool
+
+parser = ArgumentParser()
+parser.add_argument('--processes', type=int, nargs='+',
+                    default=[1, 2, 4, 8])
+parser.add_argument('--iterations', type=int, default=200)
+parser.add_argument('--array-size', type=int, default=0,
+                    help='Length of the arrays sent to and returned by '
+                         'each worker')
+parser.add_argument('--shared-memory-threshold', type=int,
+                    help='Pass arrays through shared memory above this '
+                         'many bytes')
+args = parser.parse_args()
+
+
+def noop(x):
+    return x
+
+
+payload = {ifo: {col: numpy.zeros(args.array_size, dtype=numpy.float32)
+                 for col in ['snr', 'chisq', 'end_time', 'sigmasq']}
+           for ifo in ['H1', 'L1', 'V1']}
+
+for nproc in args.processes:
+    pool = BroadcastPool(nproc,
+                         shared_memory_threshold=args.shared_memory_threshold)
+    # make sure all the workers have started
+    pool.broadcast(noop, None)
+
+    calls = [('broadcast', lambda: pool.broadcast(noop, payload)),
+             ('allmap', lambda: pool.allmap(noop, [payload] * nproc))]
+    for name, call in calls:
+        times = []
+        for _ in range(args.iterations):
+            t1 = perf_counter()
+            call()
+            times.append(perf_counter() - t1)
+        times = numpy.array(times) * 1e3
+        print("{} processes:{} median:{:.3f} ms 99%:{:.3f} ms".format(
+              name, nproc, numpy.median(times), numpy.percentile(times, 99)))
+    pool.close_pool()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+""" Compare the latency of re-estimating the PSD of a live strain buffer with
+pycbc.psd.welch against pycbc.psd.StreamingWelch, which only transforms the
+segments that entered the window since the last estimate.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy
+import pycbc.psd
+from pycbc.types import TimeSeries
+
+parser = ArgumentParser()
+parser.add_argument('--sample-rate', type=int, default=2048)
+parser.add_argument('--psd-segment-length', type=int, default=16)
+parser.add_argument('--psd-samples', type=int, default=30)
+parser.add_argument('--block-size', type=int, default=8,
+                    help='Seconds the buffer advances between estimates')
+parser.add_argument('--avg-method', default='median',
+                    choices=['mean', 'median', 'median-mean'])
+parser.add_argument('--iterations', type=int, default=20)
+args = parser.parse_args()
+
+seg_len = args.sample_rate * args.psd_segment_length
+seg_stride = seg_len // 2
+length = (args.psd_samples - 1) * seg_stride + seg_len
+step = args.block_size * args.sample_rate
+rng = numpy.random.default_rng(0)
+data = rng.normal(size=length + step * args.iterations).astype(numpy.float32)
+strain = TimeSeries(data, delta_t=1. / args.sample_rate, epoch=1e9)
+
+estimator = pycbc.psd.StreamingWelch(seg_len, seg_stride,
+                                     avg_method=args.avg_method)
+
+
+def full(ts):
+    return pycbc.psd.welch(ts, seg_len=seg_len, seg_stride=seg_stride,
+                           avg_method=args.avg_method)
+
+
+for name, func in [('welch', full), ('streaming', estimator)]:
+    # Warm up the FFT plans and the estimator's ring
+    func(strain[:length])
+    times = []
+    for i in range(1, args.iterations + 1):
+        start = perf_counter()
+        func(strain[i * step:i * step + length])
+        times.append(perf_counter() - start)
+    print('%s: median %.2f ms, max %.2f ms per estimate'
+          % (name, 1e3 * numpy.median(times), 1e3 * max(times)))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+""" Compare reading a merged single-detector trigger file template by
+template through region references with the bulk reader of ReadByTemplate.
+"""
+import os
+import tempfile
+from argparse import ArgumentParser
+from time import time
+
+import h5py
+import numpy
+from pycbc.io.hdf import HFile, ReadByTemplate
+
+parser = ArgumentParser()
+parser.add_argument('--num-templates', type=int, default=5000)
+parser.add_argument('--num-triggers', type=int, default=500000)
+parser.add_argument('--chunksize', type=int, default=10**7)
+parser.add_argument('--columns', nargs='+',
+                    default=['end_time', 'snr', 'chisq', 'chisq_dof'])
+args = parser.parse_args()
+
+
+def make_file(fname):
+    """ Write a trigger file laid out as by pycbc_coinc_mergetrigs """
+    rng = numpy.random.default_rng(0)
+    hashes = rng.permutation(args.num_templates)
+    tids = rng.integers(0, args.num_templates, size=args.num_triggers)
+    trigger_hashes = hashes[tids]
+    trigger_sort = trigger_hashes.argsort()
+    bank_tids = hashes.argsort()
+    unsort = bank_tids.argsort()
+    bounds = numpy.searchsorted(trigger_hashes[trigger_sort],
+                                hashes[bank_tids])
+    bounds = numpy.concatenate([bounds, [args.num_triggers]])
+
+    with HFile(fname, 'w') as f:
+        f['H1/search/start_time'] = [0.]
+        f['H1/search/end_time'] = [4096.]
+        f['H1/template_boundaries'] = bounds[unsort]
+        cols = {'template_id': tids}
+        for col in args.columns:
+            cols[col] = rng.uniform(0, 4096, size=args.num_triggers)
+        for col, data in cols.items():
+            dset = f.create_dataset('H1/' + col, data=data[trigger_sort],
+                                    compression='gzip', shuffle=True)
+            refs = [dset.regionref[bounds[unsort[j]]:bounds[unsort[j] + 1]]
+                    for j in range(args.num_templates)]
+            f.create_dataset('H1/' + col + '_template', data=refs,
+                             dtype=h5py.special_dtype(ref=h5py.RegionReference))
+
+
+def run(reader):
+    for tnum in range(args.num_templates):
+        reader.set_template(tnum)
+        for col in args.columns:
+            reader[col]
+
+
+with tempfile.TemporaryDirectory() as tdir:
+    fname = os.path.join(tdir, 'H1-MERGED.hdf')
+    make_file(fname)
+
+    reader = ReadByTemplate(fname)
+    t1 = time()
+    run(reader)
+    t2 = time()
+    print("Region references: {:3.3f} s".format(t2 - t1))
+
+    reader = ReadByTemplate(fname)
+    t1 = time()
+    reader.load_templates(numpy.arange(args.num_templates),
+                          chunksize=args.chunksize)
+    run(reader)
+    t2 = time()
+    print("Bulk read: {:3.3f} s".format(t2 - t1))